@@ -0,0 +1,62 @@
+"""
+pinq.benchmarks
+~~~~~~~~~~~~~~~
+
+Times every operator of pinq against builtin and itertools baselines.
+
+Usage::
+
+    $ python benchmarks --scales 1e3,1e5,1e7 --repeat 5 --output results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cases import CASES, make_data
+from runner import run
+
+
+def _scales(value):
+    return [int(float(scale)) for scale in value.split(",")]
+
+
+def _report(result):
+    def _kib(peak):
+        return "-" if peak is None else "%.0f" % (peak / 1024.0)
+    print("%-28s %10d %12.3f %12.3f %8.2fx %12s %12s" % (
+        result['operator'], result['scale'], result['pinq']['median'] * 1000,
+        result['baseline']['median'] * 1000, result['overhead'],
+        _kib(result['pinq']['peak_memory']), _kib(result['baseline']['peak_memory'])))
+    sys.stdout.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks", description=__doc__.split("\n")[4])
+    parser.add_argument("--scales", type=_scales, default=[1000, 100000, 10000000],
+                        help="comma separated input sizes (default: 1e3,1e5,1e7)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timed runs of each operator (default: 5)")
+    parser.add_argument("--operators", type=lambda value: value.split(","), default=None,
+                        help="comma separated operators to run (default: all)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip measuring peak memory with tracemalloc")
+    parser.add_argument("--output", default=None, help="file to save the results to as JSON")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in CASES if case.enabled and (
+        args.operators is None or case.name in args.operators)]
+    print("%-28s %10s %12s %12s %9s %12s %12s" % (
+        "operator", "scale", "pinq ms", "baseline ms", "overhead", "pinq KiB", "baseline KiB"))
+    results = run(cases, args.scales, make_data, args.repeat, not args.no_memory, _report)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,508 @@
+"""
+benchmarks.cases
+~~~~~~~~~~~~~~~~
+
+Benchmark cases for every operator of Queryable and OrderedQueryable, each paired with a
+hand-written baseline using builtins and itertools.
+"""
+
+import csv
+import heapq
+import json
+import operator
+import os
+import pickle
+import random
+from array import array
+from collections import deque
+from functools import reduce
+from itertools import chain, dropwhile, islice, takewhile
+
+import pinq
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_consume = deque(maxlen=0).extend
+
+
+class Case(object):
+    """A benchmark of a single operator against a baseline.
+
+    Both functions take the input data and a scratch directory, and must fully evaluate the
+    operator. If 'setup' is given, it is called with the input data before either function is
+    timed at each scale, and is not timed itself.
+    """
+
+    def __init__(self, name, run_pinq, run_baseline, enabled=True, setup=None):
+        self.name = name
+        self.run_pinq = run_pinq
+        self.run_baseline = run_baseline
+        self.enabled = enabled
+        self.setup = setup
+
+
+class _Warm(object):
+    """A case function that times a query against state built once per scale, in the setup of
+    its case, such as a primed cache or an index.
+
+    Cases using it are named with a "_warm" suffix, since their baselines scan the data on
+    every run and so are not a like-for-like comparison.
+    """
+
+    def __init__(self, build, run):
+        self.build = build
+        self.run = run
+        self.state = None
+
+    def setup(self, data):
+        self.state = self.build(data)
+
+    def __call__(self, data, directory):
+        return self.run(self.state)
+
+
+def _warm_case(name, build, run, run_baseline):
+    """Returns a case timing 'run' on the state 'build' creates from the input data."""
+    warm = _Warm(build, run)
+    return Case(name, warm, run_baseline, setup=warm.setup)
+
+
+def _key(x):
+    return x % 1000
+
+
+def _key2(x):
+    return x % 7
+
+
+def _is_even(x):
+    return x % 2 == 0
+
+
+def _double(x):
+    return x * 2
+
+
+def _pair(x, y):
+    return (x, y)
+
+
+def _never(x):
+    return x < 0
+
+
+def _small(x):
+    return x < 500
+
+
+def _nonnegative(x):
+    return x >= 0
+
+
+def _is_zero(x):
+    return x == 0
+
+
+def _streamed(run):
+    """Returns a case function that consumes the queryable created by 'run'."""
+    return lambda data, directory: _consume(run(pinq.as_queryable(data)))
+
+
+def _spilling(run):
+    """Returns a case function that consumes the queryable created by 'run' under a memory
+    budget small enough to make it spill to 'directory'."""
+    def _case(data, directory):
+        with pinq.MemoryBudget(1 << 16, spill=True, spill_directory=directory):
+            _consume(run(pinq.as_queryable(data)))
+    return _case
+
+
+def _evaluated(run):
+    """Returns a case function that evaluates a terminal operator."""
+    return lambda data, directory: run(pinq.as_queryable(data))
+
+
+def _baseline(run):
+    """Returns a baseline function that consumes the iterable created by 'run'."""
+    return lambda data, directory: _consume(run(data))
+
+
+def _path(directory, name):
+    return os.path.join(directory, name)
+
+
+def _write_lines(data, directory):
+    with open(_path(directory, "baseline.txt"), 'w') as f:
+        for x in data:
+            f.write(str(x))
+            f.write("\n")
+
+
+def _write_csv(data, directory):
+    with open(_path(directory, "baseline.csv"), 'w') as f:
+        writer = csv.writer(f)
+        for x in data:
+            writer.writerow((x, x))
+
+
+def _write_jsonl(data, directory):
+    with open(_path(directory, "baseline.jsonl"), 'w') as f:
+        for x in data:
+            f.write(json.dumps(x))
+            f.write("\n")
+
+
+def _write_pickle(data, directory):
+    with open(_path(directory, "baseline.pickle"), 'wb') as f:
+        pickle.dump(list(data), f, pickle.HIGHEST_PROTOCOL)
+
+
+def _sorted_pairs(data):
+    return sorted(sorted(data, key=_key2), key=_key)
+
+
+def _fork(iterator):
+    count = total = 0
+    high = None
+    for x in iterator:
+        count += 1
+        if _is_even(x):
+            total += x
+        if high is None or high < x:
+            high = x
+    return count, total, high
+
+
+def _groups(data):
+    groups = {}
+    for x in data:
+        groups.setdefault(_key(x), []).append(x)
+    return sorted(groups.items())
+
+
+def _grouped_sums(data):
+    sums = {}
+    for x in data:
+        if _is_even(x):
+            sums[_key(x)] = sums.get(_key(x), 0) + x
+    return sums
+
+
+def _hash_join(data, other):
+    groups = {}
+    for y in other:
+        groups.setdefault(y, []).append(y)
+    return ((x, y) for x in data for y in groups.get(_key(x), ()))
+
+
+def _hash_group_join(data, other):
+    groups = {}
+    for y in other:
+        groups.setdefault(y, []).append(y)
+    return ((x, groups.get(_key(x), [])) for x in data)
+
+
+def _median(data):
+    ordered = sorted(data)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2.0
+
+
+def _sample_by(data):
+    generator = random.Random(0)
+    groups = {}
+    for x in data:
+        groups.setdefault(_key2(x), []).append(x)
+    return [generator.sample(group, min(10, len(group))) for group in groups.values()]
+
+
+def _bernoulli(data, p):
+    generator = random.Random(0)
+    return (x for x in data if generator.random() < p)
+
+
+def _describe(data):
+    mean = sum(data) / float(len(data))
+    variance = sum((x - mean) ** 2 for x in data) / (len(data) - 1)
+    return len(data), mean, variance, min(data), max(data)
+
+
+def _cached_count(data, cache):
+    return pinq.as_queryable(data).where(_is_even).cached(cache).count()
+
+
+def _primed_cache(data):
+    """Returns the data and a cache holding the result of counting its even elements."""
+    cache = pinq.QueryCache()
+    _cached_count(data, cache)
+    return data, cache
+
+
+def _indexed(index):
+    """Looks up a key in an index made by with_index."""
+    return index.where(pinq.predicates.key_equals(_key, 7)).to_list()
+
+
+def _ranged(index):
+    """Finds the elements of a key range in a sorted index."""
+    return index.range(100, 110).to_list()
+
+
+def _view(data):
+    """Returns a view of grouped sums over the data."""
+    source = pinq.ObservableSource(data)
+    return pinq.materialized_view(pinq.as_queryable(source).where(_is_even), group_by=_key,
+                                  total=pinq.sum_of())
+
+
+def _viewed(view):
+    """Appends a small batch to the source of a view, and reads the view."""
+    view.source.extend(range(100))
+    return view.result()
+
+
+def _running(data, function, total=None):
+    for x in data:
+        total = x if total is None else function(total, x)
+        yield total
+
+
+def _running_average(data):
+    total = 0
+    for count, x in enumerate(data, 1):
+        total += x
+        yield total / float(count)
+
+
+def _ranked(data):
+    partition = previous = None
+    rank = 0
+    for index, x in enumerate(sorted(data, key=lambda x: (_key2(x), _key(x)))):
+        if index == 0 or _key2(x) != partition:
+            partition, previous, row_number = _key2(x), None, 0
+        row_number += 1
+        if row_number == 1 or _key(x) != _key(previous):
+            rank = row_number
+        yield x, {"rank": rank, "previous": previous}
+        previous = x
+
+
+def _sessions(data):
+    session = []
+    last = None
+    for x in data:
+        if last is not None and x - last > 100:
+            yield session
+            session = []
+        if last is None or x > last:
+            last = x
+        session.append(x)
+    if session:
+        yield session
+
+
+def _top_frequent(data):
+    counts = {}
+    for x in data:
+        key = _key(x)
+        counts[key] = counts.get(key, 0) + 1
+    return heapq.nlargest(10, counts.items(), key=operator.itemgetter(1))
+
+
+def _unique(iterable, key=None):
+    seen = set()
+    for x in iterable:
+        k = x if key is None else key(x)
+        if k not in seen:
+            seen.add(k)
+            yield x
+
+
+_OTHER = list(range(1000))
+
+_OTHER_SET = frozenset(_OTHER)
+
+
+def make_data(scale):
+    """Returns a permutation of the integers below 'scale', scrambled deterministically."""
+    return [(i * 7919) % scale for i in range(scale)]
+
+CASES = [
+    Case("aggregate", _evaluated(lambda q: q.aggregate(operator.add)),
+         lambda data, directory: reduce(operator.add, data)),
+    Case("aggregate_many", _evaluated(lambda q: q.aggregate_many(
+        count=pinq.count_of(), total=pinq.sum_of(), low=pinq.min_of(), high=pinq.max_of())),
+         lambda data, directory: (len(data), sum(data), min(data), max(data))),
+    Case("all", _evaluated(lambda q: q.all(_nonnegative)),
+         lambda data, directory: all(_nonnegative(x) for x in data)),
+    Case("any", _evaluated(lambda q: q.any(_never)),
+         lambda data, directory: any(_never(x) for x in data)),
+    Case("average", _evaluated(lambda q: q.average()),
+         lambda data, directory: sum(data) / float(len(data))),
+    Case("cached", lambda data, directory: _cached_count(data, pinq.QueryCache()),
+         lambda data, directory: sum(1 for x in data if _is_even(x))),
+    _warm_case("cached_warm", _primed_cache, lambda state: _cached_count(*state),
+               lambda data, directory: sum(1 for x in data if _is_even(x))),
+    Case("cast", _streamed(lambda q: q.cast(float)), _baseline(lambda d: map(float, d))),
+    Case("concat", _streamed(lambda q: q.concat(_OTHER)), _baseline(lambda d: chain(d, _OTHER))),
+    Case("contains", _evaluated(lambda q: q.contains(-1)),
+         lambda data, directory: -1 in iter(data)),
+    Case("count", _evaluated(lambda q: q.count(_is_even)),
+         lambda data, directory: sum(1 for x in data if _is_even(x))),
+    Case("count_distinct", _evaluated(lambda q: q.count_distinct(_key)),
+         lambda data, directory: len(set(map(_key, data)))),
+    Case("count_distinct_approximate", _evaluated(lambda q: q.count_distinct(
+        _key, approximate=True)), lambda data, directory: len(set(map(_key, data)))),
+    Case("default_if_empty", _streamed(lambda q: q.default_if_empty(0)), _baseline(iter)),
+    Case("describe", _evaluated(lambda q: q.describe()), lambda data, directory: _describe(data)),
+    Case("difference", _streamed(lambda q: q.difference(_OTHER)),
+         _baseline(lambda d: (x for x in d if x not in _OTHER_SET))),
+    Case("distinct", _streamed(lambda q: q.distinct(_key)),
+         _baseline(lambda d: _unique(d, _key))),
+    Case("distinct_approximate", _streamed(lambda q: q.distinct(_key, approximate=True)),
+         _baseline(lambda d: _unique(d, _key))),
+    Case("distinct_spilling", _spilling(lambda q: q.distinct()), _baseline(_unique)),
+    Case("element_at", lambda data, directory: pinq.as_queryable(data).element_at(len(data) - 1),
+         lambda data, directory: next(islice(iter(data), len(data) - 1, None))),
+    Case("element_at_or_default",
+         lambda data, directory: pinq.as_queryable(data).element_at_or_default(len(data)),
+         lambda data, directory: next(islice(iter(data), len(data), None), None)),
+    Case("except_values", _streamed(lambda q: q.except_values(_OTHER, _key)),
+         _baseline(lambda d: (x for x in d if _key(x) not in _OTHER_SET))),
+    Case("first", _evaluated(lambda q: q.first()),
+         lambda data, directory: next(iter(data))),
+    Case("first_or_default", _evaluated(lambda q: q.first_or_default(_never)),
+         lambda data, directory: next((x for x in data if _never(x)), None)),
+    Case("fork", lambda data, directory: pinq.as_queryable(iter(data)).stream().fork(
+        lambda q: q.count(), lambda q: q.where(_is_even).sum(), lambda q: q.max()),
+         lambda data, directory: _fork(iter(data))),
+    Case("group_by", _streamed(lambda q: q.group_by(_key)), _baseline(_groups)),
+    Case("group_join", _streamed(lambda q: q.group_join(_OTHER, _key, pinq.transforms.identity,
+                                                        _pair)),
+         _baseline(lambda d: _hash_group_join(d, _OTHER))),
+    Case("intersect", _streamed(lambda q: q.intersect(_OTHER)),
+         _baseline(lambda d: _unique(x for x in d if x in _OTHER_SET))),
+    Case("join", _streamed(lambda q: q.join(_OTHER, _key, pinq.transforms.identity, _pair)),
+         _baseline(lambda d: _hash_join(d, _OTHER))),
+    Case("last", _evaluated(lambda q: q.last()),
+         lambda data, directory: deque(iter(data), maxlen=1).pop()),
+    Case("last_or_default", _evaluated(lambda q: q.last_or_default(_never)),
+         lambda data, directory: deque((x for x in data if _never(x)), maxlen=1)),
+    Case("long_count", _evaluated(lambda q: q.long_count()),
+         lambda data, directory: sum(1 for _ in data)),
+    Case("materialized_view", lambda data, directory: _view(data).result(),
+         lambda data, directory: _grouped_sums(data)),
+    _warm_case("materialized_view_warm", _view, _viewed,
+               lambda data, directory: _grouped_sums(data)),
+    Case("max", _evaluated(lambda q: q.max()), lambda data, directory: max(data)),
+    Case("median", _evaluated(lambda q: q.median()), lambda data, directory: _median(data)),
+    Case("median_approximate", _evaluated(lambda q: q.median(approximate=True)),
+         lambda data, directory: _median(data)),
+    Case("min", _evaluated(lambda q: q.min()), lambda data, directory: min(data)),
+    Case("of_type", _streamed(lambda q: q.of_type(int)),
+         _baseline(lambda d: (x for x in d if isinstance(x, int)))),
+    Case("order_by", _streamed(lambda q: q.order_by(_key)),
+         _baseline(lambda d: sorted(d, key=_key))),
+    Case("order_by_descending", _streamed(lambda q: q.order_by_descending(_key)),
+         _baseline(lambda d: sorted(d, key=_key, reverse=True))),
+    Case("order_by_spilling", _spilling(lambda q: q.order_by(_key)),
+         _baseline(lambda d: sorted(d, key=_key))),
+    Case("percentile", _evaluated(lambda q: q.percentile(99)),
+         lambda data, directory: sorted(data)[len(data) * 99 // 100]),
+    Case("persist", lambda data, directory: pinq.as_queryable(data).persist(
+        _path(directory, "result.pinq")), _write_pickle),
+    Case("quantiles", _evaluated(lambda q: q.quantiles([0.01, 0.5, 0.99])),
+         lambda data, directory: sorted(data)),
+    Case("reverse", _streamed(lambda q: q.reverse()), _baseline(lambda d: reversed(list(d)))),
+    Case("running_average", _streamed(lambda q: q.running_average()),
+         _baseline(lambda d: _running_average(d))),
+    Case("running_count", _streamed(lambda q: q.running_count(_is_even)),
+         _baseline(lambda d: _running((1 if _is_even(x) else 0 for x in d), operator.add))),
+    Case("running_max", _streamed(lambda q: q.running_max()),
+         _baseline(lambda d: _running(d, max))),
+    Case("running_min", _streamed(lambda q: q.running_min()),
+         _baseline(lambda d: _running(d, min))),
+    Case("running_sum", _streamed(lambda q: q.running_sum()),
+         _baseline(lambda d: _running(d, operator.add))),
+    Case("sample", _streamed(lambda q: q.sample(100, seed=0)),
+         lambda data, directory: random.Random(0).sample(list(data), 100)),
+    Case("sample_by", _streamed(lambda q: q.sample_by(_key2, 10, seed=0)),
+         lambda data, directory: _sample_by(data)),
+    Case("sample_fraction", _streamed(lambda q: q.sample_fraction(0.01, seed=0)),
+         _baseline(lambda d: _bernoulli(d, 0.01))),
+    Case("scan", _streamed(lambda q: q.scan(operator.mul, 1)),
+         _baseline(lambda d: _running(d, operator.mul, 1))),
+    Case("select", _streamed(lambda q: q.select(_double)), _baseline(lambda d: map(_double, d))),
+    Case("select_many", _streamed(lambda q: q.select_many(lambda x: (x, x))),
+         _baseline(lambda d: chain.from_iterable((x, x) for x in d))),
+    Case("sequence_equal", _evaluated(lambda q: q.sequence_equal(q)),
+         lambda data, directory: all(x == y for x, y in zip(data, data))),
+    Case("single", _evaluated(lambda q: q.single(_is_zero)),
+         lambda data, directory: [x for x in data if _is_zero(x)][0]),
+    Case("single_or_default", _evaluated(lambda q: q.single_or_default(_never)),
+         lambda data, directory: [x for x in data if _never(x)]),
+    Case("skip", _streamed(lambda q: q.skip(10)), _baseline(lambda d: islice(d, 10, None))),
+    Case("skip_while", _streamed(lambda q: q.skip_while(_small)),
+         _baseline(lambda d: dropwhile(_small, d))),
+    Case("stream", lambda data, directory: _consume(pinq.as_queryable(iter(data)).stream()),
+         lambda data, directory: _consume(iter(data))),
+    Case("sum", _evaluated(lambda q: q.sum()), lambda data, directory: sum(data)),
+    Case("take", lambda data, directory: _consume(pinq.as_queryable(data).take(len(data) // 2)),
+         _baseline(lambda d: islice(d, len(d) // 2))),
+    Case("take_while", _streamed(lambda q: q.take_while(_nonnegative)),
+         _baseline(lambda d: takewhile(_nonnegative, d))),
+    Case("then_by", _streamed(lambda q: q.order_by(_key).then_by(_key2)),
+         _baseline(_sorted_pairs)),
+    Case("then_by_descending", _streamed(lambda q: q.order_by(_key).then_by_descending(_key2)),
+         _baseline(lambda d: sorted(sorted(d, key=_key2, reverse=True), key=_key))),
+    Case("to_array", _evaluated(lambda q: q.to_array("q")),
+         lambda data, directory: array("q", data)),
+    Case("to_csv", lambda data, directory: pinq.as_queryable(data).to_csv(
+        _path(directory, "result.csv"), lambda x: (x, x)), _write_csv),
+    Case("to_dict", _evaluated(lambda q: q.to_dict(pinq.transforms.identity)),
+         lambda data, directory: dict((x, x) for x in data)),
+    Case("to_dictionary", _evaluated(lambda q: q.to_dictionary(pinq.transforms.identity)),
+         lambda data, directory: dict((x, x) for x in data)),
+    Case("to_file", lambda data, directory: pinq.as_queryable(data).to_file(
+        _path(directory, "result.txt")), _write_lines),
+    Case("to_jsonl", lambda data, directory: pinq.as_queryable(data).to_jsonl(
+        _path(directory, "result.jsonl")), _write_jsonl),
+    Case("to_list", _evaluated(lambda q: q.to_list()), lambda data, directory: list(iter(data))),
+    Case("to_lookup", _evaluated(lambda q: q.to_lookup(_key)),
+         lambda data, directory: _groups(data)),
+    Case("to_numpy", _evaluated(lambda q: q.to_numpy(int)),
+         lambda data, directory: numpy.fromiter(data, int, len(data)), numpy is not None),
+    Case("to_sorted_index", _evaluated(lambda q: _ranged(q.to_sorted_index(_key))),
+         lambda data, directory: [x for x in data if 100 <= _key(x) < 110]),
+    _warm_case("to_sorted_index_warm", lambda data: pinq.as_queryable(data).to_sorted_index(_key),
+               _ranged, lambda data, directory: [x for x in data if 100 <= _key(x) < 110]),
+    Case("top_frequent", _evaluated(lambda q: q.top_frequent(10, _key)),
+         lambda data, directory: _top_frequent(data)),
+    Case("top_frequent_exact", _evaluated(lambda q: q.top_frequent(10, _key, exact=True)),
+         lambda data, directory: _top_frequent(data)),
+    Case("union", _streamed(lambda q: q.union(_OTHER)),
+         _baseline(lambda d: _unique(chain(d, _OTHER)))),
+    Case("where", _streamed(lambda q: q.where(_is_even)),
+         _baseline(lambda d: (x for x in d if _is_even(x)))),
+    Case("window_session", _streamed(lambda q: q.window_session(100, pinq.transforms.identity)),
+         _baseline(_sessions)),
+    Case("window_sliding", _streamed(lambda q: q.window_sliding(16, 4)),
+         _baseline(lambda d: (d[i - 16:i] for i in range(16, len(d) + 1, 4)))),
+    Case("window_sliding_min", _streamed(lambda q: q.window_sliding(64, aggregate="min")),
+         _baseline(lambda d: (min(d[i - 64:i]) for i in range(64, len(d) + 1)))),
+    Case("window_tumbling", _streamed(lambda q: q.window_tumbling(100, aggregate="sum")),
+         _baseline(lambda d: (sum(d[i:i + 100]) for i in range(0, len(d), 100)))),
+    Case("with_index", _evaluated(lambda q: _indexed(q.with_index(_key))),
+         lambda data, directory: [x for x in data if _key(x) == 7]),
+    _warm_case("with_index_warm", lambda data: pinq.as_queryable(data).with_index(_key),
+               _indexed, lambda data, directory: [x for x in data if _key(x) == 7]),
+    Case("with_window", _streamed(lambda q: q.with_window(
+        {"rank": "rank", "previous": ("lag", pinq.transforms.identity)}, _key2, _key)),
+         _baseline(_ranked)),
+    Case("zip", _streamed(lambda q: q.zip(q, _pair)), _baseline(lambda d: zip(d, d))),
+]
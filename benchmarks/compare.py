@@ -0,0 +1,144 @@
+"""
+pinq.benchmarks.compare
+~~~~~~~~~~~~~~~~~~~~~~~
+
+Compares two saved benchmark runs and fails if any operator regressed, or is missing from the
+new run.
+
+An operator regresses when the median of its timing samples grew by more than the threshold
+and the change is larger than the noise of the two runs, that is, when the interquartile ranges
+of the two sets of samples do not overlap.
+
+Usage::
+
+    $ python benchmarks/compare.py baseline.json current.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+
+from runner import median
+
+
+def quantile(values, fraction):
+    """Returns the 'fraction' quantile of a non-empty sequence, interpolating linearly."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples):
+    """Returns the median and the first and third quartiles of timing samples."""
+    return median(samples), quantile(samples, 0.25), quantile(samples, 0.75)
+
+
+def _samples(result, normalize):
+    """Returns the timing samples of a result, relative to its baseline median if requested."""
+    samples = result['pinq']['times']
+    if normalize:
+        reference = max(result['baseline']['median'], 1e-12)
+        samples = [sample / reference for sample in samples]
+    return samples
+
+
+def compare(old, new, threshold, normalize=False, memory_threshold=None):
+    """Compares the results shared by two benchmark runs.
+
+    :param old: The results of the reference run.
+    :param new: The results of the run being checked.
+    :param threshold: The relative slowdown of the median that counts as a regression.
+    :param normalize: Whether to compare times relative to each run's builtin baselines.
+    :param memory_threshold: The relative growth of peak memory that counts as a regression.
+    :return: A list of comparisons, one dict for each operator and scale in both runs, and one
+        with the status "missing" for each operator and scale only in the reference run.
+    """
+    old_results = dict(((r['operator'], r['scale']), r) for r in old['results'])
+    new_keys = set((r['operator'], r['scale']) for r in new['results'])
+    comparisons = []
+    for result in new['results']:
+        key = (result['operator'], result['scale'])
+        if key not in old_results:
+            continue
+        old_median, old_q1, old_q3 = summarize(_samples(old_results[key], normalize))
+        new_median, new_q1, new_q3 = summarize(_samples(result, normalize))
+        change = (new_median - old_median) / max(old_median, 1e-12)
+        if change > threshold and new_q1 > old_q3:
+            status = "regressed"
+        elif change < -threshold and new_q3 < old_q1:
+            status = "improved"
+        elif abs(change) > threshold:
+            status = "noisy"
+        else:
+            status = "unchanged"
+        memory_change = None
+        old_peak = old_results[key]['pinq'].get('peak_memory')
+        new_peak = result['pinq'].get('peak_memory')
+        if old_peak and new_peak is not None:
+            memory_change = (new_peak - old_peak) / float(old_peak)
+            if memory_threshold is not None and memory_change > memory_threshold:
+                status = "regressed"
+        comparisons.append(dict([
+            ('operator', key[0]), ('scale', key[1]), ('old', old_median), ('new', new_median),
+            ('change', change), ('old_iqr', old_q3 - old_q1), ('new_iqr', new_q3 - new_q1),
+            ('memory_change', memory_change), ('status', status)]))
+    for result in old['results']:
+        key = (result['operator'], result['scale'])
+        if key not in new_keys:
+            comparisons.append(dict([
+                ('operator', key[0]), ('scale', key[1]), ('old', None), ('new', None),
+                ('change', None), ('old_iqr', None), ('new_iqr', None),
+                ('memory_change', None), ('status', "missing")]))
+    return comparisons
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="compare", description="Compares two benchmark result files.")
+    parser.add_argument("old", help="results of the reference run")
+    parser.add_argument("new", help="results of the run to check")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown counted as a regression (default: 0.1)")
+    parser.add_argument("--memory-threshold", type=float, default=None,
+                        help="relative peak memory growth counted as a regression")
+    parser.add_argument("--normalize", action="store_true",
+                        help="compare times relative to each run's builtin baselines, "
+                             "for runs made on different machines")
+    args = parser.parse_args(argv)
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    comparisons = compare(old, new, args.threshold, args.normalize, args.memory_threshold)
+    unit = "x base" if args.normalize else "ms"
+    scale = 1 if args.normalize else 1000
+    print("%-28s %10s %12s %12s %9s %9s  %s" % (
+        "operator", "scale", "old " + unit, "new " + unit, "change", "memory", "status"))
+    for comparison in comparisons:
+        if comparison['status'] == "missing":
+            print("%-28s %10d %12s %12s %9s %9s  %s" % (
+                comparison['operator'], comparison['scale'], "-", "-", "-", "-", "missing"))
+            continue
+        memory = comparison['memory_change']
+        print("%-28s %10d %12.3f %12.3f %+8.1f%% %9s  %s" % (
+            comparison['operator'], comparison['scale'], comparison['old'] * scale,
+            comparison['new'] * scale, comparison['change'] * 100,
+            "-" if memory is None else "%+.1f%%" % (memory * 100), comparison['status']))
+    regressions = [c for c in comparisons if c['status'] == "regressed"]
+    missing = [c for c in comparisons if c['status'] == "missing"]
+    if regressions:
+        print("%d operator(s) regressed by more than %.0f%%." % (
+            len(regressions), args.threshold * 100))
+    if missing:
+        print("%d operator(s) of the reference run are missing from the new run." % len(
+            missing))
+    if regressions or missing:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+benchmarks.runner
+~~~~~~~~~~~~~~~~~
+
+Times benchmark cases and measures their peak memory.
+"""
+
+import gc
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+RESULTS_VERSION = 1
+
+
+def median(values):
+    """Returns the median of a non-empty sequence of numbers."""
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2.0
+
+
+def time_function(function, data, directory, repeat):
+    """Runs 'function' 'repeat' times and returns the duration of each run in seconds.
+
+    The garbage collector is disabled while timing, as in :mod:`timeit`.
+    """
+    samples = []
+    gc_enabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            gc.collect()
+            gc.disable()
+            start = perf_counter()
+            function(data, directory)
+            samples.append(perf_counter() - start)
+            if gc_enabled:
+                gc.enable()
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return samples
+
+
+def peak_memory(function, data, directory):
+    """Returns the peak memory in bytes allocated by a single run of 'function'.
+
+    Returns None if :mod:`tracemalloc` is not available.
+    """
+    if tracemalloc is None:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function(data, directory)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(function, data, repeat, memory):
+    """Measures a single benchmark function on 'data'."""
+    directory = tempfile.mkdtemp()
+    try:
+        samples = time_function(function, data, directory, repeat)
+        peak = peak_memory(function, data, directory) if memory else None
+    finally:
+        shutil.rmtree(directory)
+    return dict([('times', samples), ('median', median(samples)), ('peak_memory', peak)])
+
+
+def environment():
+    """Describes the interpreter and machine the benchmarks ran on."""
+    return dict([
+        ('python', platform.python_version()),
+        ('implementation', platform.python_implementation()),
+        ('platform', platform.platform()),
+        ('time', time.strftime("%Y-%m-%dT%H:%M:%S"))])
+
+
+def run(cases, scales, make_data, repeat, memory=True, report=None):
+    """Runs every case at every scale and returns the results as a JSON serializable dict.
+
+    :param cases: The benchmark cases to run.
+    :param scales: The numbers of input elements to run each case with.
+    :param make_data: A function creating the input data for a scale.
+    :param repeat: The number of timed runs of each function.
+    :param memory: Whether to measure peak memory.
+    :param report: A function called with each result as it is measured.
+    """
+    results = []
+    for scale in scales:
+        data = make_data(scale)
+        for case in cases:
+            if case.setup is not None:
+                case.setup(data)
+            pinq_result = measure(case.run_pinq, data, repeat, memory)
+            baseline_result = measure(case.run_baseline, data, repeat, memory)
+            result = dict([
+                ('operator', case.name), ('scale', scale), ('pinq', pinq_result),
+                ('baseline', baseline_result),
+                ('overhead', pinq_result['median'] / max(baseline_result['median'], 1e-9))])
+            results.append(result)
+            if report is not None:
+                report(result)
+    return dict([('version', RESULTS_VERSION), ('environment', environment()),
+                 ('repeat', repeat), ('results', results)])
@@ -0,0 +1,368 @@
+"""
+pinq.accumulators
+~~~~~~~~~~~~~~~~~
+
+This module implements mergeable accumulators for computing several aggregates of a sequence in
+a single pass, possibly over partitions of the sequence in different processes.
+
+:copyright: (c) 2016 by David Shriver.
+:license: MIT, see LICENSE for more details.
+"""
+
+import math
+from .predicates import true
+from .transforms import identity
+
+# The number of elements aggregated at a time when updating accumulators from a sequence.
+CHUNK_SIZE = 1024
+
+
+class Accumulator(object):
+    """An aggregate of a sequence, updated one element at a time.
+
+    Accumulators built over different parts of a sequence can be merged into the accumulator of
+    the whole sequence. An accumulator passed to :meth:`Queryable.aggregate_many
+    <pinq.queryable.Queryable.aggregate_many>` is used as a template: each evaluation starts
+    from an :meth:`empty` copy of it.
+
+    :param transform: (optional) A transform function to apply to each element.
+    :type transform: function
+    :raise TypeError: if 'transform' is not callable
+    """
+
+    def __init__(self, transform=identity):
+        if not callable(transform):
+            raise TypeError("Value for 'transform' is not callable.")
+        self.transform = transform
+        self.count = 0
+
+    def empty(self):
+        """Returns a new, empty accumulator of the same aggregate.
+
+        :rtype: :class:`Accumulator`
+        """
+        return type(self)(self.transform)
+
+    def add(self, element):
+        """Adds an element to the accumulator."""
+        raise NotImplementedError()
+
+    def update(self, iterable):
+        """Adds every element of 'iterable' to the accumulator.
+
+        Subclasses aggregate the elements with builtins, and then combine the result with the
+        accumulator as if merging, which is much faster than adding the elements one at a time.
+        """
+        add = self.add
+        for element in iterable:
+            add(element)
+
+    def _values(self, iterable):
+        """Returns the transformed elements of 'iterable', as a list."""
+        if self.transform is identity:
+            return list(iterable)
+        return [self.transform(element) for element in iterable]
+
+    def merge(self, other):
+        """Adds every element of another accumulator of the same aggregate to this one.
+
+        :param other: The accumulator to merge into this one.
+        :type other: :class:`Accumulator`
+        :raise ValueError: if the accumulators compute different aggregates
+        """
+        if type(other) is not type(self):
+            raise ValueError("Accumulators of different aggregates cannot be merged.")
+        if other.count:
+            self._merge(other)
+            self.count += other.count
+
+    def _merge(self, other):
+        """Merges the state of a non-empty accumulator, before the counts are added."""
+        raise NotImplementedError()
+
+    def result(self):
+        """Returns the aggregate of the elements added so far."""
+        raise NotImplementedError()
+
+
+class Count(Accumulator):
+    """The number of elements that satisfy a condition.
+
+    :param predicate: (optional) A function to test each element for a condition.
+    :type predicate: function
+    :raise TypeError: if 'predicate' is not callable
+    """
+
+    def __init__(self, predicate=true):
+        if not callable(predicate):
+            raise TypeError("Value for 'predicate' is not callable.")
+        super(Count, self).__init__()
+        self.predicate = predicate
+
+    def empty(self):
+        return Count(self.predicate)
+
+    def add(self, element):
+        if self.predicate is true or self.predicate(element):
+            self.count += 1
+
+    def update(self, iterable):
+        if self.predicate is true:
+            self.count += len(list(iterable))
+        else:
+            self.count += len([element for element in iterable if self.predicate(element)])
+
+    def _merge(self, other):
+        pass
+
+    def result(self):
+        """Returns the number of elements that satisfy the condition.
+
+        :rtype: int
+        """
+        return self.count
+
+
+class Sum(Accumulator):
+    """The sum of the transformed elements.
+
+    Floating point values are added with Neumaier's compensated summation, so the result does
+    not depend on the order of the elements as much as a plain running sum does.
+    """
+
+    def __init__(self, transform=identity):
+        super(Sum, self).__init__(transform)
+        self.total = 0
+        self.compensation = 0
+
+    def add(self, element):
+        self._add(self.transform(element))
+        self.count += 1
+
+    def _add(self, value):
+        """Adds a value to the total, accumulating the rounding error of floats separately."""
+        total = self.total + value
+        if isinstance(total, float):
+            if abs(self.total) >= abs(value):
+                self.compensation += (self.total - total) + value
+            else:
+                self.compensation += (value - total) + self.total
+        self.total = total
+
+    def update(self, iterable):
+        values = self._values(iterable)
+        total = sum(values)
+        if isinstance(total, float):
+            total = math.fsum(values)
+        self._add(total)
+        self.count += len(values)
+
+    def _merge(self, other):
+        self._add(other.total)
+        self.compensation += other.compensation
+
+    def result(self):
+        """Returns the sum of the transformed elements, or 0 if there are none."""
+        if self.compensation:
+            return self.total + self.compensation
+        return self.total
+
+
+class Min(Accumulator):
+    """The smallest of the transformed elements, or None if there are none."""
+
+    def __init__(self, transform=identity):
+        super(Min, self).__init__(transform)
+        self.value = None
+
+    def add(self, element):
+        value = self.transform(element)
+        if not self.count or value < self.value:
+            self.value = value
+        self.count += 1
+
+    def update(self, iterable):
+        values = self._values(iterable)
+        if values:
+            value = min(values)
+            if not self.count or value < self.value:
+                self.value = value
+            self.count += len(values)
+
+    def _merge(self, other):
+        if not self.count or other.value < self.value:
+            self.value = other.value
+
+    def result(self):
+        """Returns the smallest of the transformed elements."""
+        return self.value
+
+
+class Max(Accumulator):
+    """The largest of the transformed elements, or None if there are none."""
+
+    def __init__(self, transform=identity):
+        super(Max, self).__init__(transform)
+        self.value = None
+
+    def add(self, element):
+        value = self.transform(element)
+        if not self.count or self.value < value:
+            self.value = value
+        self.count += 1
+
+    def update(self, iterable):
+        values = self._values(iterable)
+        if values:
+            value = max(values)
+            if not self.count or self.value < value:
+                self.value = value
+            self.count += len(values)
+
+    def _merge(self, other):
+        if not self.count or self.value < other.value:
+            self.value = other.value
+
+    def result(self):
+        """Returns the largest of the transformed elements."""
+        return self.value
+
+
+class Average(Accumulator):
+    """The mean of the transformed elements, or None if there are none.
+
+    The mean is updated incrementally rather than computed from a running sum, so it does not
+    overflow or lose precision when the sum is much larger than the values.
+    """
+
+    def __init__(self, transform=identity):
+        super(Average, self).__init__(transform)
+        self.mean = 0.0
+
+    def add(self, element):
+        self.count += 1
+        self.mean += (self.transform(element) - self.mean) / float(self.count)
+
+    def update(self, iterable):
+        values = self._values(iterable)
+        if values:
+            self._combine(len(values), math.fsum(values) / len(values), values)
+            self.count += len(values)
+
+    def _merge(self, other):
+        self._combine(other.count, other.mean, None)
+
+    def _combine(self, count, mean, squares):
+        """Combines the mean of 'count' more values, before the counts are added."""
+        self.mean += (mean - self.mean) * count / float(self.count + count)
+
+    def result(self):
+        """Returns the mean of the transformed elements.
+
+        :rtype: float
+        """
+        if not self.count:
+            return None
+        return self.mean
+
+
+class Variance(Average):
+    """The variance of the transformed elements.
+
+    Elements added one at a time update the variance with Welford's algorithm. Chunks of
+    elements and other accumulators are combined with the pairwise update of Chan et al., so
+    the variance of partitions computed separately is as accurate as that of a single pass.
+
+    :param transform: (optional) A transform function to apply to each element.
+    :type transform: function
+    :param sample: (optional) Whether to compute the unbiased sample variance, dividing by one
+        less than the number of elements, rather than the population variance.
+    :type sample: bool
+    """
+
+    def __init__(self, transform=identity, sample=True):
+        super(Variance, self).__init__(transform)
+        self.sample = sample
+        self.squares = 0.0
+
+    def empty(self):
+        return Variance(self.transform, self.sample)
+
+    def add(self, element):
+        value = self.transform(element)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / float(self.count)
+        self.squares += delta * (value - self.mean)
+
+    def _merge(self, other):
+        self._combine(other.count, other.mean, other.squares)
+
+    def _combine(self, count, mean, squares):
+        """Combines the mean and sum of squared deviations of 'count' more values, which are
+        computed from the values themselves if given as a list.
+        """
+        if isinstance(squares, list):
+            squares = math.fsum([(value - mean) ** 2 for value in squares])
+        total = self.count + count
+        delta = mean - self.mean
+        self.squares += squares + delta * delta * self.count * count / float(total)
+        self.mean += delta * count / float(total)
+
+    def result(self):
+        """Returns the variance of the transformed elements, or None if there are too few.
+
+        :rtype: float
+        """
+        count = self.count - 1 if self.sample else self.count
+        if count <= 0:
+            return None
+        return self.squares / count
+
+
+def count_of(predicate=true):
+    """Returns an accumulator of the number of elements that satisfy a condition.
+
+    :rtype: :class:`Count`
+    """
+    return Count(predicate)
+
+
+def sum_of(transform=identity):
+    """Returns an accumulator of the sum of the transformed elements.
+
+    :rtype: :class:`Sum`
+    """
+    return Sum(transform)
+
+
+def min_of(transform=identity):
+    """Returns an accumulator of the smallest of the transformed elements.
+
+    :rtype: :class:`Min`
+    """
+    return Min(transform)
+
+
+def max_of(transform=identity):
+    """Returns an accumulator of the largest of the transformed elements.
+
+    :rtype: :class:`Max`
+    """
+    return Max(transform)
+
+
+def average_of(transform=identity):
+    """Returns an accumulator of the mean of the transformed elements.
+
+    :rtype: :class:`Average`
+    """
+    return Average(transform)
+
+
+def variance_of(transform=identity, sample=True):
+    """Returns an accumulator of the variance of the transformed elements.
+
+    :rtype: :class:`Variance`
+    """
+    return Variance(transform, sample)
@@ -8,8 +8,15 @@ This module implements the pinq api.
 :license: MIT, see LICENSE for more details.
 """
 
-from collections import Iterable, Iterator
+from collections import Iterable, Iterator, Sized
+from .accumulators import average_of, count_of, max_of, min_of, sum_of, variance_of
+from .cache import QueryCache
+from .cancellation import CancellationToken, QueryCancelled
+from .memory import MemoryBudget, MemoryBudgetExceeded, set_memory_budget
+from .profiling import QueryProfile
 from .queryable import Queryable
+from .sources import LineQueryable, PartitionedQueryable, PersistedQueryable, RecordQueryable
+from .views import ObservableSource, materialized_view
 
 
 def as_queryable(iterable):
@@ -27,7 +34,146 @@ def as_queryable(iterable):
       >>> queryable = pinq.as_queryable(range(100))
     """
     if isinstance(iterable, Iterator):
-        return Queryable(iterable)
+        queryable = Queryable(iterable)
+    elif isinstance(iterable, Sized):
+        queryable = Queryable(iter(iterable), len(iterable))
     elif isinstance(iterable, Iterable):
-        return Queryable(iter(iterable))
-    raise TypeError("Object must be iterable.")
+        queryable = Queryable(iter(iterable))
+    else:
+        raise TypeError("Object must be iterable.")
+    queryable._source = iterable
+    return queryable
+
+
+def from_lines(path, prefilter=None, encoding=None):
+    """Constructs a queryable object over the lines of the file at `path`.
+
+    The file is memory mapped and lines are sliced out of it lazily as bytes, without their line
+    terminators. A `prefilter` is applied to the raw bytes of each line before it is decoded, so
+    lines that are discarded are never decoded. If `prefilter` is a bytes object, the mapped file
+    is searched for it directly and only lines containing it are produced.
+
+    :param path: The path of the file to query.
+    :type path: str
+    :param prefilter: (optional) A bytes substring or a function to test the raw bytes of a line.
+    :type prefilter: bytes or function
+    :param encoding: (optional) The encoding used to decode lines, or None to produce bytes.
+    :type encoding: str
+    :return: a queryable object over the lines of the file
+    :rtype: :class:`LineQueryable <pinq.sources.LineQueryable>` object
+    :raise TypeError: if prefilter is not bytes or callable
+
+    Usage::
+
+      >>> import pinq
+      >>> errors = pinq.from_lines("app.log", b"ERROR", "utf-8").to_list()
+    """
+    if prefilter is not None and not isinstance(prefilter, bytes) and not callable(prefilter):
+        raise TypeError("Value for 'prefilter' is not bytes or callable.")
+    return LineQueryable(path, prefilter, encoding)
+
+
+def from_records(path, struct_fmt):
+    """Constructs a queryable object over the fixed-width records of the file at `path`.
+
+    The file is memory mapped and each record is unpacked lazily using `struct_fmt`. A trailing
+    partial record is ignored. Skipping, taking, counting and indexing records are computed from
+    record offsets and do not scan the file.
+
+    :param path: The path of the file to query.
+    :type path: str
+    :param struct_fmt: The :mod:`struct` format of a single record.
+    :type struct_fmt: str
+    :return: a queryable object over the unpacked records of the file
+    :rtype: :class:`RecordQueryable <pinq.sources.RecordQueryable>` object
+    :raise struct.error: if struct_fmt is not a valid struct format
+
+    Usage::
+
+      >>> import pinq
+      >>> third = pinq.from_records("points.bin", "<dd").element_at(2)
+    """
+    return RecordQueryable(path, struct_fmt)
+
+
+def from_partitions(path, parser=None, encoding=None, partitions=None, processes=None):
+    """Constructs a queryable object over a line delimited file that is parsed in parallel.
+
+    The file at `path`, or every file below it if it is a directory, is split into byte ranges
+    aligned to line boundaries, such as text, CSV without embedded newlines, or JSON lines. The
+    ranges are parsed by a pool of worker processes, which also run any element-wise
+    :meth:`where <Queryable.where>`, :meth:`select <Queryable.select>` and
+    :meth:`select_many <Queryable.select_many>` stages of the query. Elements are produced in the
+    order of the input.
+
+    Only functions that can be pickled, such as functions defined at the top level of a module,
+    are run in the worker processes. Element-wise stages with other functions, such as lambdas,
+    run in this process on the merged stream, and a `parser` that cannot be pickled makes the
+    input be parsed in this process, with a RuntimeWarning.
+
+    :param path: The path of the file or directory to query.
+    :type path: str
+    :param parser: (optional) A function to create an element from each line.
+    :type parser: function
+    :param encoding: (optional) The encoding used to decode lines before parsing.
+    :type encoding: str
+    :param partitions: (optional) The number of byte ranges to split the input into.
+    :type partitions: int
+    :param processes: (optional) The number of worker processes, by default one per cpu.
+    :type processes: int
+    :return: a queryable object over the parsed lines of the input
+    :rtype: :class:`PartitionedQueryable <pinq.sources.PartitionedQueryable>` object
+    :raise TypeError: if parser is not callable
+    :raise TypeError: if partitions or processes is not an int
+
+    Usage::
+
+      >>> import json, pinq
+      >>> events = pinq.from_partitions("events.jsonl", json.loads, processes=8)
+    """
+    if parser is not None and not callable(parser):
+        raise TypeError("Value for 'parser' is not callable.")
+    if partitions is not None and not isinstance(partitions, int):
+        raise TypeError("Value for 'partitions' is not an integer.")
+    if processes is not None and not isinstance(processes, int):
+        raise TypeError("Value for 'processes' is not an integer.")
+    return PartitionedQueryable(path, parser, encoding, partitions, processes)
+
+
+def load(path, fingerprint=None, verify=False):
+    """Constructs a queryable object over a result persisted with :meth:`Queryable.persist`.
+
+    The persisted file is memory mapped and streamed back lazily. If `fingerprint` is given, it
+    must match the fingerprint the result was persisted with, otherwise the result is considered
+    stale.
+
+    Elements persisted without a typecode are stored pickled, and unpickling data can run
+    arbitrary code, so only load files from trusted sources. The digest checked by `verify`
+    detects corruption, not tampering.
+
+    :param path: The path of the persisted result.
+    :type path: str
+    :param fingerprint: (optional) The expected fingerprint of the inputs of the result.
+    :type fingerprint: str
+    :param verify: (optional) Whether to check the persisted data against its digest.
+    :type verify: bool
+    :return: a queryable object over the persisted elements
+    :rtype: :class:`PersistedQueryable <pinq.sources.PersistedQueryable>` object
+    :raise ValueError: if the file is not a persisted result
+    :raise ValueError: if the fingerprint does not match
+    :raise ValueError: if verify is set and the data does not match its digest
+
+    Usage::
+
+      >>> import pinq
+      >>> pinq.as_queryable(range(10)).where(lambda x: x % 2).persist("odd.pinq", fingerprint="v1")
+      5
+      >>> pinq.load("odd.pinq", fingerprint="v1").to_list()
+      [1, 3, 5, 7, 9]
+    """
+    queryable = PersistedQueryable(path)
+    if fingerprint is not None and queryable.fingerprint != fingerprint:
+        raise ValueError("The persisted result '%s' is stale." % path)
+    if verify and not queryable.verify():
+        raise ValueError("The persisted result '%s' is corrupt." % path)
+    return queryable
@@ -0,0 +1,284 @@
+"""
+pinq.cache
+~~~~~~~~~~
+
+This module implements a cache for the results of queries that are evaluated repeatedly over
+unchanged sources, keyed by a fingerprint of the operators of each query.
+
+:copyright: (c) 2016 by David Shriver.
+:license: MIT, see LICENSE for more details.
+"""
+
+import threading
+import types
+from .compat import *
+from .queryable import OrderedQueryable, Queryable
+
+# The terminal operators of a cached queryable whose results are cached.
+CACHED_TERMINALS = ('average', 'count', 'count_distinct', 'describe', 'long_count', 'max',
+                    'min', 'sum', 'to_dict', 'to_dictionary', 'to_list')
+
+_PREVIOUS, _NEXT, _KEY, _VALUE, _EXPIRES, _SOURCE = range(6)
+
+
+class _Identity(object):
+    """A key for an object that compares by identity, and keeps the object alive."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, _Identity) and self.value is other.value
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return id(self.value)
+
+
+def _freeze(value, functions=()):
+    """Converts an operator argument to a hashable value that compares equal for equal arguments.
+
+    Values are paired with their type, so arguments that compare equal but behave differently,
+    such as 2 and 2.0, have different fingerprints. Functions compare equal if they share their
+    code, default arguments and closure, so a lambda defined in the same place with the same
+    captured values has the same fingerprint. The globals that a function uses are not part of
+    its fingerprint.
+    """
+    if isinstance(value, Queryable):
+        return fingerprint(value)
+    elif isinstance(value, (list, tuple)):
+        return (type(value),) + tuple(_freeze(item, functions) for item in value)
+    elif isinstance(value, dict):
+        return (dict, frozenset((_freeze(key), _freeze(item, functions))
+                                for key, item in value.items()))
+    elif isinstance(value, (set, frozenset)):
+        return (type(value), frozenset(_freeze(item) for item in value))
+    elif isinstance(value, types.FunctionType):
+        if value in functions:
+            return value.__code__
+        functions = functions + (value,)
+        cells = []
+        for cell in value.__closure__ or ():
+            try:
+                cells.append(_freeze(cell.cell_contents, functions))
+            except ValueError:
+                cells.append(None)
+        return (value.__code__, _freeze(value.__defaults__ or (), functions), tuple(cells))
+    return (type(value), value)
+
+
+def source(queryable):
+    """Returns the source of a query: the iterable it was created from, or its first queryable.
+
+    :param queryable: The query.
+    :type queryable: :class:`Queryable`
+    """
+    while queryable._lineage is not None:
+        queryable = queryable._lineage[0]
+    if queryable._source is not None:
+        return queryable._source
+    return queryable
+
+
+def fingerprint(queryable):
+    """Returns a hashable fingerprint of the operators of a query and the identity of its source.
+
+    Queries built from the same source with the same operators and equal arguments have equal
+    fingerprints. The fingerprint may be unhashable if an argument is.
+
+    :param queryable: The query.
+    :type queryable: :class:`Queryable`
+    :rtype: tuple
+    """
+    if isinstance(queryable, CachedQueryable):
+        queryable = queryable._query
+    stages = []
+    while True:
+        if isinstance(queryable, OrderedQueryable):
+            stages.append(('order', _freeze(queryable._keys)))
+        if queryable._lineage is None:
+            break
+        parent, operator, args, kwargs = queryable._lineage
+        stages.append((operator, _freeze(args), _freeze(kwargs)))
+        queryable = parent
+    stages.append(_Identity(source(queryable)))
+    stages.reverse()
+    return tuple(stages)
+
+
+class QueryCache(object):
+    """A cache of query results, evicting the least recently used results and expired results.
+
+    Results are cached by :meth:`Queryable.cached <pinq.queryable.Queryable.cached>` queries,
+    keyed by their fingerprint, the version of their source and the terminal operator that
+    computed them. The cache may be shared between threads.
+
+    :param maxsize: (optional) The largest number of results to keep.
+    :type maxsize: int
+    :param ttl: (optional) The number of seconds a result is kept for, or None to keep results
+        until they are evicted.
+    :type ttl: float
+    :raise TypeError: if 'maxsize' is not an int or 'ttl' is not a number
+    :raise ValueError: if 'maxsize' or 'ttl' is not positive
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        if not isinstance(maxsize, int):
+            raise TypeError("Value for 'maxsize' is not an integer.")
+        if maxsize <= 0:
+            raise ValueError("Value for 'maxsize' must be positive.")
+        if ttl is not None and not isinstance(ttl, (int, float)):
+            raise TypeError("Value for 'ttl' is not a number.")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("Value for 'ttl' must be positive.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = {}
+        self._root = []
+        self._root[:] = [self._root, self._root, None, None, None, None]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _unlink(self, entry):
+        """Removes an entry from the recency list and the cache."""
+        entry[_PREVIOUS][_NEXT] = entry[_NEXT]
+        entry[_NEXT][_PREVIOUS] = entry[_PREVIOUS]
+        del self._entries[entry[_KEY]]
+
+    def _append(self, entry):
+        """Adds an entry to the cache as the most recently used one."""
+        last = self._root[_PREVIOUS]
+        entry[_PREVIOUS], entry[_NEXT] = last, self._root
+        last[_NEXT] = self._root[_PREVIOUS] = entry
+        self._entries[entry[_KEY]] = entry
+
+    def get(self, key):
+        """Looks up a result, counting a hit or a miss.
+
+        :param key: The key of the result.
+        :return: Whether the result was found, and the result.
+        :rtype: tuple
+        :raise TypeError: if 'key' is not hashable
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[_EXPIRES] is not None and \
+                    perf_counter() >= entry[_EXPIRES]:
+                self._unlink(entry)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            self._unlink(entry)
+            self._append(entry)
+            return True, entry[_VALUE]
+
+    def put(self, key, value, source=None):
+        """Adds a result, evicting the least recently used result if the cache is full.
+
+        :param key: The key of the result.
+        :param value: The result.
+        :param source: (optional) The source the result was computed from, for
+            :meth:`invalidate`.
+        :raise TypeError: if 'key' is not hashable
+        """
+        expires = None
+        if self.ttl is not None:
+            expires = perf_counter() + self.ttl
+        with self._lock:
+            if key in self._entries:
+                self._unlink(self._entries[key])
+            self._append([None, None, key, value, expires, source])
+            while len(self._entries) > self.maxsize:
+                self._unlink(self._root[_NEXT])
+                self.evictions += 1
+
+    def invalidate(self, queryable=None):
+        """Removes the cached results computed from a source, or every result.
+
+        :param queryable: (optional) The source, or a query over it, whose results are removed.
+            If not given, every result is removed.
+        """
+        with self._lock:
+            if queryable is None:
+                self._entries.clear()
+                self._root[:] = [self._root, self._root, None, None, None, None]
+                return
+            if isinstance(queryable, CachedQueryable):
+                queryable = queryable._query
+            if isinstance(queryable, Queryable):
+                queryable = source(queryable)
+            for entry in list(self._entries.values()):
+                if entry[_SOURCE] is queryable:
+                    self._unlink(entry)
+
+    def clear(self):
+        """Removes every result and resets the statistics."""
+        self.invalidate()
+        self.hits = self.misses = self.evictions = 0
+
+
+def _cached_terminal(method):
+    """Returns the result of a terminal operator from the cache, computing it on a miss.
+
+    Cached lists and dicts are copied when returned, so callers may modify them.
+    """
+    @wraps(method)
+    def _terminal(self, *args, **kwargs):
+        version = self._version() if callable(self._version) else self._version
+        key = (fingerprint(self._query), version, method.__name__, _freeze(args),
+               _freeze(kwargs))
+        try:
+            found, result = self._cache.get(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        if not found:
+            result = method(self, *args, **kwargs)
+            self._cache.put(key, result, source(self._query))
+        if isinstance(result, list):
+            return list(result)
+        elif isinstance(result, dict):
+            return dict(result)
+        return result
+    return _terminal
+
+
+class CachedQueryable(Queryable):
+    """A query whose terminal operators return cached results while its source is unchanged.
+
+    Only the terminal operators in :data:`CACHED_TERMINALS` are cached; every other operator
+    returns an ordinary queryable. Queries are only cached if the arguments of their operators
+    are hashable, or lists, tuples, dicts, sets or functions of hashable values. The query is
+    only iterated when a result is not found in the cache.
+    """
+
+    def __init__(self, queryable, cache, version=None):
+        super(CachedQueryable, self).__init__(None, queryable._length_hint())
+        self._query = queryable
+        self._cache = cache
+        self._version = version
+        self._streaming = queryable._streaming
+
+    def __iter__(self):
+        return iter(self._query)
+
+    average = _cached_terminal(Queryable.average)
+    count = _cached_terminal(Queryable.count)
+    count_distinct = _cached_terminal(Queryable.count_distinct)
+    describe = _cached_terminal(Queryable.describe)
+    long_count = _cached_terminal(Queryable.long_count)
+    max = _cached_terminal(Queryable.max)
+    min = _cached_terminal(Queryable.min)
+    sum = _cached_terminal(Queryable.sum)
+    to_dict = _cached_terminal(Queryable.to_dict)
+    to_dictionary = _cached_terminal(Queryable.to_dictionary)
+    to_list = _cached_terminal(Queryable.to_list)
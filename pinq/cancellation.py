@@ -0,0 +1,142 @@
+"""
+pinq.cancellation
+~~~~~~~~~~~~~~~~~
+
+This module implements cancellation tokens and deadlines, which the operators of a query check
+periodically so that long running queries can be abandoned.
+
+:copyright: (c) 2016 by David Shriver.
+:license: MIT, see LICENSE for more details.
+"""
+
+import threading
+import time
+from .compat import *
+
+_local = threading.local()
+
+# The number of elements each operator yields between checks of the active token.
+DEFAULT_CHECK_INTERVAL = 1024
+
+
+class QueryCancelled(Exception):
+    """Raised by the operators of a query when its cancellation token is cancelled or its
+    deadline has passed.
+    """
+    pass
+
+
+class CancellationToken(object):
+    """A token for cancelling the queries executed in a thread.
+
+    The token is activated by using it as a context manager. While it is active, every operator
+    of a query checks it once every 'check_interval' elements, and raises
+    :class:`QueryCancelled` once :meth:`cancel` has been called, possibly from another thread,
+    or the deadline has passed. Buffers and temporary files held by the operators are released
+    as the exception propagates.
+
+    :param timeout: (optional) The number of seconds after which queries are cancelled.
+    :type timeout: float
+    :param deadline: (optional) The time, as returned by :func:`time.time`, at which queries are
+        cancelled.
+    :type deadline: float
+    :param check_interval: (optional) The number of elements between checks of the token.
+    :type check_interval: int
+    :raise ValueError: if both 'timeout' and 'deadline' are given, or 'check_interval' is not
+        positive
+    """
+
+    def __init__(self, timeout=None, deadline=None, check_interval=DEFAULT_CHECK_INTERVAL):
+        if timeout is not None and deadline is not None:
+            raise ValueError("Only one of 'timeout' and 'deadline' may be given.")
+        if not isinstance(check_interval, int):
+            raise TypeError("Value for 'check_interval' is not an integer.")
+        if check_interval <= 0:
+            raise ValueError("Value for 'check_interval' must be positive.")
+        if deadline is not None:
+            timeout = deadline - time.time()
+        self._deadline = None
+        if timeout is not None:
+            self._deadline = perf_counter() + timeout
+        self.check_interval = check_interval
+        self.reason = None
+
+    def __enter__(self):
+        _tokens().append(self)
+        return self
+
+    def __exit__(self, *_):
+        _tokens().pop()
+
+    @property
+    def cancelled(self):
+        """Whether the token has been cancelled or its deadline has passed."""
+        if self.reason is None and self._deadline is not None and \
+                perf_counter() >= self._deadline:
+            self.reason = "Query exceeded its deadline."
+        return self.reason is not None
+
+    def cancel(self, reason=None):
+        """Cancels the queries using this token.
+
+        :param reason: (optional) The message of the raised :class:`QueryCancelled`.
+        :type reason: str
+        """
+        self.reason = reason or "Query was cancelled."
+
+    def remaining(self):
+        """Returns the number of seconds until the deadline, or None if there is no deadline.
+
+        :rtype: float
+        """
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - perf_counter())
+
+    def check(self):
+        """Raises :class:`QueryCancelled` if the token has been cancelled.
+
+        :raise QueryCancelled: if the token has been cancelled or its deadline has passed
+        """
+        if self.cancelled:
+            raise QueryCancelled(self.reason)
+
+    def checked(self, iterable):
+        """Yields the elements of 'iterable', checking the token every 'check_interval' elements.
+
+        :param iterable: The elements to yield.
+        :raise QueryCancelled: if the token has been cancelled or its deadline has passed
+        """
+        self.check()
+        interval = self.check_interval
+        countdown = interval
+        for element in iterable:
+            countdown -= 1
+            if not countdown:
+                countdown = interval
+                self.check()
+            yield element
+
+
+def _tokens():
+    """Returns the stack of cancellation tokens active in the current thread."""
+    tokens = getattr(_local, 'tokens', None)
+    if tokens is None:
+        tokens = _local.tokens = []
+    return tokens
+
+
+def current_token():
+    """Returns the cancellation token active in the current thread, if any."""
+    tokens = _tokens()
+    if tokens:
+        return tokens[-1]
+    return None
+
+
+def checked(iterable):
+    """Checks the active cancellation token while iterating 'iterable', if there is one."""
+    token = current_token()
+    if token is None:
+        return iterable
+    return token.checked(iterable)
@@ -3,10 +3,11 @@ pinq.compat
 ~~~~~~~~~~~
 """
 
+from array import array
 from collections import defaultdict, Iterable
-from functools import reduce
+from functools import reduce, wraps
 from itertools import chain, dropwhile, groupby, islice, takewhile, tee
-from operator import eq
+from operator import add, eq
 
 try:
     from functools import lru_cache
@@ -15,7 +16,56 @@ except ImportError:
         """A default decorator if lru_cache does not exist."""
         return lambda f: f
 
+try:
+    from itertools import accumulate
+except ImportError:
+    def accumulate(iterable, func=add):
+        """A default accumulate if accumulate does not exist."""
+        iterator = iter(iterable)
+        for total in iterator:
+            yield total
+            for element in iterator:
+                total = func(total, element)
+                yield total
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
 try:
     from itertools import zip_longest
 except ImportError:
     from itertools import izip_longest as zip_longest
+
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+if hasattr(Exception, 'with_traceback'):
+    def reraise(exc_info):
+        """Raises the exception described by a 'sys.exc_info()' tuple, with its traceback."""
+        raise exc_info[1].with_traceback(exc_info[2])
+else:
+    exec("""def reraise(exc_info):
+    \"\"\"Raises the exception described by a 'sys.exc_info()' tuple, with its traceback.\"\"\"
+    raise exc_info[0], exc_info[1], exc_info[2]
+""")
+
+if hasattr(array, 'tobytes'):
+    def array_to_bytes(values):
+        """Returns the machine values of an array as bytes."""
+        return values.tobytes()
+
+    def array_from_bytes(values, data):
+        """Appends the machine values in 'data' to an array."""
+        values.frombytes(data)
+else:
+    def array_to_bytes(values):
+        """Returns the machine values of an array as bytes."""
+        return values.tostring()
+
+    def array_from_bytes(values, data):
+        """Appends the machine values in 'data' to an array."""
+        values.fromstring(data)
@@ -0,0 +1,290 @@
+"""
+pinq.indexes
+~~~~~~~~~~~~
+
+This module implements lookups and indexes, which group the elements of a sequence by key once
+so that the elements with a given key, or with keys in a range, can be found without scanning
+the sequence.
+
+:copyright: (c) 2016 by David Shriver.
+:license: MIT, see LICENSE for more details.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from .cancellation import checked
+from .queryable import Queryable, _operator
+from .transforms import identity
+
+
+class Grouping(object):
+    """The values of a :class:`Lookup` with the same key, in the order they were added.
+
+    A grouping is a view of the storage of its lookup, so creating one does not copy its values.
+
+    :ivar key: The key of the values.
+    """
+    __slots__ = ('key', '_values', '_start', '_stop')
+
+    def __init__(self, key, values, start, stop):
+        self.key = key
+        self._values = values
+        self._start = start
+        self._stop = stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __iter__(self):
+        values = self._values
+        index = self._start
+        while index < self._stop:
+            yield values[index]
+            index += 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Grouping index out of range.")
+        return self._values[self._start + index]
+
+    def __repr__(self):
+        return "Grouping(%r, %r)" % (self.key, list(self))
+
+
+class Lookup(object):
+    """An immutable mapping of keys to the sequences of values with each key.
+
+    The values of every key are stored in a single tuple, ordered by the first appearance of
+    their key and then by their order in the sequence, so a lookup holds one reference per value
+    and a start and stop position per key. Looking up a key that is not in the lookup returns an
+    empty :class:`Grouping`.
+
+    :param iterable: The elements to group.
+    :type iterable: Iterable
+    :param key_selector: A function to extract the key of each element.
+    :type key_selector: function
+    :param value_selector: (optional) A function to extract the value of each element.
+    :type value_selector: function
+    """
+
+    def __init__(self, iterable, key_selector, value_selector=identity):
+        groups = {}
+        keys = []
+        for element in iterable:
+            key = key_selector(element)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = []
+                keys.append(key)
+            group.append(value_selector(element))
+        values = []
+        self._ranges = {}
+        for key in keys:
+            start = len(values)
+            values.extend(groups.pop(key))
+            self._ranges[key] = (start, len(values))
+        self._values = tuple(values)
+        self._keys = tuple(keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._ranges
+
+    def __getitem__(self, key):
+        start, stop = self._ranges.get(key, (0, 0))
+        return Grouping(key, self._values, start, stop)
+
+    def __iter__(self):
+        for key in self._keys:
+            yield self[key]
+
+    def keys(self):
+        """Returns the keys of the lookup, in the order they first appeared.
+
+        :rtype: tuple
+        """
+        return self._keys
+
+
+class IndexedQueryable(Queryable):
+    """A queryable over a materialized sequence with a hash index of the keys of its elements.
+
+    Filtering with a :func:`key_equals <pinq.predicates.key_equals>` predicate over the same key
+    selector the queryable was indexed by looks up the matching elements in the index, in the
+    order of the sequence, instead of testing every element. Every other operator iterates the
+    sequence, which may be queried any number of times.
+
+    :ivar key_selector: The function the elements are indexed by.
+    :ivar index: The :class:`Lookup` of the elements by key.
+    """
+
+    def __init__(self, queryable, key_selector):
+        elements = list(queryable)
+        super(IndexedQueryable, self).__init__(None, len(elements))
+        self.elements = elements
+        self.key_selector = key_selector
+        self.index = Lookup(elements, key_selector)
+
+    def __iter__(self):
+        for element in checked(iter(self.elements)):
+            yield element
+
+    @_operator
+    def where(self, predicate):
+        """Filters a sequence of values based on a predicate, using the index for
+        :func:`key_equals <pinq.predicates.key_equals>` predicates over the indexed key.
+
+        :param predicate: A function to test each element for a condition.
+        :type predicate: function
+        :return: The elements that satisfy the condition.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'predicate' is not callable
+        """
+        group = self._lookup(predicate)
+        if group is not None:
+            return Queryable(iter(group), len(group))
+        return super(IndexedQueryable, self).where(predicate)
+
+    def _lookup(self, predicate):
+        """Returns the :class:`Grouping` of the elements that satisfy 'predicate', or None if it
+        is not a key_equals predicate over the indexed key.
+        """
+        if getattr(predicate, 'key_selector', None) is not self.key_selector:
+            return None
+        try:
+            return self.index[predicate.key]
+        except TypeError:
+            return None
+
+
+class SortedIndex(object):
+    """An immutable index of the elements of a sequence, sorted by key.
+
+    The keys are stored sorted, alongside an array of the positions of their elements in the
+    sequence, so the elements with keys in a range are found by binary search in O(log n + k)
+    for k matching elements. Queries return the matching elements as a :class:`Queryable`, in
+    order of their keys, with elements of equal keys in the order of the sequence.
+
+    :param iterable: The elements to index.
+    :type iterable: Iterable
+    :param key_selector: A function to extract the key of each element.
+    :type key_selector: function
+    :ivar key_selector: The function the elements are indexed by.
+    """
+
+    def __init__(self, iterable, key_selector):
+        self.key_selector = key_selector
+        self.elements = list(iterable)
+        keys = [key_selector(element) for element in self.elements]
+        positions = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = [keys[position] for position in positions]
+        self.positions = array('l', positions)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self._between(0, len(self.keys)))
+
+    def _between(self, start, stop):
+        """Returns the elements from position 'start' up to 'stop' of the sorted keys."""
+        elements = self.elements
+        stop = max(start, stop)
+        return Queryable((elements[position] for position in self.positions[start:stop]),
+                         stop - start)
+
+    def range(self, lower=None, upper=None):
+        """Returns the elements with keys from 'lower' up to, but not including, 'upper'.
+
+        :param lower: (optional) The smallest key to return, or None for no lower bound.
+        :param upper: (optional) The key to stop before, or None for no upper bound.
+        :rtype: :class:`Queryable`
+        """
+        start = 0 if lower is None else bisect_left(self.keys, lower)
+        stop = len(self.keys) if upper is None else bisect_left(self.keys, upper)
+        return self._between(start, stop)
+
+    def eq(self, key):
+        """Returns the elements with keys equal to 'key'.
+
+        :rtype: :class:`Queryable`
+        """
+        return self._between(bisect_left(self.keys, key), bisect_right(self.keys, key))
+
+    def ge(self, key):
+        """Returns the elements with keys greater than or equal to 'key'.
+
+        :rtype: :class:`Queryable`
+        """
+        return self._between(bisect_left(self.keys, key), len(self.keys))
+
+    def gt(self, key):
+        """Returns the elements with keys greater than 'key'.
+
+        :rtype: :class:`Queryable`
+        """
+        return self._between(bisect_right(self.keys, key), len(self.keys))
+
+    def le(self, key):
+        """Returns the elements with keys less than or equal to 'key'.
+
+        :rtype: :class:`Queryable`
+        """
+        return self._between(0, bisect_right(self.keys, key))
+
+    def lt(self, key):
+        """Returns the elements with keys less than 'key'.
+
+        :rtype: :class:`Queryable`
+        """
+        return self._between(0, bisect_left(self.keys, key))
+
+    def prefix(self, prefix):
+        """Returns the elements whose string or bytes keys start with 'prefix'.
+
+        :rtype: :class:`Queryable`
+        """
+        keys = self.keys
+        start = stop = bisect_left(keys, prefix)
+        while stop < len(keys) and keys[stop].startswith(prefix):
+            stop += 1
+        return self._between(start, stop)
+
+    def nearest(self, key, count=1):
+        """Returns the 'count' elements whose keys are closest to 'key', nearest first.
+
+        Keys must support subtraction, such as numbers or datetimes; of two keys equally far
+        from 'key', the smaller is returned first, and elements of equal keys are returned in
+        the order of the sequence.
+
+        :param key: The key to search near.
+        :param count: (optional) The number of elements to return.
+        :type count: int
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'count' is not an int
+        :raise ValueError: if 'count' is not positive
+        """
+        if not isinstance(count, int):
+            raise TypeError("Value for 'count' is not an integer.")
+        if count <= 0:
+            raise ValueError("Value for 'count' must be positive.")
+        keys = self.keys
+        right = bisect_left(keys, key)
+        left = right - 1
+        positions = []
+        while len(positions) < count and (left >= 0 or right < len(keys)):
+            remaining = count - len(positions)
+            if right >= len(keys) or (left >= 0 and key - keys[left] <= keys[right] - key):
+                start = bisect_left(keys, keys[left], 0, left)
+                positions.extend(self.positions[start:min(left + 1, start + remaining)])
+                left = start - 1
+            else:
+                stop = bisect_right(keys, keys[right], right)
+                positions.extend(self.positions[right:min(stop, right + remaining)])
+                right = stop
+        return Queryable(iter([self.elements[position] for position in positions]),
+                         len(positions))
@@ -0,0 +1,486 @@
+"""
+pinq.memory
+~~~~~~~~~~~
+
+This module implements memory budgets for the operators of a query that buffer elements, and
+the spilling strategies those operators fall back to when a budget is exceeded.
+
+:copyright: (c) 2016 by David Shriver.
+:license: MIT, see LICENSE for more details.
+"""
+
+import pickle
+import threading
+from heapq import merge
+from sys import getsizeof
+from tempfile import TemporaryFile
+from .compat import *
+from .sketches import stable_hash
+
+_local = threading.local()
+
+_process_budget = [None]
+
+# The number of elements written to a spill file in a single pickle.
+SPILL_CHUNK_SIZE = 1024
+
+# The number of partitions keys are spilled to by hash, and how often partitions may be split.
+SPILL_FANOUT = 16
+
+SPILL_MAX_LEVEL = 8
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """Raised when an operator buffers more elements than the active memory budget allows.
+    """
+    pass
+
+
+def sizeof(value):
+    """Approximates the memory used by a buffered value in bytes.
+
+    The size of a tuple, list or dict includes the sizes of its items, but not their contents.
+
+    :param value: The value to measure.
+    :return: The approximate size of the value.
+    :rtype: int
+    """
+    size = getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        for item in value:
+            size += getsizeof(item)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            size += getsizeof(key) + getsizeof(item)
+    return size
+
+
+class _Reservation(object):
+    """The memory reserved from a budget by a single operator.
+
+    Sizes are accumulated locally and reserved from the budget in batches, so that the budget
+    is not locked for every element.
+    """
+
+    def __init__(self, budget, operator, spillable):
+        self.budget = budget
+        self.operator = operator
+        self.spillable = spillable and budget.spill
+        self.pending = 0
+        self.reserved = 0
+
+    def add(self, value):
+        """Accounts for a buffered value.
+
+        :param value: The buffered value.
+        :return: False if the operator must spill its buffered values, True otherwise.
+        :rtype: bool
+        :raise MemoryBudgetExceeded: if the budget is exceeded and the operator cannot spill
+        """
+        self.pending += sizeof(value)
+        if self.pending < self.budget.granularity:
+            return True
+        pending, self.pending = self.pending, 0
+        self.reserved += pending
+        if self.budget._reserve(pending):
+            return True
+        if self.spillable:
+            return False
+        self.release()
+        raise MemoryBudgetExceeded(
+            "Operator '%s' exceeded the memory budget of %d bytes." % (
+                self.operator, self.budget.limit))
+
+    def release(self):
+        """Returns all memory reserved by the operator to the budget."""
+        self.budget._release(self.reserved)
+        self.reserved = 0
+        self.pending = 0
+
+
+class MemoryBudget(object):
+    """A limit on the memory buffered by the operators of a query.
+
+    A budget is activated for the queries executed in a thread by using it as a context manager,
+    or for every thread with :func:`set_memory_budget`. Buffering operators account for the
+    approximate size of the elements or keys they hold. When the limit is exceeded,
+    :meth:`order_by <pinq.queryable.Queryable.order_by>`, :meth:`group_by
+    <pinq.queryable.Queryable.group_by>` and :meth:`reverse <pinq.queryable.Queryable.reverse>`
+    spill sorted runs or chunks to temporary files if 'spill' is set, and :meth:`distinct
+    <pinq.queryable.Queryable.distinct>`, :meth:`union <pinq.queryable.Queryable.union>` and
+    :meth:`intersect <pinq.queryable.Queryable.intersect>` spill keys to hash partitions;
+    every other operator, or any operator if 'spill' is not set, raises
+    :class:`MemoryBudgetExceeded`.
+
+    :param limit: The maximum number of bytes that may be buffered.
+    :type limit: int
+    :param spill: (optional) Whether operators that can spill to disk should do so.
+    :type spill: bool
+    :param spill_directory: (optional) The directory for temporary spill files.
+    :type spill_directory: str
+    """
+
+    def __init__(self, limit, spill=False, spill_directory=None):
+        if not isinstance(limit, int):
+            raise TypeError("Value for 'limit' is not an integer.")
+        if limit <= 0:
+            raise ValueError("Value for 'limit' must be positive.")
+        self.limit = limit
+        self.spill = spill
+        self.spill_directory = spill_directory
+        self.granularity = min(1 << 16, max(limit // 16, 1))
+        self.used = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        _budgets().append(self)
+        return self
+
+    def __exit__(self, *_):
+        _budgets().pop()
+
+    def _reserve(self, size):
+        """Reserves memory, and returns whether the budget still holds."""
+        with self._lock:
+            self.used += size
+            self.peak = max(self.peak, self.used)
+            return self.used <= self.limit
+
+    def _release(self, size):
+        """Returns reserved memory to the budget."""
+        with self._lock:
+            self.used -= size
+
+    def reservation(self, operator, spillable=False):
+        """Creates a reservation for a buffering operator.
+
+        :param operator: The name of the operator, used in error messages.
+        :type operator: str
+        :param spillable: (optional) Whether the operator can spill to disk.
+        :type spillable: bool
+        """
+        return _Reservation(self, operator, spillable)
+
+
+def _budgets():
+    """Returns the stack of memory budgets active in the current thread."""
+    budgets = getattr(_local, 'budgets', None)
+    if budgets is None:
+        budgets = _local.budgets = []
+    return budgets
+
+
+def set_memory_budget(budget):
+    """Sets the memory budget used by queries in threads without an active budget.
+
+    :param budget: The process-wide budget, or None to remove it.
+    :type budget: :class:`MemoryBudget`
+    :raise TypeError: if 'budget' is not a MemoryBudget or None
+    """
+    if budget is not None and not isinstance(budget, MemoryBudget):
+        raise TypeError("Value for 'budget' is not a MemoryBudget.")
+    _process_budget[0] = budget
+
+
+def current_budget():
+    """Returns the memory budget active in the current thread, if any."""
+    budgets = _budgets()
+    if budgets:
+        return budgets[-1]
+    return _process_budget[0]
+
+
+def reserve(operator, spillable=False):
+    """Creates a reservation from the active memory budget, or returns None if there is none."""
+    budget = current_budget()
+    if budget is None:
+        return None
+    return budget.reservation(operator, spillable)
+
+
+class _Descending(object):
+    """Inverts the ordering of a sort key."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def sort_key(keys):
+    """Combines the sort keys of an ordered queryable into a single key function.
+
+    :param keys: The (key_selector, descending) pairs, from the least to the most significant.
+    :type keys: list
+    :return: A key function ordering elements as sorting by each key in turn does.
+    :rtype: function
+    """
+    keys = list(reversed(keys))
+    if len(keys) == 1 and not keys[0][1]:
+        return keys[0][0]
+    if not any(descending for _, descending in keys):
+        selectors = [key_selector for key_selector, _ in keys]
+        return lambda element: tuple([key_selector(element) for key_selector in selectors])
+    return lambda element: tuple(_Descending(key_selector(element)) if descending
+                                 else key_selector(element)
+                                 for key_selector, descending in keys)
+
+
+def _spill(elements, budget):
+    """Writes elements to a temporary file in chunks, and returns the file."""
+    spill_file = TemporaryFile(dir=budget.spill_directory)
+    for start in range(0, len(elements), SPILL_CHUNK_SIZE):
+        pickle.dump(elements[start:start + SPILL_CHUNK_SIZE], spill_file,
+                    pickle.HIGHEST_PROTOCOL)
+    return spill_file
+
+
+def _read_spill(spill_file):
+    """Yields the elements of a file written by :func:`_spill`."""
+    spill_file.seek(0)
+    while True:
+        try:
+            chunk = pickle.load(spill_file)
+        except EOFError:
+            return
+        for element in chunk:
+            yield element
+
+
+def _decorate(elements, index, key):
+    """Pairs sorted elements with their key and run, so that merging the runs is stable."""
+    for element in elements:
+        yield key(element), index, element
+
+
+def spilling_sorted(iterable, keys, budget, operator):
+    """Sorts elements within a memory budget, spilling sorted runs to disk when it is exceeded.
+
+    Spilled runs are merged back lazily, and the sort is stable.
+
+    :param iterable: The elements to sort.
+    :param keys: The (key_selector, descending) pairs, from the least to the most significant.
+    :param budget: The memory budget to account the buffered elements to.
+    :param operator: The name of the sorting operator.
+    :return: An iterator over the sorted elements.
+    """
+    key = sort_key(keys)
+    accounting = budget.reservation(operator, True)
+    runs = []
+    run = []
+    try:
+        for element in iterable:
+            run.append(element)
+            if not accounting.add(element):
+                run.sort(key=key)
+                runs.append(_spill(run, budget))
+                run = []
+                accounting.release()
+        run.sort(key=key)
+        if not runs:
+            for element in run:
+                yield element
+            return
+        sources = [_read_spill(spill_file) for spill_file in runs] + [run]
+        for _, _, element in merge(*[_decorate(source, index, key)
+                                     for index, source in enumerate(sources)]):
+            yield element
+    finally:
+        accounting.release()
+        for spill_file in runs:
+            spill_file.close()
+
+
+def spilling_reversed(iterable, budget):
+    """Reverses elements within a memory budget, spilling chunks to disk when it is exceeded.
+
+    :param iterable: The elements to reverse.
+    :param budget: The memory budget to account the buffered elements to.
+    :return: An iterator over the elements in reverse order.
+    """
+    accounting = budget.reservation('reverse', True)
+    chunks = []
+    elements = []
+    try:
+        for element in iterable:
+            elements.append(element)
+            if not accounting.add(element):
+                chunks.append(_spill(elements, budget))
+                elements = []
+                accounting.release()
+        while elements:
+            yield elements.pop()
+        while chunks:
+            spill_file = chunks.pop()
+            elements = list(_read_spill(spill_file))
+            spill_file.close()
+            while elements:
+                yield elements.pop()
+    finally:
+        accounting.release()
+        for spill_file in chunks:
+            spill_file.close()
+
+
+def _partition(key, level):
+    """Returns the partition of a key at a partitioning level.
+
+    The level is hashed together with the key, so the keys of a single partition are spread
+    across every partition of the next level. Keys that compare equal share a partition.
+    """
+    return stable_hash((level, key)) % SPILL_FANOUT
+
+
+class _Partitions(object):
+    """Temporary files that (key, element) pairs are spilled to, partitioned by the key's hash.
+
+    Pairs are buffered per partition and written in chunks of :data:`SPILL_CHUNK_SIZE`.
+    """
+
+    def __init__(self, budget, level):
+        self.budget = budget
+        self.level = level
+        self.files = [None] * SPILL_FANOUT
+        self.buffers = [[] for _ in range(SPILL_FANOUT)]
+
+    def add(self, key, element):
+        """Spills a pair to the partition of its key."""
+        index = _partition(key, self.level)
+        buffer = self.buffers[index]
+        buffer.append((key, element))
+        if len(buffer) >= SPILL_CHUNK_SIZE:
+            self._flush(index)
+
+    def _flush(self, index):
+        """Writes the buffered pairs of a partition to its file."""
+        if self.files[index] is None:
+            self.files[index] = TemporaryFile(dir=self.budget.spill_directory)
+        pickle.dump(self.buffers[index], self.files[index], pickle.HIGHEST_PROTOCOL)
+        self.buffers[index] = []
+
+    def read(self):
+        """Yields an iterator over the pairs of each partition in turn."""
+        for index in range(SPILL_FANOUT):
+            if self.buffers[index]:
+                self._flush(index)
+            if self.files[index] is None:
+                yield iter(())
+            else:
+                yield _read_spill(self.files[index])
+
+    def close(self):
+        """Removes the temporary files."""
+        for spill_file in self.files:
+            if spill_file is not None:
+                spill_file.close()
+
+
+def _spill_level(level, operator, budget):
+    """Returns the partitioning level below 'level', if the keys may still be partitioned."""
+    if level >= SPILL_MAX_LEVEL:
+        raise MemoryBudgetExceeded(
+            "Operator '%s' exceeded the memory budget of %d bytes after partitioning." % (
+                operator, budget.limit))
+    return level + 1
+
+
+def spilling_distinct(pairs, budget, operator, level=0):
+    """Yields the elements with distinct keys within a memory budget.
+
+    The keys seen so far are kept in memory until the budget is exceeded. After that, elements
+    whose keys have not been seen are spilled to partitions on disk by the hash of their key,
+    and each partition is deduplicated in turn once the input is exhausted, partitioning it
+    further if it still exceeds the budget. Elements are yielded in their original order until
+    the budget is exceeded, and in order within each partition afterwards.
+
+    :param pairs: The (key, element) pairs to deduplicate.
+    :param budget: The memory budget to account the seen keys to.
+    :param operator: The name of the deduplicating operator.
+    :param level: (optional) The partitioning level of 'pairs'.
+    :return: An iterator over the first element with each key.
+    """
+    accounting = budget.reservation(operator, True)
+    seen = {}
+    partitions = None
+    try:
+        for key, element in pairs:
+            if key in seen:
+                continue
+            if partitions is not None:
+                partitions.add(key, element)
+                continue
+            seen[key] = 1
+            yield element
+            if not accounting.add(key):
+                partitions = _Partitions(budget, _spill_level(level, operator, budget))
+        if partitions is None:
+            return
+        seen.clear()
+        accounting.release()
+        for partition in partitions.read():
+            for element in spilling_distinct(partition, budget, operator, partitions.level):
+                yield element
+    finally:
+        accounting.release()
+        if partitions is not None:
+            partitions.close()
+
+
+def spilling_intersect(pairs, other_keys, budget, operator, level=0):
+    """Yields the elements with distinct keys that are in 'other_keys', within a memory budget.
+
+    The keys of the other sequence are kept in memory until the budget is exceeded. After
+    that, the keys of both sequences are spilled to partitions on disk by their hash, and
+    matching partitions are intersected in turn. Elements are yielded in their original order
+    unless the budget is exceeded.
+
+    :param pairs: The (key, element) pairs to intersect.
+    :param other_keys: The keys of the other sequence.
+    :param budget: The memory budget to account the keys to.
+    :param operator: The name of the intersecting operator.
+    :param level: (optional) The partitioning level of 'pairs'.
+    :return: An iterator over the first element with each key in 'other_keys'.
+    """
+    accounting = budget.reservation(operator, True)
+    keys = {}
+    others = None
+    partitions = None
+    try:
+        for key in other_keys:
+            if key in keys:
+                continue
+            if others is not None:
+                others.add(key, None)
+                continue
+            keys[key] = 1
+            if not accounting.add(key):
+                others = _Partitions(budget, _spill_level(level, operator, budget))
+        if others is None:
+            for key, element in pairs:
+                if keys.get(key):
+                    keys[key] = 0
+                    yield element
+            return
+        for key in keys:
+            others.add(key, None)
+        keys.clear()
+        accounting.release()
+        partitions = _Partitions(budget, others.level)
+        for key, element in pairs:
+            partitions.add(key, element)
+        for other_partition, partition in zip(others.read(), partitions.read()):
+            for element in spilling_intersect(partition, (key for key, _ in other_partition),
+                                              budget, operator, others.level):
+                yield element
+    finally:
+        accounting.release()
+        if others is not None:
+            others.close()
+        if partitions is not None:
+            partitions.close()
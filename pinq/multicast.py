@@ -0,0 +1,106 @@
+"""
+pinq.multicast
+~~~~~~~~~~~~~~
+
+This module implements multicasting a single pass over a sequence to several queries, each
+consuming it in its own thread through a bounded queue.
+
+:copyright: (c) 2016 by David Shriver.
+:license: MIT, see LICENSE for more details.
+"""
+
+import sys
+import threading
+from .cancellation import current_token
+from .compat import *
+from .memory import current_budget
+
+# The number of elements sent to the queries at a time.
+CHUNK_SIZE = 256
+
+# The number of chunks that may be queued for each query before the source waits for it.
+QUEUE_DEPTH = 4
+
+_END = object()
+
+
+class _Branch(object):
+    """A query consuming its share of a multicast sequence in a separate thread.
+
+    The query runs with the memory budget and cancellation token of the thread that started the
+    multicast. Once the query returns or raises, the branch keeps discarding the chunks sent to
+    it, so that the source never waits for a query that has finished.
+    """
+
+    def __init__(self, builder, budget, token):
+        self.builder = builder
+        self.budget = budget
+        self.token = token
+        self.queue = Queue(QUEUE_DEPTH)
+        self.done = False
+        self.ended = False
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+
+    def _elements(self):
+        """Yields the elements sent to the branch, until the end of the sequence."""
+        while True:
+            chunk = self.queue.get()
+            if chunk is _END:
+                self.ended = True
+                return
+            for element in chunk:
+                yield element
+
+    def _run(self):
+        contexts = [context for context in (self.budget, self.token) if context is not None]
+        for context in contexts:
+            context.__enter__()
+        try:
+            self.result = self.builder(self._elements())
+        except Exception:
+            self.error = sys.exc_info()
+        finally:
+            for context in reversed(contexts):
+                context.__exit__(None, None, None)
+            self.done = True
+            while not self.ended:
+                self.ended = self.queue.get() is _END
+
+
+def multicast(iterable, builders):
+    """Runs several queries over a single pass of a sequence, and returns their results.
+
+    :param iterable: The sequence to multicast.
+    :param builders: The functions that evaluate each query over an iterator of the elements.
+    :return: The result of each query, in the order of 'builders'.
+    :rtype: tuple
+    :raise: the first exception raised by the source or a query
+    """
+    budget = current_budget()
+    token = current_token()
+    branches = [_Branch(builder, budget, token) for builder in builders]
+    for branch in branches:
+        branch.thread.start()
+    try:
+        iterator = iter(iterable)
+        while True:
+            live = [branch for branch in branches if not branch.done]
+            if not live:
+                break
+            chunk = list(islice(iterator, CHUNK_SIZE))
+            if not chunk:
+                break
+            for branch in live:
+                branch.queue.put(chunk)
+    finally:
+        for branch in branches:
+            branch.queue.put(_END)
+        for branch in branches:
+            branch.thread.join()
+    for branch in branches:
+        if branch.error is not None:
+            reraise(branch.error)
+    return tuple(branch.result for branch in branches)
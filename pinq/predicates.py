@@ -15,4 +15,28 @@ def true(*_):
     :rtype: bool
     """
     return True
-    
\ No newline at end of file
+    
+
+
+def key_equals(key_selector, key):
+    """Returns a predicate that tests whether the key of a value equals 'key'.
+
+    The key selector and key are kept as the 'key_selector' and 'key' attributes of the
+    predicate, so that a queryable indexed by the same key selector function can look up the
+    matching elements instead of testing every element.
+
+    :param key_selector: A function to extract the key of each value.
+    :type key_selector: function
+    :param key: The key to compare with.
+    :return: The predicate.
+    :rtype: function
+    :raise TypeError: if 'key_selector' is not callable
+    """
+    if not callable(key_selector):
+        raise TypeError("Value for 'key_selector' is not callable.")
+
+    def _key_equals(value):
+        return key_selector(value) == key
+    _key_equals.key_selector = key_selector
+    _key_equals.key = key
+    return _key_equals
@@ -0,0 +1,504 @@
+"""
+pinq.profiling
+~~~~~~~~~~~~~~
+
+This module implements the instrumentation used to profile and explain the operators of a query.
+
+:copyright: (c) 2016 by David Shriver.
+:license: MIT, see LICENSE for more details.
+"""
+
+from .compat import *
+from .indexes import IndexedQueryable
+from .memory import current_budget
+from .queryable import OrderedQueryable, Queryable
+
+# How the number of buffered elements is determined for operators that buffer elements.
+BUFFERING = dict([
+    ('distinct', 'output'), ('except_values', 'other'), ('group_by', 'input'),
+    ('group_join', 'other'), ('intersect', 'other'), ('join', 'other'),
+    ('order_by', 'input'), ('order_by_descending', 'input'), ('reverse', 'input'),
+    ('sample', 'output'), ('sample_by', 'output'), ('union', 'output')])
+
+# How each operator processes its input without a memory budget, for operators that do not
+# simply stream it.
+STRATEGIES = dict([
+    ('distinct', 'hash set of the keys seen so far'),
+    ('except_values', 'hash set built from the other input'),
+    ('group_by', 'sort-based grouping, buffers the whole input'),
+    ('group_join', 'hash join, build side: other input'),
+    ('intersect', 'hash set built from the other input'),
+    ('join', 'hash join, build side: other input'),
+    ('order_by', 'full sort, buffers the whole input'),
+    ('order_by_descending', 'full sort, buffers the whole input'),
+    ('reverse', 'buffers the whole input'),
+    ('sample', 'reservoir sampling with skips (Algorithm L), buffers the sample'),
+    ('sample_by', 'reservoir per key, buffers the samples'),
+    ('sample_fraction', 'Bernoulli sampling with geometric skips'),
+    ('union', 'hash set of the keys seen so far'),
+    ('window_session', 'buffers the current session'),
+    ('window_sliding', 'buffers the last size elements'),
+    ('window_tumbling', 'buffers the current window'),
+    ('with_window', 'single sort by partition and order keys, buffers the whole input')])
+
+# How the operators that can spill process their input under a budget that allows spilling.
+SPILLING_STRATEGIES = dict([
+    ('distinct', 'hash set of the keys seen so far, spills keys to hash partitions'),
+    ('group_by', 'sort-based grouping, spills sorted runs'),
+    ('intersect', 'hash set built from the other input, spills keys to hash partitions'),
+    ('order_by', 'external merge sort, spills sorted runs'),
+    ('order_by_descending', 'external merge sort, spills sorted runs'),
+    ('reverse', 'spills chunks of the input'),
+    ('union', 'hash set of the keys seen so far, spills keys to hash partitions'),
+    ('with_window', 'single external merge sort by partition and order keys, spills sorted runs')])
+
+# Operators that account their buffered elements to the memory budget, and fail when it is
+# exceeded unless they can spill.
+BUDGETED = frozenset(['except_values', 'group_join', 'join', 'sample_by']).union(
+    SPILLING_STRATEGIES)
+
+# The position of the 'approximate' argument of operators that can use a Bloom filter.
+APPROXIMATE = dict([('distinct', 1), ('intersect', 2), ('union', 2)])
+
+# Operators whose output preserves the ordering of their input.
+ORDER_PRESERVING = frozenset(['default_if_empty', 'distinct', 'except_values', 'intersect',
+                              'of_type', 'sample_fraction', 'skip', 'skip_while', 'stream',
+                              'take', 'take_while', 'where'])
+
+# Operators that produce at most as many elements as their input.
+FILTERING = frozenset(['distinct', 'except_values', 'group_by', 'intersect', 'of_type',
+                       'sample', 'sample_by', 'sample_fraction', 'skip', 'skip_while',
+                       'take_while', 'where'])
+
+# Operators that produce exactly as many elements as their input.
+SIZE_PRESERVING = frozenset(['cast', 'order_by', 'order_by_descending', 'reverse',
+                             'running_average', 'running_count', 'running_max', 'running_min',
+                             'running_sum', 'scan', 'select', 'stream', 'with_window'])
+
+# Operators whose first argument is a second input sequence.
+OTHER_INPUT = frozenset(['concat', 'except_values', 'group_join', 'intersect', 'join', 'union',
+                         'zip'])
+
+
+def lineage(queryable):
+    """Returns the queryables that make up a query, from its source to 'queryable'.
+
+    :param queryable: The last queryable of the query.
+    :type queryable: :class:`Queryable`
+    :return: The queryables of the query, starting with its source.
+    :rtype: list
+    """
+    queryables = [queryable]
+    while queryables[-1]._lineage is not None:
+        queryables.append(queryables[-1]._lineage[0])
+    queryables.reverse()
+    return queryables
+
+
+def is_function(value):
+    """Determines whether an operator argument is a function, rather than a type or a value."""
+    return callable(value) and not isinstance(value, type) and not isinstance(value, Queryable)
+
+
+def function_name(function):
+    """Returns a readable name for a function passed to an operator."""
+    name = getattr(function, '__name__', None)
+    if name is None:
+        return type(function).__name__
+    code = getattr(function, '__code__', None)
+    if name == '<lambda>' and code is not None:
+        return '<lambda:%d>' % code.co_firstlineno
+    return name
+
+
+def operator_functions(queryable):
+    """Returns the functions that were passed to the operator that created 'queryable'."""
+    _, _, args, kwargs = queryable._lineage
+    functions = [value for value in list(args) + list(kwargs.values()) if is_function(value)]
+    if isinstance(queryable, OrderedQueryable):
+        functions = [key_selector for key_selector, _ in reversed(queryable._keys)]
+    return functions
+
+
+def source_name(queryable):
+    """Returns a readable description of the source of a query."""
+    if queryable._source is not None:
+        return "%s(%s)" % (type(queryable).__name__, type(queryable._source).__name__)
+    path = getattr(queryable, 'path', None)
+    if path is not None:
+        return "%s(%r)" % (type(queryable).__name__, path)
+    return type(queryable).__name__
+
+
+class StageStatistics(object):
+    """The statistics of a single operator of a profiled query.
+
+    Times are in seconds. :attr:`time` excludes the time spent in the operators before this one,
+    and :attr:`overhead_time` is the part of it not spent in the functions passed to the operator.
+    """
+
+    def __init__(self, operator, functions):
+        self.operator = operator
+        self.functions = functions
+        self.elements_in = None
+        self.elements_out = 0
+        self.other_elements = 0
+        self.peak_buffered = 0
+        self.inclusive_time = 0.0
+        self.time = 0.0
+        self.user_time = 0.0
+        self.overhead_time = 0.0
+
+    def as_dict(self):
+        """Returns the statistics as a dictionary."""
+        return dict([
+            ('operator', self.operator), ('functions', list(self.functions)),
+            ('elements_in', self.elements_in), ('elements_out', self.elements_out),
+            ('peak_buffered', self.peak_buffered), ('time', self.time),
+            ('user_time', self.user_time), ('overhead_time', self.overhead_time)])
+
+
+class QueryProfile(object):
+    """The statistics of every operator of a profiled query, in the order they are applied.
+    """
+
+    def __init__(self, stages, result, total_time):
+        self.stages = stages
+        self.result = result
+        self.total_time = total_time
+
+    def as_dicts(self):
+        """Returns the statistics of each operator as a list of dictionaries."""
+        return [stage.as_dict() for stage in self.stages]
+
+    def __str__(self):
+        lines = ["%-22s %10s %10s %10s %10s %10s %10s  %s" % (
+            "operator", "in", "out", "buffered", "time ms", "user ms", "engine ms", "functions")]
+        for stage in self.stages:
+            lines.append("%-22s %10s %10d %10d %10.3f %10.3f %10.3f  %s" % (
+                stage.operator, "-" if stage.elements_in is None else stage.elements_in,
+                stage.elements_out, stage.peak_buffered, stage.time * 1000,
+                stage.user_time * 1000, stage.overhead_time * 1000,
+                ", ".join(stage.functions)))
+        lines.append("total: %.3f ms" % (self.total_time * 1000))
+        return "\n".join(lines)
+
+
+class _TimedFunction(object):
+    """Wraps a function passed to an operator to measure the time spent in it."""
+
+    def __init__(self, function, statistics):
+        self.__dict__.update(getattr(function, '__dict__', {}))
+        self.function = function
+        self.statistics = statistics
+        if hasattr(function, '__code__'):
+            self.__code__ = function.__code__
+
+    def __call__(self, *args):
+        start = perf_counter()
+        try:
+            return self.function(*args)
+        finally:
+            self.statistics.user_time += perf_counter() - start
+
+
+class _CountedIterable(object):
+    """Wraps the second input sequence of an operator to count the elements read from it."""
+
+    def __init__(self, iterable, statistics):
+        self.iterable = iterable
+        self.statistics = statistics
+
+    def __iter__(self):
+        for element in self.iterable:
+            self.statistics.other_elements += 1
+            yield element
+
+
+class _ProfiledQueryable(Queryable):
+    """Wraps a stage of a rebuilt query to count the elements it produces and time it."""
+
+    def __init__(self, stage, statistics):
+        super(_ProfiledQueryable, self).__init__(None, stage._length_hint())
+        self.stage = stage
+        self.statistics = statistics
+
+    def __iter__(self):
+        statistics = self.statistics
+        iterator = iter(self.stage)
+        while True:
+            start = perf_counter()
+            try:
+                element = next(iterator)
+            except StopIteration:
+                statistics.inclusive_time += perf_counter() - start
+                return
+            statistics.inclusive_time += perf_counter() - start
+            statistics.elements_out += 1
+            yield element
+
+
+class _ProfiledIndexedQueryable(_ProfiledQueryable):
+    """Wraps an indexed source of a rebuilt query, so that filtering it looks up the index as
+    the query would, and the source produces only the elements found.
+    """
+
+    def where(self, predicate):
+        group = self.stage._lookup(predicate)
+        if group is None:
+            return super(_ProfiledIndexedQueryable, self).where(predicate)
+        return _ProfiledQueryable(Queryable(iter(group), len(group)), self.statistics)
+
+
+class _ProfiledOrderedQueryable(OrderedQueryable):
+    """Wraps an ordered stage of a rebuilt query, keeping its ordering for the operators that
+    use it, such as :meth:`with_window <pinq.queryable.Queryable.with_window>`.
+
+    The profiled stage is already sorted, so iterating the wrapper does not sort it again.
+    """
+
+    def __init__(self, stage, statistics):
+        super(_ProfiledOrderedQueryable, self).__init__(
+            _ProfiledQueryable(stage, statistics), stage._keys)
+
+    def __iter__(self):
+        return iter(self.iterator)
+
+
+def _rebuild_stage(rebuilt, original, statistics):
+    """Applies the operator that created 'original' to 'rebuilt', with instrumented arguments."""
+    _, operator, args, kwargs = original._lineage
+    args = [_TimedFunction(value, statistics) if is_function(value) else value
+            for value in args]
+    kwargs = dict((name, _TimedFunction(value, statistics) if is_function(value) else value)
+                  for name, value in kwargs.items())
+    if operator in OTHER_INPUT:
+        if args:
+            args[0] = _CountedIterable(args[0], statistics)
+        else:
+            kwargs['other'] = _CountedIterable(kwargs['other'], statistics)
+    stage = getattr(rebuilt, operator)(*args, **kwargs)
+    if isinstance(original, OrderedQueryable):
+        stage._keys = [(_TimedFunction(key_selector, statistics), descending)
+                       for key_selector, descending in original._keys]
+    return stage
+
+
+def _finish(stages):
+    """Computes the derived statistics of each stage once the query has been executed."""
+    previous = None
+    for statistics in stages:
+        statistics.time = statistics.inclusive_time
+        if previous is not None:
+            statistics.elements_in = previous.elements_out
+            statistics.time = max(statistics.time - previous.inclusive_time, 0.0)
+        statistics.overhead_time = max(statistics.time - statistics.user_time, 0.0)
+        buffering = BUFFERING.get(statistics.operator)
+        if buffering == 'input':
+            statistics.peak_buffered = statistics.elements_in
+        elif buffering == 'output':
+            statistics.peak_buffered = statistics.elements_out
+        elif buffering == 'other':
+            statistics.peak_buffered = statistics.other_elements
+        previous = statistics
+
+
+def profile(queryable, terminal):
+    """Rebuilds a query with instrumentation, executes it and returns its statistics.
+
+    :param queryable: The query to profile.
+    :type queryable: :class:`Queryable`
+    :param terminal: A function that consumes the rebuilt query.
+    :type terminal: function
+    :return: The statistics of the query.
+    :rtype: :class:`QueryProfile`
+    """
+    queryables = lineage(queryable)
+    stages = [StageStatistics(source_name(queryables[0]), [])]
+    if isinstance(queryables[0], IndexedQueryable):
+        rebuilt = _ProfiledIndexedQueryable(queryables[0], stages[0])
+    else:
+        rebuilt = _ProfiledQueryable(queryables[0], stages[0])
+    for original in queryables[1:]:
+        statistics = StageStatistics(original._lineage[1], [
+            function_name(function) for function in operator_functions(original)])
+        stage = _rebuild_stage(rebuilt, original, statistics)
+        if isinstance(stage, OrderedQueryable):
+            rebuilt = _ProfiledOrderedQueryable(stage, statistics)
+        else:
+            rebuilt = _ProfiledQueryable(stage, statistics)
+        stages.append(statistics)
+    start = perf_counter()
+    result = terminal(rebuilt)
+    total_time = perf_counter() - start
+    _finish(stages)
+    return QueryProfile(stages, result, total_time)
+
+
+class PlanNode(object):
+    """A single operator, or source, in the plan of a query.
+
+    :attr:`estimate` is the estimated number of elements the operator produces, or None if it is
+    unknown, and :attr:`exact` is whether the estimate is exact rather than an upper bound.
+    :attr:`actual` is the number of elements produced when the plan was analyzed.
+    """
+
+    def __init__(self, operator, functions, estimate, exact, ordered, strategy, children=()):
+        self.operator = operator
+        self.functions = functions
+        self.estimate = estimate
+        self.exact = exact
+        self.ordered = ordered
+        self.strategy = strategy
+        self.children = list(children)
+        self.actual = None
+
+    def _describe(self):
+        """Returns a single line description of the operator."""
+        description = self.operator
+        if self.functions:
+            description += " [%s]" % ", ".join(self.functions)
+        if self.estimate is None:
+            description += "  rows=?"
+        else:
+            description += "  rows%s%d" % ("=" if self.exact else "<=", self.estimate)
+        if self.actual is not None:
+            description += "  actual=%d" % self.actual
+        if self.ordered:
+            description += "  ordered"
+        if self.strategy:
+            description += "  (%s)" % self.strategy
+        return description
+
+    def _lines(self, prefix, child_prefix):
+        """Yields the lines of the tree rooted at this node."""
+        yield prefix + self._describe()
+        for index, child in enumerate(self.children):
+            if index == len(self.children) - 1:
+                lines = child._lines(child_prefix + "`- ", child_prefix + "   ")
+            else:
+                lines = child._lines(child_prefix + "|- ", child_prefix + "|  ")
+            for line in lines:
+                yield line
+
+
+class QueryPlan(object):
+    """The operator tree of a query, with the last operator at its root.
+
+    :attr:`nodes` lists the operators of the main input of the query from its source to its last
+    operator. When the plan was analyzed, :attr:`profile` holds the statistics of the execution.
+    """
+
+    def __init__(self, root, nodes, profile=None):
+        self.root = root
+        self.nodes = nodes
+        self.profile = profile
+
+    def __str__(self):
+        return "\n".join(self.root._lines("", ""))
+
+
+def _estimate(queryable, operator, args, parent):
+    """Estimates the number of elements produced by an operator.
+
+    :return: A tuple of the estimate, or None, and whether it is exact.
+    :rtype: tuple
+    """
+    length = queryable._length_hint()
+    if length is not None:
+        return length, True
+    estimate = parent.estimate if parent is not None else None
+    if operator in ('sample', 'take') and args and isinstance(args[0], int):
+        if estimate is None:
+            return max(args[0], 0), False
+        return min(estimate, max(args[0], 0)), False
+    if operator == 'sample_fraction' and args and estimate is not None:
+        return int(round(estimate * args[0])), False
+    if operator in SIZE_PRESERVING and estimate is not None:
+        return estimate, parent.exact
+    if operator in FILTERING and estimate is not None:
+        return estimate, False
+    if operator == 'default_if_empty' and estimate is not None:
+        return max(estimate, 1), False
+    return None, False
+
+
+def _argument(args, kwargs, position, name, default):
+    """Returns the value of an operator argument given by position or by name."""
+    if len(args) > position:
+        return args[position]
+    return kwargs.get(name, default)
+
+
+def strategy(operator, args, kwargs, budget):
+    """Describes how an operator processes its input, given its arguments and the memory budget
+    it runs under.
+
+    :param operator: The name of the operator.
+    :param args: The positional arguments of the operator.
+    :param kwargs: The keyword arguments of the operator.
+    :param budget: The active :class:`MemoryBudget <pinq.memory.MemoryBudget>`, or None.
+    :return: The description of the strategy, or None if the operator simply streams its input.
+    :rtype: str
+    """
+    if operator in APPROXIMATE and _argument(args, kwargs, APPROXIMATE[operator],
+                                             'approximate', False):
+        if operator == 'intersect':
+            return "hash set built from the other input, Bloom filter of the keys returned"
+        return "Bloom filter of the keys seen so far"
+    if operator == 'with_window' and _argument(args, kwargs, 3, 'presorted', False):
+        return "single pass over presorted partitions, buffers the elements for lag and lead"
+    if budget is None or operator not in BUDGETED:
+        return STRATEGIES.get(operator)
+    if budget.spill and operator in SPILLING_STRATEGIES:
+        return "%s beyond %d bytes" % (SPILLING_STRATEGIES[operator], budget.limit)
+    return "%s, fails beyond %d bytes" % (STRATEGIES[operator], budget.limit)
+
+
+def _plan(queryable):
+    """Builds the plan nodes for the main input of a query, from its source."""
+    queryables = lineage(queryable)
+    budget = current_budget()
+    length = queryables[0]._length_hint()
+    nodes = [PlanNode("source: " + source_name(queryables[0]), [], length, length is not None,
+                      False, None)]
+    for original in queryables[1:]:
+        parent = nodes[-1]
+        _, operator, args, kwargs = original._lineage
+        estimate, exact = _estimate(original, operator, args, parent)
+        ordered = operator in ('order_by', 'order_by_descending') or (
+            parent.ordered and operator in ORDER_PRESERVING)
+        children = [parent]
+        if operator in OTHER_INPUT:
+            other = args[0] if args else kwargs['other']
+            if isinstance(other, Queryable):
+                children.append(_plan(other)[-1])
+            else:
+                children.append(PlanNode("input: " + type(other).__name__, [], None, False,
+                                         False, None))
+        nodes.append(PlanNode(operator, [function_name(function) for function in
+                                         operator_functions(original)],
+                              estimate, exact, ordered,
+                              strategy(operator, args, kwargs, budget), children))
+    return nodes
+
+
+def explain(queryable, analyze, terminal):
+    """Builds the plan of a query, and executes it to record actual element counts if requested.
+
+    :param queryable: The query to explain.
+    :type queryable: :class:`Queryable`
+    :param analyze: Whether to execute the query.
+    :type analyze: bool
+    :param terminal: A function that consumes the query when it is analyzed.
+    :type terminal: function
+    :return: The plan of the query.
+    :rtype: :class:`QueryPlan`
+    """
+    nodes = _plan(queryable)
+    statistics = None
+    if analyze:
+        statistics = profile(queryable, terminal)
+        for node, stage in zip(nodes, statistics.stages):
+            node.actual = stage.elements_out
+    return QueryPlan(nodes[-1], nodes, statistics)
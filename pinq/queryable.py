@@ -9,23 +9,233 @@ This module implements the Queryable class for querying iterables using the LINQ
 """
 
 from __future__ import division
+import csv
+import json
+import math
+import random
+from array import array
+from copy import copy
+from heapq import nlargest
+from operator import itemgetter
+from .accumulators import CHUNK_SIZE, Accumulator, Max, Min, Variance
+from .cancellation import checked
 from .compat import *
+from .memory import current_budget, reserve, sort_key, spilling_distinct, spilling_intersect, \
+    spilling_reversed, spilling_sorted
+from .multicast import multicast
 from .predicates import true
+from .sketches import BloomFilter, FrequentItems, HyperLogLog, KLLSketch
+from .sinks import DEFAULT_BUFFER_SIZE, open_sink, write_persisted
 from .transforms import identity, select_i
+from .windows import AGGREGATES, parse_window_functions, session_windows, sliding_windows, \
+    tumbling_windows, window_functions
+
+
+def _operator(method):
+    """Records the lineage of the queryables returned by an operator.
+
+    The returned queryable remembers the queryable it was created from, along with the name of
+    the operator and the arguments it was called with, so that the query can be inspected and
+    rebuilt.
+    """
+    @wraps(method)
+    def _record_lineage(self, *args, **kwargs):
+        queryable = method(self, *args, **kwargs)
+        if queryable is not self and queryable._lineage is None:
+            queryable._lineage = (self, method.__name__, args, kwargs)
+            queryable._streaming = self._streaming
+        return queryable
+    return _record_lineage
+
+
+def _distinct(iterable, key_selector, operator, bloom_filter=None):
+    """Yields the first element of 'iterable' with each key.
+
+    :param bloom_filter: (optional) The capacity and error rate of a Bloom filter to detect
+        duplicate keys with, instead of keeping every key.
+    """
+    if bloom_filter is not None:
+        seen = BloomFilter(*bloom_filter)
+        for element in iterable:
+            if not seen.add(key_selector(element)):
+                yield element
+        return
+    budget = current_budget()
+    if budget is not None:
+        for element in spilling_distinct(
+                ((key_selector(element), element) for element in iterable), budget, operator):
+            yield element
+        return
+    seen = {}
+    for element in iterable:
+        key = key_selector(element)
+        if key not in seen:
+            seen[key] = 1
+            yield element
+
+
+def _select_ranks(values, ranks):
+    """Finds the values at the given ranks of the sorted values, in expected linear time.
+
+    The values are partitioned around a pivot as in quickselect, and the partitions that contain
+    any of the ranks are partitioned again until they are small enough to sort.
+
+    :param values: The values to select from, as a list.
+    :param ranks: The zero-based ranks to select.
+    :return: A dict mapping each rank to its value.
+    :rtype: dict
+    """
+    selected = {}
+    partitions = [(values, 0, sorted(ranks))]
+    while partitions:
+        values, offset, ranks = partitions.pop()
+        if len(values) <= 32:
+            values = sorted(values)
+            for rank in ranks:
+                selected[rank] = values[rank - offset]
+            continue
+        pivot = sorted(random.sample(values, 3))[1]
+        lows = [value for value in values if value < pivot]
+        highs = [value for value in values if pivot < value]
+        low_ranks = [rank for rank in ranks if rank - offset < len(lows)]
+        high_offset = offset + len(values) - len(highs)
+        high_ranks = [rank for rank in ranks if rank >= high_offset]
+        for rank in ranks:
+            if offset + len(lows) <= rank < high_offset:
+                selected[rank] = pivot
+        if low_ranks:
+            partitions.append((lows, offset, low_ranks))
+        if high_ranks:
+            partitions.append((highs, high_offset, high_ranks))
+    return selected
+
+
+def _exact_quantiles(values, fractions):
+    """Returns the values at the given fractions of the sorted values, interpolating linearly
+    between the two nearest values if they support arithmetic, or taking the lower otherwise."""
+    if not values:
+        raise ValueError("The source sequence is empty.")
+    positions = [fraction * (len(values) - 1) for fraction in fractions]
+    ranks = set()
+    for position in positions:
+        ranks.add(int(math.floor(position)))
+        ranks.add(int(math.ceil(position)))
+    selected = _select_ranks(values, ranks)
+    results = []
+    for position in positions:
+        lower = selected[int(math.floor(position))]
+        weight = position - math.floor(position)
+        if weight:
+            try:
+                lower += (selected[int(math.ceil(position))] - lower) * weight
+            except TypeError:
+                pass
+        results.append(lower)
+    return results
+
+
+def _uniform(generator):
+    """Returns a random float in the open interval (0, 1)."""
+    while True:
+        value = generator.random()
+        if value:
+            return value
+
+
+def _reservoir_sample(iterable, k, generator):
+    """Selects 'k' elements of 'iterable' uniformly at random using Algorithm L.
+
+    After the reservoir is filled, the number of elements to skip before the next replacement
+    is drawn directly, so skipped elements are consumed without generating random numbers.
+    """
+    iterator = iter(iterable)
+    reservoir = list(islice(iterator, k))
+    if not k or len(reservoir) < k:
+        return reservoir
+    weight = math.exp(math.log(_uniform(generator)) / k)
+    while True:
+        skip = int(math.log(_uniform(generator)) / math.log1p(-weight))
+        for element in islice(iterator, skip, skip + 1):
+            reservoir[generator.randrange(k)] = element
+            break
+        else:
+            return reservoir
+        weight *= math.exp(math.log(_uniform(generator)) / k)
+
+
+def _check_fractions(fractions):
+    """Returns 'fractions' as a list, checking that each is between 0 and 1."""
+    if not isinstance(fractions, Iterable):
+        raise TypeError("Value for 'fractions' is not an Iterable.")
+    fractions = list(fractions)
+    for fraction in fractions:
+        if not isinstance(fraction, (int, float)):
+            raise TypeError("Values for 'fractions' must be numbers.")
+        if not 0 <= fraction <= 1:
+            raise ValueError("Values for 'fractions' must be between 0 and 1.")
+    return fractions
+
+
+def _check_window_aggregate(aggregate, transform):
+    """Checks the aggregate and transform of a windowing operator."""
+    if aggregate is not None and aggregate not in AGGREGATES:
+        raise ValueError("Value for 'aggregate' must be one of %s." % ", ".join(AGGREGATES))
+    if not callable(transform):
+        raise TypeError("Value for 'transform' is not callable.")
+
+
+def _key_set(iterable, key_selector, accounting):
+    """Builds a set of the keys of the elements of 'iterable', accounting for each key."""
+    keys = {}
+    for element in iterable:
+        key = key_selector(element)
+        if key not in keys:
+            keys[key] = 1
+            if accounting is not None:
+                accounting.add(key)
+    return keys
+
+
+def _key_groups(iterable, key_selector, accounting):
+    """Groups the elements of 'iterable' by key, accounting for each element."""
+    groups = defaultdict(list)
+    for element in iterable:
+        groups[key_selector(element)].append(element)
+        if accounting is not None:
+            accounting.add(element)
+    return groups
 
 
 class Queryable(object):
     """A wrapper for iterable objects to allow querying of the underlying data.
     """
 
-    def __init__(self, iterator):
+    def __init__(self, iterator, length=None):
         self.iterator = iterator
+        self._length = length
+        self._lineage = None
+        self._source = None
+        self._streaming = False
 
     def __iter__(self):
-        self.iterator, iterator = tee(self.iterator)
-        for element in iterator:
+        if self._streaming:
+            iterator = self.iterator
+        else:
+            self.iterator, iterator = tee(self.iterator)
+        for element in checked(iterator):
             yield element
 
+    def _length_hint(self):
+        """Returns the number of elements in the sequence if it is known without iterating it.
+
+        The value is a hint taken from the source of the sequence, which may have changed size
+        since the queryable was created.
+
+        :return: The expected number of elements, or None if it is unknown.
+        :rtype: int
+        """
+        return self._length
+
     def aggregate(self, accumulator, seed=None, result_transform=identity):
         """Applies an accumulator function over a sequence.
 
@@ -48,6 +258,47 @@ class Queryable(object):
             return result_transform(reduce(accumulator, self, seed))
         return result_transform(reduce(accumulator, self))
 
+    def aggregate_many(self, **accumulators):
+        """Computes several aggregates of the sequence in a single pass.
+
+        Each keyword argument names an :class:`Accumulator <pinq.accumulators.Accumulator>`,
+        such as those returned by :func:`sum_of <pinq.accumulators.sum_of>` or
+        :func:`variance_of <pinq.accumulators.variance_of>`. The accumulators are used as
+        templates, so the same ones can be reused across queries.
+
+        :param accumulators: The accumulators of the aggregates to compute, by name.
+        :return: The result of each accumulator, by name.
+        :rtype: dict
+        :raise TypeError: if an accumulator is not an :class:`Accumulator`
+        :raise ValueError: if no accumulators are given
+        """
+        if not accumulators:
+            raise ValueError("At least one accumulator must be given.")
+        for name, accumulator in accumulators.items():
+            if not isinstance(accumulator, Accumulator):
+                raise TypeError("Value for '%s' is not an Accumulator." % name)
+        accumulators = self._accumulate(accumulators)
+        return dict([(name, accumulator.result()) for name, accumulator in accumulators.items()])
+
+    def _accumulate(self, accumulators):
+        """Returns empty copies of the template accumulators, with every element added to them.
+
+        The elements are added in chunks, so that each accumulator aggregates a chunk at a time.
+
+        :param accumulators: The template accumulators, by name.
+        :type accumulators: dict
+        :rtype: dict
+        """
+        accumulators = dict([(name, accumulator.empty())
+                             for name, accumulator in accumulators.items()])
+        iterator = iter(self)
+        while True:
+            chunk = list(islice(iterator, CHUNK_SIZE))
+            if not chunk:
+                return accumulators
+            for accumulator in accumulators.values():
+                accumulator.update(chunk)
+
     def all(self, predicate):
         """Determines whether all elements of the sequence satisfy a condition.
 
@@ -98,6 +349,36 @@ class Queryable(object):
             value_sum += transform(element)
         return value_sum / count
 
+    def cached(self, cache, version=None):
+        """Caches the results of the terminal operators of the query.
+
+        Results are keyed by a fingerprint of the query, made of the identity of its source and
+        its operators and their arguments, so the same query built again over the same source
+        object returns the cached result instead of being evaluated. Functions passed to the
+        operators are fingerprinted by their code and captured values, so a lambda defined in
+        the same place matches. The globals used by those functions, and changes to the source
+        itself, are not detected: pass a 'version' that changes with the source, or invalidate
+        the source with :meth:`QueryCache.invalidate <pinq.cache.QueryCache.invalidate>`.
+
+        Usage::
+
+          >>> cache = pinq.QueryCache(maxsize=64, ttl=60)
+          >>> pinq.as_queryable(rows).where(lambda row: row[0] > 3).cached(cache).count()
+
+        :param cache: The cache to store the results in.
+        :type cache: :class:`QueryCache <pinq.cache.QueryCache>`
+        :param version: (optional) A hashable version of the source, or a function returning it
+            when each result is looked up.
+        :return: The query, with cached terminal operators.
+        :rtype: :class:`CachedQueryable <pinq.cache.CachedQueryable>`
+        :raise TypeError: if 'cache' is not a QueryCache
+        """
+        from .cache import CachedQueryable, QueryCache
+        if not isinstance(cache, QueryCache):
+            raise TypeError("Value for 'cache' is not a QueryCache.")
+        return CachedQueryable(self, cache, version)
+
+    @_operator
     def cast(self, to_type):
         """Casts the elements of the sequence to the specified type.
 
@@ -109,8 +390,9 @@ class Queryable(object):
         """
         if not isinstance(to_type, type):
             raise TypeError("Value for 'to_type' is not a type.")
-        return Queryable((to_type(element) for element in self))
+        return Queryable((to_type(element) for element in self), self._length_hint())
 
+    @_operator
     def concat(self, other):
         """Concatenates two sequences.
 
@@ -158,6 +440,42 @@ class Queryable(object):
                 count += 1
         return count
 
+    def count_distinct(self, key_selector=identity, approximate=False, precision=14):
+        """Returns the number of distinct keys in the sequence.
+
+        The exact count keeps every key in memory, subject to the active :class:`MemoryBudget
+        <pinq.memory.MemoryBudget>`. If 'approximate' is set, the count is estimated with a
+        :class:`HyperLogLog <pinq.sketches.HyperLogLog>` sketch of 2 ** 'precision' bytes, with a
+        relative standard error of about 1.04 / sqrt(2 ** 'precision').
+
+        :param key_selector: (optional) A function to select a key for comparing values.
+        :type key_selector: function
+        :param approximate: (optional) Whether to estimate the count with a HyperLogLog sketch.
+        :type approximate: bool
+        :param precision: (optional) The precision of the sketch, if 'approximate' is set.
+        :type precision: int
+        :return: The number of distinct keys.
+        :rtype: int
+        :raise TypeError: if 'key_selector' is not callable
+        :raise TypeError: if 'precision' is not an int
+        :raise ValueError: if 'precision' is not between 4 and 18
+        """
+        if not callable(key_selector):
+            raise TypeError("Value for 'key_selector' is not callable.")
+        if approximate:
+            sketch = HyperLogLog(precision)
+            sketch.update(key_selector(element) for element in self)
+            return len(sketch)
+        budget = current_budget()
+        if budget is not None:
+            count = 0
+            for _ in spilling_distinct(((key_selector(element), None) for element in self),
+                                       budget, 'count_distinct'):
+                count += 1
+            return count
+        return len(set(key_selector(element) for element in self))
+
+    @_operator
     def default_if_empty(self, default_value=None):
         """Returns the sequence or a sequence with a single default value if the sequence is empty.
 
@@ -165,10 +483,39 @@ class Queryable(object):
         :return:This sequence, or a sequence containing 'default_value' if it is empty.
         :rtype: :class:`Queryable`
         """
-        for _ in self:
-            return self
-        return Queryable([default_value])
+        def _default_if_empty(iterator):
+            empty = True
+            for element in iterator:
+                empty = False
+                yield element
+            if empty:
+                yield default_value
+        return Queryable(_default_if_empty(self))
+
+    def describe(self, transform=identity):
+        """Computes summary statistics of the sequence in a single pass.
 
+        The mean and variance are computed with a :class:`Variance
+        <pinq.accumulators.Variance>` accumulator, which stays accurate when the values are large
+        compared to their spread.
+
+        :param transform: (optional) A transform function to apply to each element.
+        :type transform: function
+        :return: The 'count', 'mean', sample 'variance', 'min' and 'max' of the transformed
+            elements. Each is None if there are too few elements to compute it.
+        :rtype: dict
+        :raise TypeError: if 'transform' is not callable
+        """
+        if not callable(transform):
+            raise TypeError("Value for 'transform' is not callable.")
+        accumulators = self._accumulate(dict(
+            variance=Variance(transform), min=Min(transform), max=Max(transform)))
+        variance = accumulators['variance']
+        return dict(count=variance.count, mean=variance.mean if variance.count else None,
+                    variance=variance.result(), min=accumulators['min'].result(),
+                    max=accumulators['max'].result())
+
+    @_operator
     def difference(self, other, key_selector=identity):
         """Returns the set difference of the two sequences.
 
@@ -183,26 +530,39 @@ class Queryable(object):
         """
         return self.except_values(other, key_selector)
 
-    def distinct(self, key_selector=identity):
+    @_operator
+    def distinct(self, key_selector=identity, approximate=False, capacity=1 << 20,
+                 error_rate=0.01):
         """Returns distinct elements fromt the sequence.
 
+        By default, the key of every distinct element is kept in memory. Under a
+        :class:`MemoryBudget <pinq.memory.MemoryBudget>` that allows spilling, keys are spilled
+        to hash partitions on disk once the budget is exceeded, and elements after that point
+        are no longer yielded in their original order. If 'approximate' is set, seen keys are
+        kept in a :class:`BloomFilter <pinq.sketches.BloomFilter>` instead, which uses a fixed
+        amount of memory but drops a distinct element with probability of about 'error_rate'.
+
         :param key_selector: (optional) An function to select a key for comparing values.
         :type key_selector: function
+        :param approximate: (optional) Whether to detect duplicates with a Bloom filter.
+        :type approximate: bool
+        :param capacity: (optional) The expected number of distinct keys, if 'approximate' is set.
+        :type capacity: int
+        :param error_rate: (optional) The rate of dropped elements, if 'approximate' is set.
+        :type error_rate: float
         :return: A sequence of distinct elements from this sequence.
         :rtype: :class:`Queryable`
         :raise TypeError: if 'key_selector' is not callable
+        :raise TypeError: if 'capacity' is not an int
+        :raise ValueError: if 'capacity' is not positive or 'error_rate' is not between 0 and 1
         """
         if not callable(key_selector):
             raise TypeError("Value for 'key_selector' is not callable.")
-        seen = {}
-
-        def _distinct(value):
-            key = key_selector(value)
-            if key in seen:
-                return False
-            seen[key] = 1
-            return True
-        return Queryable((element for element in self if _distinct(element)))
+        bloom_filter = None
+        if approximate:
+            bloom_filter = (capacity, error_rate)
+            BloomFilter.validate(capacity, error_rate)
+        return Queryable(_distinct(self, key_selector, 'distinct', bloom_filter))
 
     def element_at(self, index):
         """Returns the element at the specified location in the sequence.
@@ -238,6 +598,7 @@ class Queryable(object):
         except IndexError:
             return default_value
 
+    @_operator
     def except_values(self, other, key_selector=identity):
         """Returns the set difference of the two sequences.
 
@@ -255,17 +616,40 @@ class Queryable(object):
         if not callable(key_selector):
             raise TypeError("Value for 'key_selector' is not callable.")
 
-        @lru_cache(1, False)
-        def _seen():
-            return dict([(key_selector(element), 1) for element in other])
-
-        def _removed(value):
-            seen = _seen()
-            key = key_selector(value)
-            if key in seen:
-                return True
-            return False
-        return Queryable((element for element in self if not _removed(element)))
+        def _except_values(iterator):
+            accounting = reserve('except_values')
+            try:
+                seen = _key_set(other, key_selector, accounting)
+                for element in iterator:
+                    if key_selector(element) not in seen:
+                        yield element
+            finally:
+                if accounting is not None:
+                    accounting.release()
+        return Queryable(_except_values(self))
+
+    def explain(self, analyze=False, terminal=None):
+        """Describes the operators of the query and how each of them is executed.
+
+        The plan lists every operator from the last to the source, with the functions passed to
+        it, the estimated number of elements it produces, whether its output is ordered, and the
+        strategy it uses, given its arguments and the active :class:`MemoryBudget
+        <pinq.memory.MemoryBudget>`. If 'analyze' is set, the query is executed as by
+        :meth:`profile` and the actual number of elements produced by each operator is included.
+
+        :param analyze: (optional) Whether to execute the query and report actual element counts.
+        :type analyze: bool
+        :param terminal: (optional) A function that consumes a queryable, by default
+            :meth:`to_list`.
+        :type terminal: function
+        :return: The plan of the query, which can be printed.
+        :rtype: :class:`QueryPlan <pinq.profiling.QueryPlan>`
+        :raise TypeError: if 'terminal' is not callable
+        """
+        if terminal is not None and not callable(terminal):
+            raise TypeError("Value for 'terminal' is not callable.")
+        from .profiling import explain
+        return explain(self, analyze, terminal or Queryable.to_list)
 
     def first(self, predicate=true):
         """Returns the first element in the sequence.
@@ -306,6 +690,43 @@ class Queryable(object):
                 return element
         return default_value
 
+    def fork(self, *query_builders):
+        """Evaluates several queries over a single pass of the sequence.
+
+        Each query builder is called with a queryable of the elements of the sequence, and
+        returns the result of its query, such as a count or a list; a returned
+        :class:`Queryable` is evaluated into a list. The queries run in separate threads, and
+        the elements are sent to them in small chunks through bounded queues, so the sequence
+        is read once and only a few chunks are buffered, however unevenly the queries progress.
+        A query that finishes early, such as one ending in :meth:`first`, stops receiving
+        elements, and the sequence is no longer read once every query has finished.
+
+        The queries run with the memory budget and cancellation token of the calling thread.
+        Unless the sequence is streamed with :meth:`stream`, it still keeps its elements so
+        that it can be iterated again.
+
+        :param query_builders: The functions that build and evaluate each query.
+        :return: The result of each query, in the order of 'query_builders'.
+        :rtype: tuple
+        :raise TypeError: if a query builder is not callable
+        :raise ValueError: if no query builders are given
+        """
+        if not query_builders:
+            raise ValueError("At least one query builder must be given.")
+        for query_builder in query_builders:
+            if not callable(query_builder):
+                raise TypeError("Values for 'query_builders' must be callable.")
+
+        def _evaluate(query_builder):
+            def _evaluate_query(elements):
+                result = query_builder(Queryable(elements).stream())
+                if isinstance(result, Queryable):
+                    result = result.to_list()
+                return result
+            return _evaluate_query
+        return multicast(self, [_evaluate(query_builder) for query_builder in query_builders])
+
+    @_operator
     def group_by(self, key_selector, value_transform=identity, result_transform=identity):
         """Groups the elements of the sequence according to the specified key selector function.
 
@@ -327,15 +748,21 @@ class Queryable(object):
             raise TypeError("Value for 'value_transform' is not callable.")
         if not callable(result_transform):
             raise TypeError("Value for 'result_transform' is not callable.")
+
+        def _group_by(iterator):
+            budget = current_budget()
+            if budget is None:
+                elements = sorted(iterator, key=key_selector)
+            else:
+                elements = spilling_sorted(iterator, [(key_selector, False)], budget, 'group_by')
+            for key, group in groupby(elements, key=key_selector):
+                yield key, [value_transform(element) for element in group]
         if result_transform.__code__.co_argcount == 1:
-            return Queryable((result_transform(
-                (key, [value_transform(element) for element in group])) for key, group in groupby(
-                    sorted(self, key=key_selector), key=key_selector)))
+            return Queryable((result_transform(group) for group in _group_by(self)))
         else:
-            return Queryable(
-                (result_transform(key, [value_transform(element) for element in group])
-                 for key, group in groupby(sorted(self, key=key_selector), key=key_selector)))
+            return Queryable((result_transform(*group) for group in _group_by(self)))
 
+    @_operator
     def group_join(self, other, key_selector, other_key_selector, result_transform):
         """Correlates the elements of the two sequences and groups the results.
 
@@ -363,51 +790,83 @@ class Queryable(object):
         if not callable(result_transform):
             raise TypeError("Value for 'result_transform' is not callable.")
 
-        @lru_cache(1, False)
-        def _other_groups():
-            groups = defaultdict(list)
-            for element in other:
-                key = other_key_selector(element)
-                groups[key].append(element)
-            return groups
+        def _group_join(iterator):
+            accounting = reserve('group_join')
+            try:
+                groups = _key_groups(other, other_key_selector, accounting)
+                for element in iterator:
+                    yield element, groups[key_selector(element)]
+            finally:
+                if accounting is not None:
+                    accounting.release()
         if result_transform.__code__.co_argcount == 1:
-            return Queryable((result_transform((
-                element, _other_groups()[key_selector(element)])) for element in self))
+            return Queryable((result_transform(pair) for pair in _group_join(self)))
         else:
-            return Queryable((result_transform(
-                element, _other_groups()[key_selector(element)]) for element in self))
+            return Queryable((result_transform(*pair) for pair in _group_join(self)))
 
-    def intersect(self, other, key_selector=identity):
+    @_operator
+    def intersect(self, other, key_selector=identity, approximate=False, capacity=1 << 20,
+                  error_rate=0.01):
         """Returns the set intersection of the two sequences.
 
+        The keys of 'other' are kept in memory. Under a :class:`MemoryBudget
+        <pinq.memory.MemoryBudget>` that allows spilling, the keys of both sequences are spilled
+        to hash partitions on disk once the budget is exceeded, and the elements are then no
+        longer yielded in their original order. If 'approximate' is set, the keys of 'other' and
+        the keys already yielded are kept in Bloom filters instead, so that an element may
+        wrongly be included or dropped with probability of about 'error_rate'.
+
         :param other: A sequence to compute the intersection with.
         :type other: Iterable
         :param key_selector: (optional) A function to extract a key for each element for comparison.
         :type key_selector: function
+        :param approximate: (optional) Whether to compare keys with Bloom filters.
+        :type approximate: bool
+        :param capacity: (optional) The expected number of distinct keys, if 'approximate' is set.
+        :type capacity: int
+        :param error_rate: (optional) The rate of wrong elements, if 'approximate' is set.
+        :type error_rate: float
         :return: A sequence of distinct elements that are in both of the provided seequences.
         :rtype: :class:`Queryable`
         :raise TypeError: if 'other' is not an Iterable
         :raise TypeError: if 'key_selector' is not callable
+        :raise TypeError: if 'capacity' is not an int
+        :raise ValueError: if 'capacity' is not positive or 'error_rate' is not between 0 and 1
         """
         if not isinstance(other, Iterable):
             raise TypeError("Value for 'other' is not an Iterable.")
         if not callable(key_selector):
             raise TypeError("Value for 'key_selector' is not callable.")
+        if approximate:
+            BloomFilter.validate(capacity, error_rate)
+
+        def _intersect(iterator):
+            if approximate:
+                other_keys = BloomFilter(capacity, error_rate)
+                for element in other:
+                    other_keys.add(key_selector(element))
+                seen = BloomFilter(capacity, error_rate)
+                for element in iterator:
+                    key = key_selector(element)
+                    if key in other_keys and not seen.add(key):
+                        yield element
+                return
+            budget = current_budget()
+            if budget is not None:
+                for element in spilling_intersect(
+                        ((key_selector(element), element) for element in iterator),
+                        (key_selector(element) for element in other), budget, 'intersect'):
+                    yield element
+                return
+            other_keys = dict([(key_selector(element), 1) for element in other])
+            for element in iterator:
+                key = key_selector(element)
+                if other_keys.get(key):
+                    other_keys[key] = 0
+                    yield element
+        return Queryable(_intersect(self))
 
-        @lru_cache(1, False)
-        def _other_set():
-            return dict([(key_selector(element), 1) for element in other])
-
-        seen = {}
-
-        def _intersects(element):
-            key = key_selector(element)
-            if key in _other_set() and not key in seen:
-                seen[key] = 1
-                return True
-            return False
-        return Queryable((element for element in self if _intersects(element)))
-
+    @_operator
     def join(self, other, key_selector, other_key_selector, result_transform):
         """Correlates the elements of the two sequences.
 
@@ -435,21 +894,20 @@ class Queryable(object):
         if not callable(result_transform):
             raise TypeError("Value for 'result_transform' is not callable.")
 
-        @lru_cache(1, False)
-        def _other_groups():
-            groups = defaultdict(list)
-            for element in other:
-                key = other_key_selector(element)
-                groups[key].append(element)
-            return groups
+        def _join(iterator):
+            accounting = reserve('join')
+            try:
+                groups = _key_groups(other, other_key_selector, accounting)
+                for element in iterator:
+                    for other_element in groups.get(key_selector(element), ()):
+                        yield element, other_element
+            finally:
+                if accounting is not None:
+                    accounting.release()
         if result_transform.__code__.co_argcount == 1:
-            return Queryable((result_transform(element) for element in chain.from_iterable(
-                ([(element, other_element) for other_element in _other_groups()[
-                    key_selector(element)]] for element in self))))
+            return Queryable((result_transform(pair) for pair in _join(self)))
         else:
-            return Queryable((result_transform(*element) for element in chain.from_iterable(
-                ([(element, other_element) for other_element in _other_groups()[
-                    key_selector(element)]] for element in self))))
+            return Queryable((result_transform(*pair) for pair in _join(self)))
 
     def last(self, predicate=true):
         """Returns the last item of the sequence.
@@ -528,6 +986,26 @@ class Queryable(object):
             raise TypeError("Value for 'transform' is not callable.")
         return max((transform(element) for element in self))
 
+    def median(self, transform=identity, approximate=False, k=200):
+        """Returns the median of the elements in the sequence.
+
+        The exact median of an even number of elements is the mean of the two middle elements.
+        See :meth:`quantiles` for the exact and approximate modes.
+
+        :param transform: (optional) A transformation function to apply to each element.
+        :type transform: function
+        :param approximate: (optional) Whether to estimate the median with a KLL sketch.
+        :type approximate: bool
+        :param k: (optional) The accuracy of the sketch, if 'approximate' is set.
+        :type k: int
+        :return: The median of the elements in the sequence.
+        :raise TypeError: if 'transform' is not callable
+        :raise TypeError: if 'k' is not an int
+        :raise ValueError: if 'k' is less than 8
+        :raise ValueError: if the sequence is empty
+        """
+        return self.quantiles([0.5], transform, approximate, k)[0]
+
     def min(self, transform=identity):
         """Returns the minimum element in the sequence.
 
@@ -541,6 +1019,7 @@ class Queryable(object):
             raise TypeError("Value for 'transform' is not callable.")
         return min((transform(element) for element in self))
 
+    @_operator
     def of_type(self, of_type):
         """Filters the elements based on the specified type.
 
@@ -554,6 +1033,7 @@ class Queryable(object):
             raise TypeError("Value for 'of_type' is not a type.")
         return Queryable((element for element in self if isinstance(element, of_type)))
 
+    @_operator
     def order_by(self, key_selector):
         """Sorts the elements of the sequence in ascending order according to a key.
 
@@ -567,6 +1047,7 @@ class Queryable(object):
             raise TypeError("Value for 'key_selector' is not callable.")
         return OrderedQueryable(self, [(key_selector, False)])
 
+    @_operator
     def order_by_descending(self, key_selector):
         """Sorts the elements of the sequence in descending order according to a key.
 
@@ -580,6 +1061,132 @@ class Queryable(object):
             raise TypeError("Value for 'key_selector' is not callable.")
         return OrderedQueryable(self, [(key_selector, True)])
 
+    def percentile(self, percent, transform=identity, approximate=False, k=200):
+        """Returns the element below which the given percent of the elements in the sequence fall.
+
+        See :meth:`quantiles` for the exact and approximate modes.
+
+        :param percent: The percent of elements, between 0 and 100.
+        :type percent: float
+        :param transform: (optional) A transformation function to apply to each element.
+        :type transform: function
+        :param approximate: (optional) Whether to estimate the percentile with a KLL sketch.
+        :type approximate: bool
+        :param k: (optional) The accuracy of the sketch, if 'approximate' is set.
+        :type k: int
+        :return: The percentile of the elements in the sequence.
+        :raise TypeError: if 'percent' is not a number
+        :raise TypeError: if 'transform' is not callable
+        :raise TypeError: if 'k' is not an int
+        :raise ValueError: if 'percent' is not between 0 and 100
+        :raise ValueError: if 'k' is less than 8
+        :raise ValueError: if the sequence is empty
+        """
+        if not isinstance(percent, (int, float)):
+            raise TypeError("Value for 'percent' is not a number.")
+        if not 0 <= percent <= 100:
+            raise ValueError("Value for 'percent' must be between 0 and 100.")
+        return self.quantiles([percent / 100.0], transform, approximate, k)[0]
+
+    def persist(self, path, typecode=None, fingerprint=None, chunk_size=4096, atomic=True):
+        """Writes the elements of the sequence to a compact binary file.
+
+        Elements are stored in pickled chunks, or as fixed-width values if 'typecode' is given.
+        The result can be streamed back with :func:`pinq.load`.
+
+        :param path: The path of the file to write.
+        :type path: str
+        :param typecode: (optional) The :mod:`array` type code to store the elements as.
+        :type typecode: str
+        :param fingerprint: (optional) A string identifying the inputs of the query.
+        :type fingerprint: str
+        :param chunk_size: (optional) The number of elements in each chunk.
+        :type chunk_size: int
+        :param atomic: (optional) Whether to write a temporary file and rename it to 'path'.
+        :type atomic: bool
+        :return: The number of elements written.
+        :rtype: int
+        :raise TypeError: if 'chunk_size' is not an int
+        :raise ValueError: if 'chunk_size' is less than one
+        """
+        if not isinstance(chunk_size, int):
+            raise TypeError("Value for 'chunk_size' is not an integer.")
+        if chunk_size < 1:
+            raise ValueError("Value for 'chunk_size' must be positive.")
+        return write_persisted(self, path, typecode, fingerprint, chunk_size, atomic=atomic)
+
+    def profile(self, terminal=None):
+        """Executes the query with instrumentation and reports statistics for each operator.
+
+        The query is rebuilt from its operators with every function argument wrapped in a timer,
+        and the rebuilt query is consumed by 'terminal'. For each operator, the report records
+        the number of elements in and out, the time spent in the operator, the part of that time
+        spent in the functions passed to it, and the number of elements it buffered.
+
+        :param terminal: (optional) A function that consumes a queryable, by default
+            :meth:`to_list`.
+        :type terminal: function
+        :return: The statistics of the query, with the result of 'terminal' as its result.
+        :rtype: :class:`QueryProfile <pinq.profiling.QueryProfile>`
+        :raise TypeError: if 'terminal' is not callable
+        """
+        if terminal is None:
+            terminal = Queryable.to_list
+        if not callable(terminal):
+            raise TypeError("Value for 'terminal' is not callable.")
+        from .profiling import profile
+        return profile(self, terminal)
+
+    def quantiles(self, fractions, transform=identity, approximate=False, k=200):
+        """Returns the elements at the given fractions of the sorted sequence.
+
+        The exact quantiles are found by repeatedly partitioning the elements in memory, in
+        expected linear time rather than by sorting them, and are interpolated linearly between
+        the two nearest elements if they support arithmetic, or are the lower of the two
+        otherwise. The elements are buffered subject to the active
+        :class:`MemoryBudget <pinq.memory.MemoryBudget>`. If 'approximate' is set, the quantiles
+        are estimated with a :class:`KLLSketch <pinq.sketches.KLLSketch>` instead, which holds
+        O(k log(n / k)) elements and returns elements of the sequence whose rank is off by about
+        1.7 / 'k' of its length.
+
+        :param fractions: The fractions, between 0 and 1, of the sorted sequence.
+        :type fractions: Iterable
+        :param transform: (optional) A transformation function to apply to each element.
+        :type transform: function
+        :param approximate: (optional) Whether to estimate the quantiles with a KLL sketch.
+        :type approximate: bool
+        :param k: (optional) The accuracy of the sketch, if 'approximate' is set.
+        :type k: int
+        :return: The element at each fraction.
+        :rtype: list
+        :raise TypeError: if 'fractions' is not an Iterable of numbers
+        :raise TypeError: if 'transform' is not callable
+        :raise TypeError: if 'k' is not an int
+        :raise ValueError: if any of 'fractions' is not between 0 and 1
+        :raise ValueError: if 'k' is less than 8
+        :raise ValueError: if the sequence is empty
+        """
+        fractions = _check_fractions(fractions)
+        if not callable(transform):
+            raise TypeError("Value for 'transform' is not callable.")
+        if approximate:
+            sketch = KLLSketch(k)
+            sketch.update(transform(element) for element in self)
+            return sketch.quantiles(fractions)
+        values = []
+        accounting = reserve('quantiles')
+        try:
+            for element in self:
+                value = transform(element)
+                values.append(value)
+                if accounting is not None:
+                    accounting.add(value)
+            return _exact_quantiles(values, fractions)
+        finally:
+            if accounting is not None:
+                accounting.release()
+
+    @_operator
     def reverse(self):
         """Reverses the order of the elements in the sequence.
 
@@ -587,13 +1194,287 @@ class Queryable(object):
         :rtype: :class:`Queryable`
         """
         def _reverse(iterator):
+            budget = current_budget()
+            if budget is not None:
+                for element in spilling_reversed(iterator, budget):
+                    yield element
+                return
             elements = []
             for element in iterator:
                 elements.append(element)
             while len(elements) > 0:
                 yield elements.pop()
-        return Queryable(_reverse(self))
+        return Queryable(_reverse(self), self._length_hint())
 
+    @_operator
+    def running_average(self, transform=identity, alpha=None):
+        """Returns the running average of the sequence after each element.
+
+        Without 'alpha', each result is the mean of the transformed elements so far. Otherwise,
+        each result is the exponentially weighted moving average, which moves towards each new
+        value by 'alpha' times its difference from the previous average.
+
+        :param transform: (optional) A transform function to apply to each element.
+        :type transform: function
+        :param alpha: (optional) The smoothing factor, between 0 (exclusive) and 1.
+        :type alpha: float
+        :return: The running average after each element.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'transform' is not callable
+        :raise TypeError: if 'alpha' is not a number
+        :raise ValueError: if 'alpha' is not between 0 (exclusive) and 1
+        """
+        if not callable(transform):
+            raise TypeError("Value for 'transform' is not callable.")
+        if alpha is not None:
+            if not isinstance(alpha, (int, float)):
+                raise TypeError("Value for 'alpha' is not a number.")
+            if not 0 < alpha <= 1:
+                raise ValueError("Value for 'alpha' must be between 0 (exclusive) and 1.")
+
+        def _running_average(iterator):
+            if alpha is not None:
+                average = None
+                for element in iterator:
+                    value = transform(element)
+                    if average is None:
+                        average = float(value)
+                    else:
+                        average += alpha * (value - average)
+                    yield average
+                return
+            total = 0
+            for count, element in enumerate(iterator, 1):
+                total += transform(element)
+                yield total / count
+        return Queryable(_running_average(self), self._length_hint())
+
+    @_operator
+    def running_count(self, predicate=true):
+        """Returns the number of elements that satisfy a condition after each element.
+
+        :param predicate: (optional) A function to test each element for a condition.
+        :type predicate: function
+        :return: The running count after each element.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'predicate' is not callable
+        """
+        if not callable(predicate):
+            raise TypeError("Value for 'predicate' is not callable.")
+        if predicate is true:
+            return Queryable((count for count, _ in enumerate(self, 1)), self._length_hint())
+        return Queryable(accumulate((1 if predicate(element) else 0 for element in self)),
+                         self._length_hint())
+
+    @_operator
+    def running_max(self, transform=identity):
+        """Returns the maximum of the sequence after each element.
+
+        :param transform: (optional) A transform function to apply to each element.
+        :type transform: function
+        :return: The running maximum after each element.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'transform' is not callable
+        """
+        if not callable(transform):
+            raise TypeError("Value for 'transform' is not callable.")
+        if transform is identity:
+            return Queryable(accumulate(self, max), self._length_hint())
+        return Queryable(accumulate((transform(element) for element in self), max),
+                         self._length_hint())
+
+    @_operator
+    def running_min(self, transform=identity):
+        """Returns the minimum of the sequence after each element.
+
+        :param transform: (optional) A transform function to apply to each element.
+        :type transform: function
+        :return: The running minimum after each element.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'transform' is not callable
+        """
+        if not callable(transform):
+            raise TypeError("Value for 'transform' is not callable.")
+        if transform is identity:
+            return Queryable(accumulate(self, min), self._length_hint())
+        return Queryable(accumulate((transform(element) for element in self), min),
+                         self._length_hint())
+
+    @_operator
+    def running_sum(self, transform=identity):
+        """Returns the sum of the sequence after each element.
+
+        :param transform: (optional) A transform function to apply to each element.
+        :type transform: function
+        :return: The running sum after each element.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'transform' is not callable
+        """
+        if not callable(transform):
+            raise TypeError("Value for 'transform' is not callable.")
+        if transform is identity:
+            return Queryable(accumulate(self), self._length_hint())
+        return Queryable(accumulate((transform(element) for element in self)),
+                         self._length_hint())
+
+    @_operator
+    def sample(self, k, seed=None):
+        """Returns a uniform random sample of elements from the sequence.
+
+        The sample is drawn by reservoir sampling with Algorithm L, which holds only 'k'
+        elements and skips over the elements that are not sampled without drawing random numbers
+        for each of them. The sampled elements are not in their original order.
+
+        :param k: The number of elements to sample.
+        :type k: int
+        :param seed: (optional) The seed of the random number generator, to make the sample
+            repeatable.
+        :return: 'k' elements of the sequence, or every element if there are fewer than 'k'.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'k' is not an int
+        :raise ValueError: if 'k' is negative
+        """
+        if not isinstance(k, int):
+            raise TypeError("Value for 'k' is not an integer.")
+        if k < 0:
+            raise ValueError("Value for 'k' must not be negative.")
+
+        def _sample(iterator):
+            for element in _reservoir_sample(iterator, k, random.Random(seed)):
+                yield element
+        length = self._length_hint()
+        if length is not None:
+            length = min(length, k)
+        return Queryable(_sample(self), length)
+
+    @_operator
+    def sample_by(self, key_selector, k_per_key, seed=None):
+        """Returns a stratified random sample of elements from the sequence.
+
+        A uniform sample of up to 'k_per_key' elements is kept for each distinct key by
+        reservoir sampling with Algorithm L, subject to the active :class:`MemoryBudget
+        <pinq.memory.MemoryBudget>`. The samples are returned in the order their keys first
+        appear, and the elements within each sample are not in their original order.
+
+        :param key_selector: A function to select the key of each element.
+        :type key_selector: function
+        :param k_per_key: The number of elements to sample for each key.
+        :type k_per_key: int
+        :param seed: (optional) The seed of the random number generator, to make the sample
+            repeatable.
+        :return: The sampled elements of each key.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'key_selector' is not callable
+        :raise TypeError: if 'k_per_key' is not an int
+        :raise ValueError: if 'k_per_key' is negative
+        """
+        if not callable(key_selector):
+            raise TypeError("Value for 'key_selector' is not callable.")
+        if not isinstance(k_per_key, int):
+            raise TypeError("Value for 'k_per_key' is not an integer.")
+        if k_per_key < 0:
+            raise ValueError("Value for 'k_per_key' must not be negative.")
+
+        def _sample_by(iterator):
+            generator = random.Random(seed)
+            strata = {}
+            keys = []
+            accounting = reserve('sample_by')
+            try:
+                for element in iterator:
+                    key = key_selector(element)
+                    stratum = strata.get(key)
+                    if stratum is None:
+                        stratum = strata[key] = [[], 0, 0, 1.0]
+                        keys.append(key)
+                    stratum[1] += 1
+                    count = stratum[1]
+                    if count <= k_per_key:
+                        stratum[0].append(element)
+                        if accounting is not None:
+                            accounting.add(element)
+                        if count < k_per_key:
+                            continue
+                    elif count != stratum[2]:
+                        continue
+                    else:
+                        stratum[0][generator.randrange(k_per_key)] = element
+                    stratum[3] *= math.exp(math.log(_uniform(generator)) / k_per_key)
+                    stratum[2] = count + 1 + int(
+                        math.log(_uniform(generator)) / math.log1p(-stratum[3]))
+                for key in keys:
+                    for element in strata[key][0]:
+                        yield element
+            finally:
+                if accounting is not None:
+                    accounting.release()
+        return Queryable(_sample_by(self))
+
+    @_operator
+    def sample_fraction(self, p, seed=None):
+        """Returns each element of the sequence independently with probability 'p'.
+
+        Elements are streamed in their original order. The gaps between sampled elements are
+        drawn from a geometric distribution, so skipped elements are consumed without drawing
+        random numbers for each of them.
+
+        :param p: The probability of sampling each element, between 0 and 1.
+        :type p: float
+        :param seed: (optional) The seed of the random number generator, to make the sample
+            repeatable.
+        :return: The sampled elements.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'p' is not a number
+        :raise ValueError: if 'p' is not between 0 and 1
+        """
+        if not isinstance(p, (int, float)):
+            raise TypeError("Value for 'p' is not a number.")
+        if not 0 <= p <= 1:
+            raise ValueError("Value for 'p' must be between 0 and 1.")
+
+        def _sample_fraction(iterator):
+            if p == 1:
+                for element in iterator:
+                    yield element
+                return
+            if p == 0:
+                return
+            generator = random.Random(seed)
+            log_q = math.log1p(-p)
+            while True:
+                skip = int(math.log(_uniform(generator)) / log_q)
+                for element in islice(iterator, skip, skip + 1):
+                    yield element
+                    break
+                else:
+                    return
+        return Queryable(_sample_fraction(iter(self)))
+
+    @_operator
+    def scan(self, accumulator, seed=None):
+        """Applies an accumulator function over a sequence, returning each intermediate value.
+
+        This is the running form of :meth:`aggregate`: the accumulated value is returned after
+        each element, and only the current value is held. As with :meth:`aggregate`, the first
+        element is the initial value if no 'seed' is given; the seed itself is not returned.
+        The values are computed once, as the result is first iterated, and iterating the result
+        again replays them, so 'accumulator' is called once for each element.
+
+        :param accumulator: The accumulator function to apply.
+        :type accumulator: function
+        :param seed: (optional) The initial accumulator value.
+        :return: The accumulated value after each element.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'accumulator' is not callable
+        """
+        if not callable(accumulator):
+            raise TypeError("Value for 'accumulator' is not callable.")
+        if seed is not None:
+            return Queryable(islice(accumulate(chain((seed,), self), accumulator), 1, None),
+                             self._length_hint())
+        return Queryable(accumulate(self, accumulator), self._length_hint())
+
+    @_operator
     def select(self, selector):
         """Returns the elements of the sequence after applying a transform function to each element.
 
@@ -606,10 +1487,12 @@ class Queryable(object):
         if not callable(selector):
             raise TypeError("Value for 'selector' is not callable.")
         if selector.__code__.co_argcount == 1:
-            return Queryable((selector(element) for element in self))
+            return Queryable((selector(element) for element in self), self._length_hint())
         else:
-            return Queryable((selector(element, index) for index, element in enumerate(self)))
+            return Queryable((selector(element, index) for index, element in enumerate(self)),
+                             self._length_hint())
 
+    @_operator
     def select_many(self, selector, result_transform=select_i(1)):
         """Projects each element to a sequence and flattens the resulting sequences.
 
@@ -719,6 +1602,7 @@ class Queryable(object):
             return single_item
         return default_value
 
+    @_operator
     def skip(self, num):
         """Skips a specified number of elements in the sequence and returns the remaining elements.
 
@@ -730,8 +1614,12 @@ class Queryable(object):
         """
         if not isinstance(num, int):
             raise TypeError("Value for 'num' is not an integer.")
-        return Queryable(islice(self, num, None))
+        length = self._length_hint()
+        if length is not None:
+            length = max(length - max(num, 0), 0)
+        return Queryable(islice(self, num, None), length)
 
+    @_operator
     def skip_while(self, predicate):
         """Skip elements of the sequence while the specified condition is true.
 
@@ -745,6 +1633,27 @@ class Queryable(object):
             raise TypeError("Value for 'predicate' is not callable.")
         return Queryable(dropwhile(predicate, self))
 
+    def stream(self):
+        """Returns a single pass copy of the sequence, which releases elements once they are
+        consumed.
+
+        By default, a queryable keeps the elements of its underlying iterator as they are
+        consumed, so that it can be iterated again, which holds every element of an unbounded
+        iterator. The returned sequence, and every sequence derived from it, consume their input
+        as they are iterated, and continue where they left off if iterated again. This sequence
+        is not changed, but it shares its input with the returned sequence, so it should not be
+        iterated once the returned sequence has been.
+
+        :return: A single pass copy of this sequence.
+        :rtype: :class:`Queryable`
+        """
+        streamed = copy(self)
+        if isinstance(self, OrderedQueryable):
+            streamed._keys = list(self._keys)
+        streamed._lineage = (self, 'stream', (), {})
+        streamed._streaming = True
+        return streamed
+
     def sum(self, transform=identity):
         """Computes the sum of the sequence by invoking a transform on each element.
 
@@ -758,6 +1667,7 @@ class Queryable(object):
             raise TypeError("Value for 'transform' is not callable.")
         return sum((transform(element) for element in self))
 
+    @_operator
     def take(self, num):
         """Takes the specified number of elements from the start of the sequence.
 
@@ -769,8 +1679,12 @@ class Queryable(object):
         """
         if not isinstance(num, int):
             raise TypeError("Value for 'num' is not an integer.")
-        return Queryable(islice(self, num))
+        length = self._length_hint()
+        if length is not None:
+            length = min(length, max(num, 0))
+        return Queryable(islice(self, num), length)
 
+    @_operator
     def take_while(self, predicate):
         """Takes elements from the start of the sequence while the specified condition holds.
 
@@ -784,6 +1698,61 @@ class Queryable(object):
             raise TypeError("Value for 'predicate' is not callable.")
         return Queryable(takewhile(predicate, self))
 
+    def to_array(self, typecode):
+        """Creates a compact array of the elements in the sequence.
+
+        The array is filled incrementally, without building an intermediate list.
+
+        :param typecode: The :mod:`array` type code of the elements.
+        :type typecode: str
+        :return: An array of the elements in the sequence.
+        :rtype: :class:`array.array`
+        :raise TypeError: if 'typecode' is not a str
+        :raise ValueError: if 'typecode' is not a valid type code
+        """
+        if not isinstance(typecode, str):
+            raise TypeError("Value for 'typecode' is not a string.")
+        result = array(typecode)
+        result.extend(self)
+        return result
+
+    def to_csv(self, path, row_transform=identity, header=None, dialect='excel', encoding='utf-8',
+               compression=None, buffer_size=DEFAULT_BUFFER_SIZE, atomic=False):
+        """Streams the elements of the sequence into a CSV file.
+
+        :param path: The path of the file to write.
+        :type path: str
+        :param row_transform: (optional) A function to create a sequence of fields from each
+            element.
+        :type row_transform: function
+        :param header: (optional) A sequence of field names to write before the elements.
+        :type header: Iterable
+        :param dialect: (optional) The :mod:`csv` dialect to write.
+        :param encoding: (optional) The text encoding of the file.
+        :type encoding: str
+        :param compression: (optional) One of 'gzip', 'bz2' or 'xz'.
+        :type compression: str
+        :param buffer_size: (optional) The size of the write buffer in bytes.
+        :type buffer_size: int
+        :param atomic: (optional) Whether to write a temporary file and rename it to 'path'.
+        :type atomic: bool
+        :return: The number of elements written.
+        :rtype: int
+        :raise TypeError: if 'row_transform' is not callable
+        :raise ValueError: if 'compression' is not supported
+        """
+        if not callable(row_transform):
+            raise TypeError("Value for 'row_transform' is not callable.")
+        count = 0
+        with open_sink(path, encoding, compression, buffer_size, atomic, newline='') as sink:
+            writer = csv.writer(sink, dialect)
+            if header is not None:
+                writer.writerow(header)
+            for element in self:
+                writer.writerow(row_transform(element))
+                count += 1
+        return count
+
     def to_dict(self, key_selector, value_selector=identity):
         """Creates a dictionary object according to the specified key selector function.
 
@@ -818,6 +1787,67 @@ class Queryable(object):
                 "Value for 'value_selector' is not callable.")
         return dict(((key_selector(element), value_selector(element)) for element in self))
 
+    def to_file(self, path, transform=str, separator='\n', encoding='utf-8', compression=None,
+                buffer_size=DEFAULT_BUFFER_SIZE, atomic=False):
+        """Streams the elements of the sequence into a text file.
+
+        :param path: The path of the file to write.
+        :type path: str
+        :param transform: (optional) A function to create the text of each element.
+        :type transform: function
+        :param separator: (optional) The text written after each element.
+        :type separator: str
+        :param encoding: (optional) The text encoding of the file.
+        :type encoding: str
+        :param compression: (optional) One of 'gzip', 'bz2' or 'xz'.
+        :type compression: str
+        :param buffer_size: (optional) The size of the write buffer in bytes.
+        :type buffer_size: int
+        :param atomic: (optional) Whether to write a temporary file and rename it to 'path'.
+        :type atomic: bool
+        :return: The number of elements written.
+        :rtype: int
+        :raise TypeError: if 'transform' is not callable
+        :raise ValueError: if 'compression' is not supported
+        """
+        if not callable(transform):
+            raise TypeError("Value for 'transform' is not callable.")
+        count = 0
+        with open_sink(path, encoding, compression, buffer_size, atomic, newline='') as sink:
+            write = sink.write
+            for element in self:
+                write(transform(element))
+                write(separator)
+                count += 1
+        return count
+
+    def to_jsonl(self, path, transform=identity, encoding='utf-8', compression=None,
+                 buffer_size=DEFAULT_BUFFER_SIZE, atomic=False):
+        """Streams the elements of the sequence into a file of JSON lines.
+
+        :param path: The path of the file to write.
+        :type path: str
+        :param transform: (optional) A function to create a JSON serializable value from each
+            element.
+        :type transform: function
+        :param encoding: (optional) The text encoding of the file.
+        :type encoding: str
+        :param compression: (optional) One of 'gzip', 'bz2' or 'xz'.
+        :type compression: str
+        :param buffer_size: (optional) The size of the write buffer in bytes.
+        :type buffer_size: int
+        :param atomic: (optional) Whether to write a temporary file and rename it to 'path'.
+        :type atomic: bool
+        :return: The number of elements written.
+        :rtype: int
+        :raise TypeError: if 'transform' is not callable
+        :raise ValueError: if 'compression' is not supported
+        """
+        if not callable(transform):
+            raise TypeError("Value for 'transform' is not callable.")
+        return self.to_file(path, lambda element: json.dumps(transform(element)), '\n',
+                            encoding, compression, buffer_size, atomic)
+
     def to_list(self):
         """Creates a list object from the sequence.
 
@@ -826,32 +1856,170 @@ class Queryable(object):
         """
         return list(self)
 
-    def union(self, other, key_selector=identity):
+    def to_lookup(self, key_selector, value_selector=identity):
+        """Creates an immutable mapping of each key to the sequence of values with that key.
+
+        Usage::
+
+          >>> lookup = pinq.as_queryable(["apple", "avocado", "banana"]).to_lookup(lambda s: s[0])
+          >>> list(lookup["a"])
+          ['apple', 'avocado']
+
+        :param key_selector: A function to extract the key of each element.
+        :type key_selector: function
+        :param value_selector: (optional) A function to extract the value of each element.
+        :type value_selector: function
+        :return: The values of the sequence, grouped by key.
+        :rtype: :class:`Lookup <pinq.indexes.Lookup>`
+        :raise TypeError: if 'key_selector' is not callable
+        :raise TypeError: if 'value_selector' is not callable
+        """
+        from .indexes import Lookup
+        if not callable(key_selector):
+            raise TypeError("Value for 'key_selector' is not callable.")
+        if not callable(value_selector):
+            raise TypeError("Value for 'value_selector' is not callable.")
+        return Lookup(self, key_selector, value_selector)
+
+    def to_numpy(self, dtype=float):
+        """Creates a numpy array of the elements in the sequence.
+
+        If the length of the sequence is known from its source, the array is allocated once;
+        otherwise it grows geometrically as elements are added. Requires numpy.
+
+        :param dtype: (optional) The numpy data type of the elements.
+        :return: A one dimensional array of the elements in the sequence.
+        :rtype: :class:`numpy.ndarray`
+        :raise ImportError: if numpy is not installed
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("to_numpy requires numpy to be installed.")
+        capacity = self._length_hint()
+        if capacity is None:
+            capacity = 1024
+        result = numpy.empty(max(capacity, 1), dtype)
+        count = 0
+        for element in self:
+            if count == len(result):
+                result.resize(2 * count, refcheck=False)
+            result[count] = element
+            count += 1
+        result.resize(count, refcheck=False)
+        return result
+
+    def to_sorted_index(self, key_selector):
+        """Creates an index of the elements of the sequence, sorted by key, for range queries.
+
+        Usage::
+
+          >>> events = pinq.as_queryable(buffer).to_sorted_index(lambda event: event.ts)
+          >>> events.range(start, end).count()
+
+        :param key_selector: A function to extract the key of each element.
+        :type key_selector: function
+        :return: The index of the elements.
+        :rtype: :class:`SortedIndex <pinq.indexes.SortedIndex>`
+        :raise TypeError: if 'key_selector' is not callable
+        """
+        from .indexes import SortedIndex
+        if not callable(key_selector):
+            raise TypeError("Value for 'key_selector' is not callable.")
+        return SortedIndex(self, key_selector)
+
+    def top_frequent(self, k, key_selector=identity, exact=False, capacity=None):
+        """Returns the most frequent keys in the sequence with their counts.
+
+        By default, keys are counted with a :class:`FrequentItems
+        <pinq.sketches.FrequentItems>` sketch of at most 'capacity' counters, which defaults to
+        the larger of 1024 and 10 * 'k'. The counts returned may overestimate the true counts by
+        at most the sketch's offset, about 2n / 'capacity' for n elements, and are exact while
+        there are no more distinct keys than 'capacity'. If 'exact' is set, every key is counted
+        instead, subject to the active :class:`MemoryBudget <pinq.memory.MemoryBudget>`.
+
+        :param k: The number of keys to return.
+        :type k: int
+        :param key_selector: (optional) A function to select the key of each element.
+        :type key_selector: function
+        :param exact: (optional) Whether to count every key exactly.
+        :type exact: bool
+        :param capacity: (optional) The number of counters of the sketch, if 'exact' is not set.
+        :type capacity: int
+        :return: The (key, count) pairs of the 'k' most frequent keys, most frequent first.
+        :rtype: list
+        :raise TypeError: if 'k' is not an int
+        :raise TypeError: if 'key_selector' is not callable
+        :raise TypeError: if 'capacity' is not an int
+        :raise ValueError: if 'k' is not positive
+        :raise ValueError: if 'capacity' is less than 'k'
+        """
+        if not isinstance(k, int):
+            raise TypeError("Value for 'k' is not an integer.")
+        if k <= 0:
+            raise ValueError("Value for 'k' must be positive.")
+        if not callable(key_selector):
+            raise TypeError("Value for 'key_selector' is not callable.")
+        if exact:
+            counts = {}
+            accounting = reserve('top_frequent')
+            try:
+                for element in self:
+                    key = key_selector(element)
+                    if key in counts:
+                        counts[key] += 1
+                    else:
+                        counts[key] = 1
+                        if accounting is not None:
+                            accounting.add(key)
+                return nlargest(k, counts.items(), key=itemgetter(1))
+            finally:
+                if accounting is not None:
+                    accounting.release()
+        if capacity is None:
+            capacity = max(1024, 10 * k)
+        FrequentItems.validate(capacity)
+        if capacity < k:
+            raise ValueError("Value for 'capacity' must be at least 'k'.")
+        sketch = FrequentItems(capacity)
+        sketch.update(key_selector(element) for element in self)
+        return sketch.top(k)
+
+    @_operator
+    def union(self, other, key_selector=identity, approximate=False, capacity=1 << 20,
+              error_rate=0.01):
         """Returns the set union of two sequences.
 
+        Memory budgets and the 'approximate' mode apply as for :meth:`distinct`.
+
         :param other: The second sequence to produce the union with.
         :type other: Iterable
         :param key_selector: (optional) A function to extract a key for comparison.
         :type key_selector: function
+        :param approximate: (optional) Whether to detect duplicates with a Bloom filter.
+        :type approximate: bool
+        :param capacity: (optional) The expected number of distinct keys, if 'approximate' is set.
+        :type capacity: int
+        :param error_rate: (optional) The rate of dropped elements, if 'approximate' is set.
+        :type error_rate: float
         :return: The set union of the two sequences.
         :rtype: :class:`Queryable`
         :raise TypeError: if 'other' is not an Iterable
         :raise TypeError: if 'key_selector' is not callable
+        :raise TypeError: if 'capacity' is not an int
+        :raise ValueError: if 'capacity' is not positive or 'error_rate' is not between 0 and 1
         """
         if not isinstance(other, Iterable):
             raise TypeError("Value for 'other' is not an Iterable.")
         if not callable(key_selector):
             raise TypeError("Value for 'key_selector' is not callable.")
-        seen = {}
-
-        def _seen(value):
-            key = key_selector(value)
-            if key in seen:
-                return True
-            seen[key] = 1
-            return False
-        return Queryable((element for element in chain(self, other) if not _seen(element)))
+        bloom_filter = None
+        if approximate:
+            bloom_filter = (capacity, error_rate)
+            BloomFilter.validate(capacity, error_rate)
+        return Queryable(_distinct(chain(self, other), key_selector, 'union', bloom_filter))
 
+    @_operator
     def where(self, predicate):
         """Filters the sequence of values based on the specified condition.
 
@@ -869,6 +2037,213 @@ class Queryable(object):
             return Queryable(
                 (element for index, element in enumerate(self) if predicate(element, index)))
 
+    @_operator
+    def window_session(self, gap, time_selector, aggregate=None, transform=identity):
+        """Groups the sequence into sessions of elements whose times are no more than 'gap' apart.
+
+        Sessions are yielded as soon as they end, so the sequence may be unbounded. If
+        'aggregate' is given, each session is reduced to the aggregate of its transformed
+        elements as they arrive, and the elements themselves are not held.
+
+        :param gap: The largest difference in time between consecutive elements of a session, of
+            the type of the differences of the times, such as a timedelta for datetimes.
+        :param time_selector: A function to select the time of each element.
+        :type time_selector: function
+        :param aggregate: (optional) One of 'average', 'count', 'max', 'min' or 'sum'.
+        :type aggregate: str
+        :param transform: (optional) A transform function to apply to each aggregated element.
+        :type transform: function
+        :return: The elements, or the aggregate, of each session.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'time_selector' is not callable
+        :raise TypeError: if 'transform' is not callable
+        :raise ValueError: if 'gap' is negative
+        :raise ValueError: if 'aggregate' is not supported
+        """
+        if not callable(time_selector):
+            raise TypeError("Value for 'time_selector' is not callable.")
+        if gap < type(gap)():
+            raise ValueError("Value for 'gap' must not be negative.")
+        _check_window_aggregate(aggregate, transform)
+        return Queryable(session_windows(self, gap, time_selector, aggregate, transform))
+
+    @_operator
+    def window_sliding(self, size, step=1, aggregate=None, transform=identity):
+        """Returns the windows of the last 'size' elements, after every 'step' elements.
+
+        The first window is yielded once 'size' elements have arrived. Only the last 'size'
+        elements are held, so the sequence may be unbounded. If 'aggregate' is given, each
+        window is reduced to the aggregate of its transformed elements, which is updated as
+        elements enter and leave the window instead of being recomputed; the minimum and
+        maximum are kept with monotonic deques.
+
+        :param size: The number of elements in each window.
+        :type size: int
+        :param step: (optional) The number of elements between consecutive windows.
+        :type step: int
+        :param aggregate: (optional) One of 'average', 'count', 'max', 'min' or 'sum'.
+        :type aggregate: str
+        :param transform: (optional) A transform function to apply to each aggregated element.
+        :type transform: function
+        :return: The elements, as a list, or the aggregate, of each window.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'size' or 'step' is not an int
+        :raise TypeError: if 'transform' is not callable
+        :raise ValueError: if 'size' or 'step' is not positive
+        :raise ValueError: if 'aggregate' is not supported
+        """
+        if not isinstance(size, int):
+            raise TypeError("Value for 'size' is not an integer.")
+        if not isinstance(step, int):
+            raise TypeError("Value for 'step' is not an integer.")
+        if size <= 0:
+            raise ValueError("Value for 'size' must be positive.")
+        if step <= 0:
+            raise ValueError("Value for 'step' must be positive.")
+        _check_window_aggregate(aggregate, transform)
+        return Queryable(sliding_windows(self, size, step, aggregate, transform))
+
+    @_operator
+    def window_tumbling(self, size, time_selector=None, aggregate=None, transform=identity):
+        """Groups the sequence into consecutive, non-overlapping windows.
+
+        Without a 'time_selector', each window holds 'size' elements. Otherwise, each window
+        holds the elements whose times fall in the same interval of length 'size', starting at a
+        multiple of 'size' for numeric times, or at the time of the first element plus a
+        multiple of 'size' for other times, such as datetimes with a timedelta 'size'; times
+        must not decrease. Each window is yielded as soon as it is complete, so the sequence may
+        be unbounded, and the last window may be partial. If 'aggregate' is given, each window
+        is reduced to the aggregate of its transformed elements as they arrive.
+
+        :param size: The number of elements, or the length of time, of each window.
+        :param time_selector: (optional) A function to select the time of each element.
+        :type time_selector: function
+        :param aggregate: (optional) One of 'average', 'count', 'max', 'min' or 'sum'.
+        :type aggregate: str
+        :param transform: (optional) A transform function to apply to each aggregated element.
+        :type transform: function
+        :return: The elements, as a list, or the aggregate, of each window.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'size' is not an int and 'time_selector' is not given
+        :raise TypeError: if 'time_selector' or 'transform' is not callable
+        :raise ValueError: if 'size' is not positive
+        :raise ValueError: if 'aggregate' is not supported
+        """
+        if time_selector is None and not isinstance(size, int):
+            raise TypeError("Value for 'size' is not an integer.")
+        if time_selector is not None and not callable(time_selector):
+            raise TypeError("Value for 'time_selector' is not callable.")
+        if size <= type(size)():
+            raise ValueError("Value for 'size' must be positive.")
+        _check_window_aggregate(aggregate, transform)
+        return Queryable(tumbling_windows(self, size, time_selector, aggregate, transform))
+
+    def with_index(self, key_selector):
+        """Materializes the sequence with a hash index of the keys of its elements.
+
+        Filtering the indexed queryable with a :func:`key_equals <pinq.predicates.key_equals>`
+        predicate over the same key selector function finds the matching elements in constant
+        time, rather than scanning the sequence. The indexed queryable may be queried any
+        number of times.
+
+        Usage::
+
+          >>> users = pinq.as_queryable(rows).with_index(user_id)
+          >>> users.where(pinq.predicates.key_equals(user_id, 42)).to_list()
+
+        :param key_selector: A function to extract the key of each element.
+        :type key_selector: function
+        :return: The indexed sequence.
+        :rtype: :class:`IndexedQueryable <pinq.indexes.IndexedQueryable>`
+        :raise TypeError: if 'key_selector' is not callable
+        """
+        from .indexes import IndexedQueryable
+        if not callable(key_selector):
+            raise TypeError("Value for 'key_selector' is not callable.")
+        return IndexedQueryable(self, key_selector)
+
+    @_operator
+    def with_window(self, functions, partition_by=None, order_by=None, presorted=False,
+                    result_transform=None):
+        """Computes SQL-style window functions over the partitions of the sequence.
+
+        The sequence is sorted once by partition and then by order, and each element is
+        returned with a dict mapping the name of each window function to its value for that
+        element. If 'order_by' is not given and the sequence was sorted with :meth:`order_by`,
+        :meth:`then_by` and their descending forms, that ordering is used instead of sorting
+        twice. If 'presorted' is true, the elements of each partition must already be
+        consecutive and ordered, and the sequence is processed in a single pass, holding only
+        the elements needed by 'lag' and 'lead'.
+
+        Each window function is given as one of:
+
+        * 'row_number', 'rank' or 'dense_rank', where elements with equal order keys rank
+          equally;
+        * ('lag', selector, offset, default) or ('lead', selector, offset, default), the
+          selected value of the element 'offset' (default 1) elements before or after, or
+          'default' (default None) if there is none in the partition;
+        * 'average', 'count', 'max', 'min' or 'sum', or a tuple of one of them and a transform
+          function, the cumulative aggregate of the partition up to and including the element.
+
+        :param functions: The window functions, by name.
+        :type functions: dict
+        :param partition_by: (optional) A function to extract the partition key of an element.
+        :type partition_by: function
+        :param order_by: (optional) A function to extract the order key of an element.
+        :type order_by: function
+        :param presorted: (optional) Whether the partitions are already consecutive and ordered.
+        :type presorted: bool
+        :param result_transform: (optional) A function combining each element with the dict of
+            its values. By default, (element, values) pairs are returned.
+        :type result_transform: function
+        :return: The elements of the sequence with the values of the window functions.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'functions' is not a dict
+        :raise TypeError: if 'partition_by', 'order_by' or 'result_transform' is not callable
+        :raise ValueError: if a window function is not supported, or its arguments are invalid
+        """
+        if partition_by is not None and not callable(partition_by):
+            raise TypeError("Value for 'partition_by' is not callable.")
+        if order_by is not None and not callable(order_by):
+            raise TypeError("Value for 'order_by' is not callable.")
+        if result_transform is not None and not callable(result_transform):
+            raise TypeError("Value for 'result_transform' is not callable.")
+        functions = parse_window_functions(functions)
+        source = self
+        keys = []
+        if order_by is not None:
+            keys = [(order_by, False)]
+        elif isinstance(self, OrderedQueryable):
+            keys = list(self._keys)
+            if not presorted:
+                source = self.iterator
+        selectors = [key_selector for key_selector, _ in reversed(keys)]
+        if not selectors:
+            order_key = lambda element: None
+        elif len(selectors) == 1:
+            order_key = selectors[0]
+        else:
+            order_key = lambda element: tuple(selector(element) for selector in selectors)
+        partition_key = partition_by or (lambda element: None)
+        if partition_by is not None:
+            keys.append((partition_by, False))
+
+        def _with_window(iterator):
+            if not presorted and keys:
+                budget = current_budget()
+                if budget is not None:
+                    iterator = spilling_sorted(iterator, keys, budget, 'with_window')
+                else:
+                    iterator = sorted(iterator, key=sort_key(keys))
+            for element, values in window_functions(iterator, functions, partition_key,
+                                                    order_key):
+                if result_transform is None:
+                    yield element, values
+                else:
+                    yield result_transform(element, values)
+        return Queryable(_with_window(source), self._length_hint())
+
+    @_operator
     def zip(self, other, result_transform):
         """Applies a function to the corresponding elements of the two sequences.
 
@@ -893,10 +2268,15 @@ class OrderedQueryable(Queryable):
     """
 
     def __init__(self, iterator, keys):
-        super(OrderedQueryable, self).__init__(iterator)
+        super(OrderedQueryable, self).__init__(iterator, iterator._length_hint())
         self._keys = keys
 
     def __iter__(self):
+        budget = current_budget()
+        if budget is not None:
+            for element in spilling_sorted(self.iterator, self._keys, budget, 'order_by'):
+                yield element
+            return
         sorted_elements = self.iterator
         for key_selector in self._keys:
             sorted_elements = sorted(sorted_elements, key=key_selector[
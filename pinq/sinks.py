@@ -0,0 +1,267 @@
+"""
+pinq.sinks
+~~~~~~~~~~
+
+This module implements the file handling used by the streaming sinks of a Queryable, and the
+writer for persisted query results.
+
+:copyright: (c) 2016 by David Shriver.
+:license: MIT, see LICENSE for more details.
+"""
+
+import binascii
+import bz2
+import errno
+import gzip
+import hashlib
+import io
+import json
+import os
+import pickle
+import struct
+from array import array
+from contextlib import contextmanager
+from .compat import *
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+COMPRESSIONS = ('gzip', 'bz2', 'xz')
+
+PERSIST_MAGIC = b'PINQ\x01'
+
+PERSIST_LENGTH = struct.Struct('<Q')
+
+
+class _CompressedFile(io.RawIOBase):
+    """A binary file object that compresses data with a compressor object, such as a
+    :class:`bz2.BZ2Compressor`, before writing it to another binary file object.
+
+    Closing it writes the end of the compressed stream, and leaves the other file object open.
+    """
+
+    def __init__(self, raw, compressor):
+        super(_CompressedFile, self).__init__()
+        self.raw = raw
+        self.compressor = compressor
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        self.raw.write(self.compressor.compress(data))
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.raw.write(self.compressor.flush())
+        super(_CompressedFile, self).close()
+
+
+class _TextSink(object):
+    """A text file object that also accepts byte strings, decoding them with its encoding.
+
+    On Python 2, :func:`str`, :func:`json.dumps` and the :mod:`csv` module produce byte strings,
+    which :class:`io.TextIOWrapper` does not accept.
+    """
+
+    def __init__(self, sink, encoding):
+        self.sink = sink
+        self.encoding = encoding
+
+    def write(self, text):
+        if isinstance(text, bytes):
+            text = text.decode(self.encoding)
+        return self.sink.write(text)
+
+    def close(self):
+        self.sink.close()
+
+
+def _compress(raw, compression):
+    """Wraps a binary file object in a compressing file object.
+
+    :param raw: The binary file object to write compressed data to.
+    :param compression: The name of the compression, or None.
+    :type compression: str
+    :return: A binary file object that compresses data written to it.
+    """
+    if compression is None:
+        return raw
+    elif compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb')
+    elif compression == 'bz2':
+        return _CompressedFile(raw, bz2.BZ2Compressor())
+    elif lzma is None:
+        raise ValueError("Compression 'xz' requires the lzma module.")
+    return lzma.LZMAFile(raw, mode='wb')
+
+
+def _replace(source, destination):
+    """Atomically renames 'source' to 'destination', replacing any existing file."""
+    if hasattr(os, 'replace'):
+        os.replace(source, destination)
+    else:
+        os.rename(source, destination)
+
+
+def _create_temporary(path):
+    """Creates an empty temporary file in the directory of 'path', and returns its path.
+
+    The file is created with the permissions a new file would have under the umask, like the
+    files created by :func:`open`, rather than the private permissions of
+    :func:`tempfile.mkstemp`.
+    """
+    directory, filename = os.path.split(os.path.abspath(path))
+    while True:
+        suffix = binascii.hexlify(os.urandom(6)).decode('ascii')
+        target = os.path.join(directory, ".%s.%s.tmp" % (filename, suffix))
+        try:
+            fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except OSError as error:
+            if error.errno == errno.EEXIST:
+                continue
+            raise
+        os.close(fd)
+        return target
+
+
+@contextmanager
+def open_binary_sink(path, buffer_size=DEFAULT_BUFFER_SIZE, atomic=False):
+    """Opens a buffered binary file for streaming data into.
+
+    If 'atomic' is set, data is written to a temporary file in the same directory, which is
+    renamed to 'path' only once all data has been written successfully. If writing fails, the
+    temporary file is removed and any existing file at 'path' is left untouched. The permissions
+    of the temporary file follow the umask, as those of a newly created file would.
+
+    :param path: The path of the file to write.
+    :type path: str
+    :param buffer_size: (optional) The size of the write buffer in bytes.
+    :type buffer_size: int
+    :param atomic: (optional) Whether to replace 'path' atomically.
+    :type atomic: bool
+    :return: A context manager yielding a writable binary file object.
+    :raise TypeError: if 'buffer_size' is not an int
+    """
+    if not isinstance(buffer_size, int):
+        raise TypeError("Value for 'buffer_size' is not an integer.")
+    target = path
+    if atomic:
+        target = _create_temporary(path)
+    try:
+        with io.open(target, 'wb', buffering=buffer_size) as raw:
+            yield raw
+        if atomic:
+            _replace(target, path)
+    except BaseException:
+        if atomic and os.path.exists(target):
+            os.remove(target)
+        raise
+
+
+@contextmanager
+def open_sink(path, encoding='utf-8', compression=None, buffer_size=DEFAULT_BUFFER_SIZE,
+              atomic=False, newline=None):
+    """Opens a buffered text file for streaming elements into.
+
+    Atomic replacement of 'path' is handled as in :func:`open_binary_sink`.
+
+    :param path: The path of the file to write.
+    :type path: str
+    :param encoding: (optional) The text encoding of the file.
+    :type encoding: str
+    :param compression: (optional) One of 'gzip', 'bz2' or 'xz'.
+    :type compression: str
+    :param buffer_size: (optional) The size of the write buffer in bytes.
+    :type buffer_size: int
+    :param atomic: (optional) Whether to replace 'path' atomically.
+    :type atomic: bool
+    :param newline: (optional) The newline translation mode, as for :func:`io.open`.
+    :type newline: str
+    :return: A context manager yielding a writable text file object.
+    :raise ValueError: if 'compression' is not supported
+    :raise TypeError: if 'buffer_size' is not an int
+    """
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError("Value for 'compression' must be one of %s." % ", ".join(COMPRESSIONS))
+    with open_binary_sink(path, buffer_size, atomic) as raw:
+        compressed = _compress(raw, compression)
+        if compressed is not raw:
+            compressed = io.BufferedWriter(compressed, buffer_size)
+        sink = io.TextIOWrapper(compressed, encoding=encoding, newline=newline)
+        if bytes is str:
+            sink = _TextSink(sink, encoding)
+        yield sink
+        sink.close()
+
+
+def _chunks(iterable, chunk_size):
+    """Yields lists of at most 'chunk_size' consecutive elements of 'iterable'."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_persisted(iterable, path, typecode=None, fingerprint=None, chunk_size=4096,
+                    buffer_size=DEFAULT_BUFFER_SIZE, atomic=True):
+    """Writes the elements of 'iterable' to a persisted result file.
+
+    The file starts with :data:`PERSIST_MAGIC`, followed by the elements and a JSON footer
+    describing them, and ends with the length of the footer. Elements are stored either as
+    length-prefixed pickled chunks or, if 'typecode' is given, as the raw bytes of an
+    :mod:`array` of fixed-width values.
+
+    :param iterable: The elements to write.
+    :type iterable: Iterable
+    :param path: The path of the file to write.
+    :type path: str
+    :param typecode: (optional) The :mod:`array` type code to store the elements as.
+    :type typecode: str
+    :param fingerprint: (optional) A string identifying the inputs the elements were computed from.
+    :type fingerprint: str
+    :param chunk_size: (optional) The number of elements in each chunk.
+    :type chunk_size: int
+    :param buffer_size: (optional) The size of the write buffer in bytes.
+    :type buffer_size: int
+    :param atomic: (optional) Whether to replace 'path' atomically.
+    :type atomic: bool
+    :return: The number of elements written.
+    :rtype: int
+    """
+    digest = hashlib.sha1()
+    chunks = []
+    count = 0
+    with open_binary_sink(path, buffer_size, atomic) as sink:
+        sink.write(PERSIST_MAGIC)
+        offset = len(PERSIST_MAGIC)
+        for chunk in _chunks(iterable, chunk_size):
+            if typecode is None:
+                payload = pickle.dumps(chunk, pickle.HIGHEST_PROTOCOL)
+                prefix = PERSIST_LENGTH.pack(len(payload))
+                sink.write(prefix)
+                digest.update(prefix)
+                chunks.append((offset, count))
+                offset += len(prefix)
+            else:
+                payload = array_to_bytes(array(typecode, chunk))
+            sink.write(payload)
+            digest.update(payload)
+            offset += len(payload)
+            count += len(chunk)
+        footer = json.dumps(dict([
+            ('count', count), ('typecode', typecode), ('fingerprint', fingerprint),
+            ('digest', digest.hexdigest()), ('chunks', chunks), ('data_end', offset)]))
+        footer = footer.encode('utf-8')
+        sink.write(footer)
+        sink.write(PERSIST_LENGTH.pack(len(footer)))
+    return count
@@ -0,0 +1,504 @@
+"""
+pinq.sketches
+~~~~~~~~~~~~~
+
+This module implements probabilistic data structures that summarize a sequence in a fixed
+amount of memory, and the stable hash function they are built on.
+
+:copyright: (c) 2016 by David Shriver.
+:license: MIT, see LICENSE for more details.
+"""
+
+import hashlib
+import math
+import random
+import struct
+from bisect import bisect_left
+from heapq import nlargest
+from operator import itemgetter
+from .compat import *
+
+_MASK64 = (1 << 64) - 1
+
+_DOUBLE = struct.Struct('<d')
+
+_UINT64 = struct.Struct('<Q')
+
+_TEXT = type(u'')
+
+
+if hasattr(0, 'bit_length'):
+    def _bit_length(value):
+        """Returns the number of bits needed to represent a non-negative integer."""
+        return value.bit_length()
+else:
+    def _bit_length(value):
+        """Returns the number of bits needed to represent a non-negative integer."""
+        return len(bin(value)) - 2 if value else 0
+
+
+def _mix(value):
+    """Scrambles the bits of a 64 bit integer with the splitmix64 finalizer."""
+    value = (value ^ (value >> 30)) * 0xbf58476d1ce4e5b9 & _MASK64
+    value = (value ^ (value >> 27)) * 0x94d049bb133111eb & _MASK64
+    return value ^ (value >> 31)
+
+
+def _digest(data):
+    """Hashes bytes to a 64 bit integer."""
+    return _UINT64.unpack(hashlib.md5(data).digest()[:8])[0]
+
+
+def stable_hash(value):
+    """Hashes a value to a 64 bit integer that is the same in every process.
+
+    Integers, floats, strings, bytes and tuples of them hash stably, and values that compare
+    equal, such as 1 and 1.0, hash equally. Any other value falls back to its built-in hash,
+    which may differ between processes.
+
+    :param value: The value to hash.
+    :return: The hash of the value.
+    :rtype: int
+    """
+    if isinstance(value, float):
+        if not value.is_integer():
+            return _mix(_UINT64.unpack(_DOUBLE.pack(value))[0])
+        value = int(value)
+    if isinstance(value, (int, type(1 << 64))):
+        return _mix(value & _MASK64)
+    elif isinstance(value, bytes):
+        return _digest(value)
+    elif isinstance(value, _TEXT):
+        return _digest(value.encode('utf-8'))
+    elif isinstance(value, tuple):
+        result = len(value)
+        for item in value:
+            result = _mix(result ^ stable_hash(item))
+        return result
+    return _mix(hash(value) & _MASK64)
+
+
+class BloomFilter(object):
+    """A set of keys that answers membership queries with false positives, but no false negatives.
+
+    The filter is sized for 'capacity' keys so that, until that many keys have been added, the
+    rate of false positives is at most about 'error_rate'. It uses a fixed number of bits per key
+    regardless of the size of the keys themselves.
+
+    :param capacity: The expected number of keys.
+    :type capacity: int
+    :param error_rate: (optional) The acceptable rate of false positives.
+    :type error_rate: float
+    :raise TypeError: if 'capacity' is not an int
+    :raise ValueError: if 'capacity' is not positive or 'error_rate' is not between 0 and 1
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.validate(capacity, error_rate)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / float(capacity) * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def __contains__(self, key):
+        bits = self.bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def validate(capacity, error_rate):
+        """Checks the parameters of a filter without allocating it.
+
+        :raise TypeError: if 'capacity' is not an int
+        :raise ValueError: if 'capacity' is not positive or 'error_rate' is not between 0 and 1
+        """
+        if not isinstance(capacity, int):
+            raise TypeError("Value for 'capacity' is not an integer.")
+        if capacity <= 0:
+            raise ValueError("Value for 'capacity' must be positive.")
+        if not 0 < error_rate < 1:
+            raise ValueError("Value for 'error_rate' must be between 0 and 1.")
+
+    def _positions(self, key):
+        """Returns the bit positions of a key, derived from a single hash by double hashing."""
+        value = stable_hash(key)
+        first = value & 0xffffffff
+        second = (value >> 32) | 1
+        size = self.size
+        return [(first + i * second) % size for i in range(self.hashes)]
+
+    def add(self, key):
+        """Adds a key to the filter.
+
+        :param key: The key to add.
+        :return: True if the key may already have been in the filter, False if it was not.
+        :rtype: bool
+        """
+        bits = self.bits
+        present = True
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                present = False
+        if not present:
+            self.count += 1
+        return present
+
+    def merge(self, other):
+        """Adds every key of another filter with the same size to this filter.
+
+        :param other: The filter to merge into this one.
+        :type other: :class:`BloomFilter`
+        :raise ValueError: if the filters have a different size or number of hashes
+        """
+        if other.size != self.size or other.hashes != self.hashes:
+            raise ValueError("Bloom filters of different sizes cannot be merged.")
+        self.bits = bytearray(x | y for x, y in zip(self.bits, other.bits))
+        self.count += other.count
+
+
+class HyperLogLog(object):
+    """An estimate of the number of distinct keys in a sequence.
+
+    The sketch keeps 2 ** 'precision' one byte registers, and has a relative standard error of
+    about 1.04 / sqrt(2 ** 'precision'), or 0.8% at the default precision of 14. Sketches built
+    with the same precision over different parts of a sequence, possibly in different processes,
+    can be merged into a sketch of the whole sequence.
+
+    :param precision: (optional) The number of bits of the hash used to select a register.
+    :type precision: int
+    :raise TypeError: if 'precision' is not an int
+    :raise ValueError: if 'precision' is not between 4 and 18
+    """
+
+    def __init__(self, precision=14):
+        self.validate(precision)
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def __len__(self):
+        return int(round(self.cardinality()))
+
+    @staticmethod
+    def validate(precision):
+        """Checks the parameters of a sketch without allocating it.
+
+        :raise TypeError: if 'precision' is not an int
+        :raise ValueError: if 'precision' is not between 4 and 18
+        """
+        if not isinstance(precision, int):
+            raise TypeError("Value for 'precision' is not an integer.")
+        if not 4 <= precision <= 18:
+            raise ValueError("Value for 'precision' must be between 4 and 18.")
+
+    def add(self, key):
+        """Adds a key to the sketch.
+
+        :param key: The key to add.
+        """
+        value = stable_hash(key)
+        index = value >> (64 - self.precision)
+        rest = value & ((1 << (64 - self.precision)) - 1)
+        rank = 65 - self.precision - _bit_length(rest)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, keys):
+        """Adds every key of an iterable to the sketch.
+
+        :param keys: The keys to add.
+        :type keys: Iterable
+        """
+        registers = self.registers
+        shift = 64 - self.precision
+        mask = (1 << shift) - 1
+        for key in keys:
+            value = stable_hash(key)
+            index = value >> shift
+            rank = shift + 1 - _bit_length(value & mask)
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def merge(self, other):
+        """Adds every key of another sketch with the same precision to this sketch.
+
+        :param other: The sketch to merge into this one.
+        :type other: :class:`HyperLogLog`
+        :raise ValueError: if the sketches have a different precision
+        """
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLog sketches of different precisions cannot be merged.")
+        self.registers = bytearray(max(x, y) for x, y in zip(self.registers, other.registers))
+
+    def cardinality(self):
+        """Estimates the number of distinct keys added to the sketch.
+
+        Small cardinalities are estimated by linear counting of the empty registers, which is
+        more accurate while many registers are still empty.
+
+        :return: The estimated number of distinct keys.
+        :rtype: float
+        """
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        empty = self.registers.count(b'\x00')
+        if empty and estimate <= 2.5 * size:
+            return size * math.log(size / float(empty))
+        return estimate
+
+
+class KLLSketch(object):
+    """An approximation of the distribution of a sequence of comparable values.
+
+    The sketch keeps a hierarchy of compactors of decreasing capacity. When a compactor is full,
+    it is sorted and every other value is promoted to the next compactor with twice the weight.
+    The sketch holds O('k' log(n / 'k')) values for a sequence of n values, and the rank of any
+    value it answers is off by about 1.7 / 'k' of the sequence length, or 1% at the default 'k'
+    of 200. Sketches with the same 'k' can be merged.
+
+    :param k: (optional) The capacity of the largest compactor, which controls the accuracy.
+    :type k: int
+    :param seed: (optional) The seed of the random choices made when compacting.
+    :raise TypeError: if 'k' is not an int
+    :raise ValueError: if 'k' is less than 8
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.validate(k)
+        self.k = k
+        self.count = 0
+        self.compactors = [[]]
+        self._random = random.Random(seed)
+        self._grow(0)
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def validate(k):
+        """Checks the parameters of a sketch without allocating it.
+
+        :raise TypeError: if 'k' is not an int
+        :raise ValueError: if 'k' is less than 8
+        """
+        if not isinstance(k, int):
+            raise TypeError("Value for 'k' is not an integer.")
+        if k < 8:
+            raise ValueError("Value for 'k' must be at least 8.")
+
+    def _grow(self, height):
+        """Adds compactors up to 'height', and recomputes the capacity of each compactor, which
+        shrinks by 2/3 at each lower level."""
+        while len(self.compactors) < height:
+            self.compactors.append([])
+        height = len(self.compactors)
+        self._capacity = [int(math.ceil(self.k * (2.0 / 3) ** (height - level - 1))) + 1
+                          for level in range(height)]
+        self._held = sum(len(compactor) for compactor in self.compactors)
+        self._limit = sum(self._capacity)
+
+    def _compress(self):
+        """Compacts the lowest full compactor into the one above it."""
+        for level, compactor in enumerate(self.compactors):
+            if len(compactor) >= self._capacity[level]:
+                if level + 1 == len(self.compactors):
+                    self._grow(level + 2)
+                compactor.sort()
+                promoted = compactor[self._random.randint(0, 1)::2]
+                self.compactors[level + 1].extend(promoted)
+                self._held -= len(compactor) - len(promoted)
+                del compactor[:]
+                return
+
+    def add(self, value):
+        """Adds a value to the sketch.
+
+        :param value: The value to add.
+        """
+        self.compactors[0].append(value)
+        self.count += 1
+        self._held += 1
+        if self._held >= self._limit:
+            self._compress()
+
+    def update(self, values):
+        """Adds every value of an iterable to the sketch.
+
+        :param values: The values to add.
+        :type values: Iterable
+        """
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        """Adds every value of another sketch with the same 'k' to this sketch.
+
+        :param other: The sketch to merge into this one.
+        :type other: :class:`KLLSketch`
+        :raise ValueError: if the sketches have a different 'k'
+        """
+        if other.k != self.k:
+            raise ValueError("KLL sketches with different values of 'k' cannot be merged.")
+        for level, compactor in enumerate(other.compactors):
+            if level == len(self.compactors):
+                self.compactors.append([])
+            self.compactors[level].extend(compactor)
+        self._grow(len(self.compactors))
+        self.count += other.count
+        while self._held >= self._limit:
+            self._compress()
+
+    def quantiles(self, fractions):
+        """Estimates the values at the given fractions of the sorted sequence.
+
+        :param fractions: The fractions, between 0 and 1, of the sequence to estimate.
+        :type fractions: Iterable
+        :return: The estimated value at each fraction.
+        :rtype: list
+        :raise ValueError: if the sketch is empty
+        """
+        if not self.count:
+            raise ValueError("The source sequence is empty.")
+        weighted = sorted(((value, 1 << level) for level, compactor in enumerate(self.compactors)
+                           for value in compactor), key=itemgetter(0))
+        cumulative = []
+        total = 0
+        for _, weight in weighted:
+            total += weight
+            cumulative.append(total)
+        return [weighted[min(bisect_left(cumulative, fraction * total), len(weighted) - 1)][0]
+                for fraction in fractions]
+
+    def quantile(self, fraction):
+        """Estimates the value at the given fraction of the sorted sequence.
+
+        :param fraction: The fraction, between 0 and 1, of the sequence to estimate.
+        :type fraction: float
+        :return: The estimated value.
+        :raise ValueError: if the sketch is empty
+        """
+        return self.quantiles([fraction])[0]
+
+
+class FrequentItems(object):
+    """An approximation of the most frequent keys in a sequence.
+
+    The sketch counts at most 'capacity' keys. When it is full, the median count is subtracted
+    from every counter and the counters that drop to zero are removed, as in the Misra-Gries
+    algorithm with batched decrements. The total subtracted, the offset, bounds the error: each
+    counter is at most the offset below the true count of its key, so every key more frequent
+    than about 2n / 'capacity' in a sequence of n keys is kept. Sketches can be merged.
+
+    :param capacity: The maximum number of keys to count.
+    :type capacity: int
+    :raise TypeError: if 'capacity' is not an int
+    :raise ValueError: if 'capacity' is less than 2
+    """
+
+    def __init__(self, capacity):
+        self.validate(capacity)
+        self.capacity = capacity
+        self.counts = {}
+        self.offset = 0
+        self.total = 0
+
+    def __len__(self):
+        return self.total
+
+    @staticmethod
+    def validate(capacity):
+        """Checks the parameters of a sketch without allocating it.
+
+        :raise TypeError: if 'capacity' is not an int
+        :raise ValueError: if 'capacity' is less than 2
+        """
+        if not isinstance(capacity, int):
+            raise TypeError("Value for 'capacity' is not an integer.")
+        if capacity < 2:
+            raise ValueError("Value for 'capacity' must be at least 2.")
+
+    def _purge(self):
+        """Subtracts the median count from every counter and removes the empty counters."""
+        median = sorted(self.counts.values())[len(self.counts) // 2]
+        self.offset += median
+        self.counts = dict([(key, count - median) for key, count in self.counts.items()
+                            if count > median])
+
+    def add(self, key, count=1):
+        """Counts occurrences of a key.
+
+        :param key: The key to count.
+        :param count: (optional) The number of occurrences.
+        :type count: int
+        """
+        counts = self.counts
+        counts[key] = counts.get(key, 0) + count
+        self.total += count
+        if len(counts) > self.capacity:
+            self._purge()
+
+    def update(self, keys):
+        """Counts one occurrence of every key of an iterable.
+
+        :param keys: The keys to count.
+        :type keys: Iterable
+        """
+        counts = self.counts
+        capacity = self.capacity
+        total = 0
+        for key in keys:
+            total += 1
+            if key in counts:
+                counts[key] += 1
+            else:
+                counts[key] = 1
+                if len(counts) > capacity:
+                    self._purge()
+                    counts = self.counts
+        self.total += total
+
+    def merge(self, other):
+        """Adds the counts of another sketch to this sketch.
+
+        :param other: The sketch to merge into this one.
+        :type other: :class:`FrequentItems`
+        """
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.offset += other.offset
+        self.total += other.total
+        while len(self.counts) > self.capacity:
+            self._purge()
+
+    def estimate(self, key):
+        """Returns the estimated number of occurrences of a key.
+
+        The estimate is at least the true count, and at most the offset above it.
+
+        :param key: The key to estimate.
+        :rtype: int
+        """
+        if key in self.counts:
+            return self.counts[key] + self.offset
+        return self.offset
+
+    def top(self, k):
+        """Returns the 'k' keys with the largest estimated counts.
+
+        :param k: The number of keys to return.
+        :type k: int
+        :return: The (key, estimated count) pairs, from the most to the least frequent.
+        :rtype: list
+        """
+        offset = self.offset
+        return [(key, count + offset) for key, count in
+                nlargest(k, self.counts.items(), key=itemgetter(1))]
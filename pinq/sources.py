@@ -0,0 +1,624 @@
+"""
+pinq.sources
+~~~~~~~~~~~~
+
+This module implements queryable sources that read their data from files.
+
+:copyright: (c) 2016 by David Shriver.
+:license: MIT, see LICENSE for more details.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import warnings
+from array import array
+from bisect import bisect_right
+from multiprocessing import Pool, cpu_count
+from .cancellation import checked
+from .compat import *
+from .predicates import true
+from .queryable import Queryable
+from .sinks import PERSIST_LENGTH, PERSIST_MAGIC
+from .sketches import HyperLogLog
+from .transforms import identity
+
+
+def _map_file(path):
+    """Maps the file at 'path' into memory for reading.
+
+    :param path: The path of the file to map.
+    :return: A read-only mmap of the file, or None if the file is empty.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _line_bounds(mapped, start, size):
+    """Returns the end of the line starting at 'start' and the start of the next line."""
+    end = mapped.find(b'\n', start)
+    if end == -1:
+        return size, size
+    return end, end + 1
+
+
+def _strip_line(line):
+    """Removes a trailing carriage return from a line."""
+    if line.endswith(b'\r'):
+        return line[:-1]
+    return line
+
+
+def _lines(mapped, start, stop):
+    """Yields the lines of a mapped file that start between 'start' and 'stop'."""
+    size = len(mapped)
+    while start < stop:
+        end, next_start = _line_bounds(mapped, start, size)
+        yield _strip_line(mapped[start:end])
+        start = next_start
+
+
+class LineQueryable(Queryable):
+    """A queryable over the lines of a memory mapped file.
+
+    Lines are read lazily from the mapped file on every iteration, so the file is never
+    loaded into memory as a whole.
+    """
+
+    def __init__(self, path, prefilter=None, encoding=None):
+        super(LineQueryable, self).__init__(None)
+        self.path = path
+        self.prefilter = prefilter
+        self.encoding = encoding
+
+    def __iter__(self):
+        mapped = _map_file(self.path)
+        if mapped is None:
+            return
+        try:
+            if isinstance(self.prefilter, bytes):
+                lines = self._search_lines(mapped)
+            else:
+                lines = self._scan_lines(mapped)
+            for line in checked(lines):
+                if self.encoding is not None:
+                    line = line.decode(self.encoding)
+                yield line
+        finally:
+            mapped.close()
+
+    def _scan_lines(self, mapped):
+        """Yields every line of the file that passes the prefilter function."""
+        prefilter = self.prefilter
+        for line in _lines(mapped, 0, len(mapped)):
+            if prefilter is None or prefilter(line):
+                yield line
+
+    def _search_lines(self, mapped):
+        """Yields the lines of the file containing the prefilter bytes.
+
+        The mapped file is searched for the prefilter directly, so lines that do not contain it
+        are never sliced out of the file.
+        """
+        needle = self.prefilter
+        size = len(mapped)
+        start = 0
+        while start < size:
+            position = mapped.find(needle, start)
+            if position == -1:
+                return
+            line_start = mapped.rfind(b'\n', start, position) + 1
+            if line_start == 0:
+                line_start = start
+            end, next_start = _line_bounds(mapped, position, size)
+            line = _strip_line(mapped[line_start:end])
+            if needle in line:
+                yield line
+            start = next_start
+
+
+class RecordQueryable(Queryable):
+    """A queryable over the fixed-width records of a memory mapped file.
+
+    Each record is unpacked with :mod:`struct`. Since every record has the same size, skipping,
+    taking, counting and indexing are computed from record offsets instead of scanning the file.
+    """
+
+    def __init__(self, path, struct_fmt, start=0, stop=None):
+        super(RecordQueryable, self).__init__(None)
+        self.path = path
+        self.struct_fmt = struct_fmt
+        self.record = struct.Struct(struct_fmt)
+        self.start = start
+        self.stop = stop
+
+    def __iter__(self):
+        mapped = _map_file(self.path)
+        if mapped is None:
+            return
+        try:
+            unpack_from = self.record.unpack_from
+            record_size = self.record.size
+            start, stop = self._bounds(len(mapped))
+            for offset in checked(range(start * record_size, stop * record_size, record_size)):
+                yield unpack_from(mapped, offset)
+        finally:
+            mapped.close()
+
+    def _bounds(self, size=None):
+        """Returns the indices of the first and last record in this queryable.
+
+        :param size: (optional) The size of the file in bytes.
+        :type size: int
+        :return: A tuple of the first record index and one past the last record index.
+        :rtype: tuple
+        """
+        if size is None:
+            size = os.path.getsize(self.path)
+        stop = size // self.record.size
+        if self.stop is not None:
+            stop = min(stop, self.stop)
+        return min(self.start, stop), stop
+
+    def _length_hint(self):
+        start, stop = self._bounds()
+        return stop - start
+
+    def count(self, predicate=true):
+        """Returns the number of records in the sequence.
+
+        :param predicate: (optional) A function to test each record for a condition:
+        :type predicate: function
+        :return: The number of records that satisfy the specified condition.
+        :rtype: int
+        :raise TypeError: if 'predicate' is not callable
+        """
+        if predicate is not true:
+            return super(RecordQueryable, self).count(predicate)
+        start, stop = self._bounds()
+        return stop - start
+
+    def element_at(self, index):
+        """Returns the record at the specified location in the sequence.
+
+        :param index: The zero-based index of the record to retrieve.
+        :type index: int
+        :return: The record at the specified location in the sequence.
+        :rtype: tuple
+        :raise TypeError: if 'index' is not an int
+        :raise IndexError: if 'index' is less than zero or larger than the number of records
+        """
+        if not isinstance(index, int):
+            raise TypeError("Value for 'index' is not an integer.")
+        start, stop = self._bounds()
+        if index < 0 or start + index >= stop:
+            raise IndexError("The provided index is out of range.")
+        with open(self.path, 'rb') as f:
+            f.seek((start + index) * self.record.size)
+            return self.record.unpack(f.read(self.record.size))
+
+    def skip(self, num):
+        """Skips a specified number of records in the sequence and returns the remaining records.
+
+        :param num: The number of records to skip.
+        :type num: int
+        :return: A sequence containing the records after position 'num'.
+        :rtype: :class:`RecordQueryable`
+        :raise TypeError: if 'num' is not an int
+        """
+        if not isinstance(num, int):
+            raise TypeError("Value for 'num' is not an integer.")
+        return RecordQueryable(self.path, self.struct_fmt, self.start + max(num, 0), self.stop)
+
+    def take(self, num):
+        """Takes the specified number of records from the start of the sequence.
+
+        :param num: The number of records to take.
+        :type num: int
+        :return: The specified number of records from the start of the sequence.
+        :rtype: :class:`RecordQueryable`
+        :raise TypeError: if 'num' is not an int
+        """
+        if not isinstance(num, int):
+            raise TypeError("Value for 'num' is not an integer.")
+        stop = self.start + max(num, 0)
+        if self.stop is not None:
+            stop = min(stop, self.stop)
+        return RecordQueryable(self.path, self.struct_fmt, self.start, stop)
+
+
+def _picklable(value):
+    """Determines whether 'value' can be sent to a worker process."""
+    try:
+        pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return False
+    return True
+
+
+def _partition_file(path, size, partition_size):
+    """Splits a file into byte ranges that start and end on line boundaries.
+
+    :param path: The path of the file to split.
+    :param size: The size of the file in bytes.
+    :param partition_size: The approximate size of each partition in bytes.
+    :return: A list of (path, start, stop) tuples covering the whole file.
+    :rtype: list
+    """
+    bounds = [0]
+    with open(path, 'rb') as f:
+        while bounds[-1] + partition_size < size:
+            f.seek(bounds[-1] + partition_size)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return [(path, start, stop) for start, stop in zip(bounds, bounds[1:])]
+
+
+def _scan_partition(task):
+    """Parses the lines of a single partition and applies the element-wise stages to them.
+
+    This runs in the worker processes, so everything in 'task' must be picklable.
+
+    :param task: A tuple of the path, start offset, stop offset, parser, encoding and stages.
+    :return: The elements produced by the partition.
+    :rtype: list
+    """
+    path, start, stop, parser, encoding, stages = task
+    mapped = _map_file(path)
+    if mapped is None:
+        return []
+    results = []
+    try:
+        for line in _lines(mapped, start, stop):
+            if encoding is not None:
+                line = line.decode(encoding)
+            elements = [parser(line) if parser is not None else line]
+            for stage, function in stages:
+                if stage == 'where':
+                    elements = [element for element in elements if function(element)]
+                elif stage == 'select':
+                    elements = [function(element) for element in elements]
+                else:
+                    elements = [sub_element for element in elements
+                                for sub_element in function(element)]
+            results.extend(elements)
+    finally:
+        mapped.close()
+    return results
+
+
+def _sketch_partition(task):
+    """Builds a HyperLogLog sketch of the keys of a single partition in a worker process.
+
+    :param task: A tuple of the arguments of :func:`_scan_partition`, the key selector and the
+        precision of the sketch.
+    :return: The sketch of the partition.
+    :rtype: :class:`HyperLogLog <pinq.sketches.HyperLogLog>`
+    """
+    task, key_selector, precision = task
+    sketch = HyperLogLog(precision)
+    sketch.update(key_selector(element) for element in _scan_partition(task))
+    return sketch
+
+
+def _accumulate_partition(task):
+    """Adds the elements of a single partition to accumulators in a worker process.
+
+    :param task: A tuple of the arguments of :func:`_scan_partition` and the template
+        accumulators, by name.
+    :return: The accumulators of the partition, by name.
+    :rtype: dict
+    """
+    task, accumulators = task
+    elements = _scan_partition(task)
+    accumulators = dict([(name, accumulator.empty())
+                         for name, accumulator in accumulators.items()])
+    for accumulator in accumulators.values():
+        accumulator.update(elements)
+    return accumulators
+
+
+class PartitionedQueryable(Queryable):
+    """A queryable over line delimited files that are parsed in parallel.
+
+    The input is split into byte ranges aligned to line boundaries, and each range is parsed by a
+    pool of worker processes. Element-wise operators (:meth:`where`, :meth:`select` and
+    :meth:`select_many` with single argument functions) are run in the workers as well; every
+    other operator consumes the merged stream of results in the original order of the input.
+
+    Functions are sent to the workers by pickling them. Element-wise operators and aggregates
+    whose functions cannot be pickled, such as lambdas, run in this process on the merged
+    stream instead. A parser that cannot be pickled is run in this process too, with a
+    RuntimeWarning, since no work can then be done in the workers.
+    """
+
+    def __init__(self, path, parser=None, encoding=None, partitions=None, processes=None,
+                 stages=()):
+        super(PartitionedQueryable, self).__init__(None)
+        self.path = path
+        self.parser = parser
+        self.encoding = encoding
+        self.processes = processes or cpu_count()
+        self.partitions = partitions or self.processes * 4
+        self.stages = tuple(stages)
+        if self.processes > 1 and not _picklable(parser):
+            warnings.warn("The parser cannot be pickled, so '%s' is parsed in a single process."
+                          % path, RuntimeWarning, stacklevel=2)
+            self.processes = 1
+
+    def __iter__(self):
+        results = self._map(_scan_partition, self._tasks())
+        for element in checked(chain.from_iterable(results)):
+            yield element
+
+    def _map(self, function, tasks):
+        """Yields the results of running 'function' on each task in the worker processes."""
+        if self.processes == 1 or len(tasks) <= 1:
+            for task in tasks:
+                yield function(task)
+            return
+        pool = Pool(min(self.processes, len(tasks)))
+        try:
+            for result in pool.imap(function, tasks):
+                yield result
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _in_workers(self, *functions):
+        """Determines whether 'functions' can be run in the worker processes."""
+        return self.processes == 1 or all(_picklable(function) for function in functions)
+
+    def _tasks(self):
+        """Returns the arguments of :func:`_scan_partition` for each partition."""
+        return [(path, start, stop, self.parser, self.encoding, self.stages)
+                for path, start, stop in self._partitions()]
+
+    def _accumulate(self, accumulators):
+        """Adds the elements of each partition to accumulators in the worker processes, and
+        merges them, or adds every element in this process if the accumulators, with their
+        transforms, cannot be pickled.
+        """
+        if not self._in_workers(accumulators):
+            return super(PartitionedQueryable, self)._accumulate(accumulators)
+        merged = dict([(name, accumulator.empty())
+                       for name, accumulator in accumulators.items()])
+        tasks = [(task, accumulators) for task in self._tasks()]
+        for partition in checked(self._map(_accumulate_partition, tasks)):
+            for name, accumulator in partition.items():
+                merged[name].merge(accumulator)
+        return merged
+
+    def count_distinct(self, key_selector=identity, approximate=False, precision=14):
+        """Returns the number of distinct keys in the sequence.
+
+        If 'approximate' is set and 'key_selector' can be pickled, a HyperLogLog sketch of each
+        partition is built in the worker processes, and only the sketches are merged.
+
+        :param key_selector: (optional) A function to select a key for comparing values.
+        :type key_selector: function
+        :param approximate: (optional) Whether to estimate the count with a HyperLogLog sketch.
+        :type approximate: bool
+        :param precision: (optional) The precision of the sketch, if 'approximate' is set.
+        :type precision: int
+        :return: The number of distinct keys.
+        :rtype: int
+        :raise TypeError: if 'key_selector' is not callable
+        :raise TypeError: if 'precision' is not an int
+        :raise ValueError: if 'precision' is not between 4 and 18
+        """
+        if not callable(key_selector):
+            raise TypeError("Value for 'key_selector' is not callable.")
+        if not approximate or not self._in_workers(key_selector):
+            return super(PartitionedQueryable, self).count_distinct(key_selector, approximate,
+                                                                    precision)
+        sketch = HyperLogLog(precision)
+        tasks = [(task, key_selector, precision) for task in self._tasks()]
+        for partition_sketch in checked(self._map(_sketch_partition, tasks)):
+            sketch.merge(partition_sketch)
+        return len(sketch)
+
+    def _files(self):
+        """Returns the paths and sizes of the non-empty files to scan."""
+        if not os.path.isdir(self.path):
+            return [(self.path, os.path.getsize(self.path))]
+        files = []
+        for directory, dirnames, filenames in os.walk(self.path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(directory, filename)
+                files.append((path, os.path.getsize(path)))
+        return [(path, size) for path, size in files if size > 0]
+
+    def _partitions(self):
+        """Returns the byte ranges of the input files, in order."""
+        files = self._files()
+        total_size = sum(size for _, size in files)
+        partition_size = max(1, total_size // self.partitions)
+        partitions = []
+        for path, size in files:
+            partitions.extend(_partition_file(path, size, partition_size))
+        return partitions
+
+    def _with_stage(self, stage, function):
+        """Returns a copy of this queryable with an additional element-wise stage."""
+        return PartitionedQueryable(self.path, self.parser, self.encoding, self.partitions,
+                                    self.processes, self.stages + ((stage, function),))
+
+    def select(self, selector):
+        """Returns the elements of the sequence after applying a transform function to each element.
+
+        Single argument selectors that can be pickled are applied in the worker processes.
+
+        :param selector: A transform function to apply to each element.
+        :type selector: function
+        :return: The elements of the sequence after applying the transform function.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'selector' is not callable
+        """
+        if not callable(selector):
+            raise TypeError("Value for 'selector' is not callable.")
+        if selector.__code__.co_argcount != 1 or not self._in_workers(selector):
+            return super(PartitionedQueryable, self).select(selector)
+        return self._with_stage('select', selector)
+
+    def select_many(self, selector, result_transform=None):
+        """Projects each element to a sequence and flattens the resulting sequences.
+
+        Single argument selectors that can be pickled, without a result transform, are applied
+        in the worker processes.
+
+        :param selector: A function to transform each element into a sequence.
+        :type selector: function
+        :param result_transform: (optional) A transform function for items of the selected sequence.
+        :type result_transform: function
+        :return: A flattened sequence of transformed elements.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'selector' is not callable
+        :raise TypeError: if 'result_transform' is not callable
+        """
+        if not callable(selector):
+            raise TypeError("Value for 'selector' is not callable.")
+        if result_transform is not None:
+            return super(PartitionedQueryable, self).select_many(selector, result_transform)
+        if selector.__code__.co_argcount != 1 or not self._in_workers(selector):
+            return super(PartitionedQueryable, self).select_many(selector)
+        return self._with_stage('select_many', selector)
+
+    def where(self, predicate):
+        """Filters the sequence of values based on the specified condition.
+
+        Single argument predicates that can be pickled are applied in the worker processes.
+
+        :param predicate: A function to check an element for a condition.
+        :type condition: function
+        :return: The elements of the sequence that satisfy the condition.
+        :rtype: :class:`Queryable`
+        :raise TypeError: if 'predicate' is not callable
+        """
+        if not callable(predicate):
+            raise TypeError("Value for 'predicate' is not callable.")
+        if predicate.__code__.co_argcount != 1 or not self._in_workers(predicate):
+            return super(PartitionedQueryable, self).where(predicate)
+        return self._with_stage('where', predicate)
+
+
+class PersistedQueryable(Queryable):
+    """A queryable over a result persisted by :meth:`Queryable.persist`.
+
+    The file is memory mapped and its chunks are decoded lazily on every iteration. The footer of
+    the file is read when the queryable is created, so the number of elements, the fingerprint
+    of the inputs and the digest of the data are available without reading the elements.
+    """
+
+    def __init__(self, path):
+        super(PersistedQueryable, self).__init__(None)
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(PERSIST_MAGIC)) != PERSIST_MAGIC:
+                raise ValueError("The file '%s' is not a persisted result." % path)
+            f.seek(-PERSIST_LENGTH.size, os.SEEK_END)
+            footer_size = PERSIST_LENGTH.unpack(f.read(PERSIST_LENGTH.size))[0]
+            f.seek(-PERSIST_LENGTH.size - footer_size, os.SEEK_END)
+            footer = json.loads(f.read(footer_size).decode('utf-8'))
+        self.typecode = footer['typecode']
+        self.fingerprint = footer['fingerprint']
+        self.digest = footer['digest']
+        self._chunks = footer['chunks']
+        self._data_end = footer['data_end']
+        self._length = footer['count']
+
+    def __iter__(self):
+        mapped = _map_file(self.path)
+        try:
+            if self.typecode is None:
+                chunks = (self._load_chunk(mapped, offset) for offset, _ in self._chunks)
+            else:
+                chunks = self._load_arrays(mapped)
+            for element in checked(chain.from_iterable(chunks)):
+                yield element
+        finally:
+            mapped.close()
+
+    def _load_arrays(self, mapped):
+        """Yields the fixed-width elements of the mapped file as arrays of about 64KiB."""
+        itemsize = array(self.typecode).itemsize
+        chunk_size = max(1, (1 << 16) // itemsize) * itemsize
+        for offset in range(len(PERSIST_MAGIC), self._data_end, chunk_size):
+            elements = array(self.typecode)
+            array_from_bytes(elements, mapped[offset:min(offset + chunk_size, self._data_end)])
+            yield elements
+
+    @staticmethod
+    def _load_chunk(mapped, offset):
+        """Unpickles the chunk of elements starting at 'offset' in the mapped file."""
+        size = PERSIST_LENGTH.unpack_from(mapped, offset)[0]
+        start = offset + PERSIST_LENGTH.size
+        return pickle.loads(mapped[start:start + size])
+
+    def count(self, predicate=true):
+        """Returns the number of elements in the sequence.
+
+        :param predicate: (optional) A function to test each element for a condition:
+        :type predicate: function
+        :return: The number of elements that satisfy the specified condition.
+        :rtype: int
+        :raise TypeError: if 'predicate' is not callable
+        """
+        if predicate is not true:
+            return super(PersistedQueryable, self).count(predicate)
+        return self._length
+
+    def element_at(self, index):
+        """Returns the element at the specified location in the sequence.
+
+        Only the chunk containing the element is decoded.
+
+        :param index: The zero-based index of the element to retrieve.
+        :type index: int
+        :return: The element at the specified location in the sequence.
+        :raise TypeError: if 'index' is not an int
+        :raise IndexError: if 'index' is less than zero or larger than the number of elements
+        """
+        if not isinstance(index, int):
+            raise TypeError("Value for 'index' is not an integer.")
+        if index < 0 or index >= self._length:
+            raise IndexError("The provided index is out of range.")
+        mapped = _map_file(self.path)
+        try:
+            if self.typecode is None:
+                chunk = bisect_right([first for _, first in self._chunks], index) - 1
+                offset, first = self._chunks[chunk]
+                return self._load_chunk(mapped, offset)[index - first]
+            elements = array(self.typecode)
+            offset = len(PERSIST_MAGIC) + index * elements.itemsize
+            array_from_bytes(elements, mapped[offset:offset + elements.itemsize])
+            return elements[0]
+        finally:
+            mapped.close()
+
+    def verify(self):
+        """Determines whether the persisted data matches the digest recorded when it was written.
+
+        :return: True if the data is intact.
+        :rtype: bool
+        """
+        digest = hashlib.sha1()
+        with open(self.path, 'rb') as f:
+            f.seek(len(PERSIST_MAGIC))
+            remaining = self._data_end - len(PERSIST_MAGIC)
+            while remaining > 0:
+                data = f.read(min(remaining, 1 << 20))
+                if not data:
+                    break
+                digest.update(data)
+                remaining -= len(data)
+        return digest.hexdigest() == self.digest
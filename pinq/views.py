@@ -0,0 +1,328 @@
+"""
+pinq.views
+~~~~~~~~~~
+
+This module implements append-only sources and materialized views of queries over them, which
+are kept current by applying only the elements appended since they were last read.
+
+:copyright: (c) 2016 by David Shriver.
+:license: MIT, see LICENSE for more details.
+"""
+
+import threading
+from itertools import count
+from .accumulators import Accumulator
+from .compat import *
+from .queryable import Queryable, _key_groups
+from .sketches import BloomFilter
+from .transforms import identity, select_i
+
+
+class ObservableSource(object):
+    """An append-only sequence, whose queries can be maintained incrementally by views.
+
+    Queries are built over the source with :func:`as_queryable <pinq.api.as_queryable>`, which
+    copies the elements the source has when the queryable is created, so a queryable does not
+    see elements appended after it; a :class:`MaterializedView` of the query does. Elements may
+    be appended from any thread, but are never removed or replaced.
+
+    :param iterable: (optional) The initial elements of the source.
+    :type iterable: Iterable
+    """
+
+    def __init__(self, iterable=()):
+        self._elements = list(iterable)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._elements)
+
+    def __iter__(self):
+        return iter(list(self._elements))
+
+    def append(self, element):
+        """Appends an element to the source."""
+        with self._lock:
+            self._elements.append(element)
+
+    def extend(self, iterable):
+        """Appends every element of 'iterable' to the source."""
+        elements = list(iterable)
+        with self._lock:
+            self._elements.extend(elements)
+
+    def since(self, version):
+        """Returns the elements appended after the source had the given version.
+
+        :param version: A previous version of the source.
+        :type version: int
+        :return: The appended elements, and the current version.
+        :rtype: tuple
+        """
+        with self._lock:
+            return self._elements[version:], len(self._elements)
+
+
+def _indexed(function):
+    """Returns a function of an element that also passes the index of each element, if
+    'function' takes one.
+    """
+    if function.__code__.co_argcount == 1:
+        return function
+    index = count()
+    return lambda element: function(element, next(index))
+
+
+def _paired(result_transform):
+    """Returns a function of two values that applies 'result_transform' to them as a pair, if
+    it takes a single argument.
+    """
+    if result_transform.__code__.co_argcount == 1:
+        return lambda element, other: result_transform((element, other))
+    return result_transform
+
+
+def _cast(to_type):
+    return lambda elements: [to_type(element) for element in elements]
+
+
+def _distinct(key_selector=identity, approximate=False, capacity=1 << 20, error_rate=0.01):
+    if approximate:
+        seen = BloomFilter(capacity, error_rate)
+        return lambda elements: [element for element in elements
+                                 if not seen.add(key_selector(element))]
+    keys = {}
+
+    def _new(element):
+        key = key_selector(element)
+        if key in keys:
+            return False
+        keys[key] = 1
+        return True
+    return lambda elements: [element for element in elements if _new(element)]
+
+
+def _join(other, key_selector, other_key_selector, result_transform):
+    groups = _key_groups(other, other_key_selector, None)
+    result_transform = _paired(result_transform)
+    return lambda elements: [result_transform(element, other_element) for element in elements
+                             for other_element in groups.get(key_selector(element), ())]
+
+
+def _of_type(of_type):
+    return lambda elements: [element for element in elements if isinstance(element, of_type)]
+
+
+def _select(selector):
+    selector = _indexed(selector)
+    return lambda elements: [selector(element) for element in elements]
+
+
+def _select_many(selector, result_transform=select_i(1)):
+    selector = _indexed(selector)
+    return lambda elements: [result_transform(element, sub_element) for element in elements
+                             for sub_element in selector(element)]
+
+
+def _skip(num):
+    remaining = [max(num, 0)]
+
+    def _skip_elements(elements):
+        skipped = min(remaining[0], len(elements))
+        remaining[0] -= skipped
+        return elements[skipped:]
+    return _skip_elements
+
+
+def _stream():
+    return lambda elements: elements
+
+
+def _take(num):
+    remaining = [max(num, 0)]
+
+    def _take_elements(elements):
+        taken = elements[:remaining[0]]
+        remaining[0] -= len(taken)
+        return taken
+    return _take_elements
+
+
+def _where(predicate):
+    predicate = _indexed(predicate)
+    return lambda elements: [element for element in elements if predicate(element)]
+
+
+# The operators that views apply incrementally, and functions taking the arguments of each
+# operator and returning a function that maps a list of new input elements to a list of new
+# output elements.
+STAGES = dict([
+    ('cast', _cast), ('distinct', _distinct), ('join', _join), ('of_type', _of_type),
+    ('select', _select), ('select_many', _select_many), ('skip', _skip), ('stream', _stream),
+    ('take', _take), ('where', _where)])
+
+
+class MaterializedView(object):
+    """The current result of a query over an :class:`ObservableSource`.
+
+    The operators of the query are applied once to the initial elements of the source, and
+    afterwards only to the elements appended since the view was last read, so keeping the view
+    current costs time proportional to the new elements rather than to the whole source, and
+    its result is only rebuilt when the query produced new elements. The operators in
+    :data:`STAGES` are supported, with a join's other sequence read once when the view is
+    created, and the query may end with a :meth:`group_by <pinq.queryable.Queryable.group_by>`.
+
+    If accumulators are given, the view keeps their aggregates of the elements of the query,
+    for each key of 'group_by' if it is given, instead of the elements themselves.
+
+    :param queryable: The query to maintain.
+    :type queryable: :class:`Queryable`
+    :param group_by: (optional) A function to extract the key of the group of each element.
+    :type group_by: function
+    :param accumulators: The accumulators of the aggregates to maintain, by name.
+    :raise TypeError: if 'group_by' is not callable or an accumulator is not an Accumulator
+    :raise ValueError: if the query is not over an ObservableSource, or has an operator that
+        cannot be maintained incrementally
+    """
+
+    def __init__(self, queryable, group_by=None, **accumulators):
+        if group_by is not None and not callable(group_by):
+            raise TypeError("Value for 'group_by' is not callable.")
+        for name, accumulator in accumulators.items():
+            if not isinstance(accumulator, Accumulator):
+                raise TypeError("Value for '%s' is not an Accumulator." % name)
+        if group_by is not None and not accumulators:
+            raise ValueError("Accumulators must be given with 'group_by'.")
+        lineage = []
+        while queryable._lineage is not None:
+            lineage.append(queryable._lineage)
+            queryable = queryable._lineage[0]
+        lineage.reverse()
+        if not isinstance(queryable._source, ObservableSource):
+            raise ValueError("Query is not over an ObservableSource.")
+        self.source = queryable._source
+        self._grouping = None
+        self._stages = []
+        for index, (_, operator, args, kwargs) in enumerate(lineage):
+            if operator == 'group_by' and index == len(lineage) - 1 and not accumulators:
+                self._grouping = self._group_by(*args, **kwargs)
+            elif operator in STAGES:
+                self._stages.append(STAGES[operator](*args, **kwargs))
+            else:
+                raise ValueError("Operator '%s' cannot be maintained incrementally." % operator)
+        self._group_by_key = group_by
+        self._accumulators = accumulators
+        self._elements = []
+        self._groups = {}
+        self._result = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _group_by(key_selector, value_transform=identity, result_transform=identity):
+        return key_selector, value_transform, result_transform
+
+    def refresh(self):
+        """Applies the elements appended to the source since the view was last read.
+
+        :return: The number of appended elements.
+        :rtype: int
+        """
+        with self._lock:
+            elements, self._version = self.source.since(self._version)
+            if not elements:
+                return 0
+            appended = len(elements)
+            for stage in self._stages:
+                elements = stage(elements)
+            if elements:
+                self._result = None
+            if self._accumulators:
+                self._accumulate(elements)
+            elif self._grouping is not None:
+                key_selector, value_transform, _ = self._grouping
+                for element in elements:
+                    key = key_selector(element)
+                    values = self._groups.get(key)
+                    if values is None:
+                        values = self._groups[key] = []
+                    values.append(value_transform(element))
+            else:
+                self._elements.extend(elements)
+            return appended
+
+    def _accumulate(self, elements):
+        """Adds new elements of the query to the accumulators of their groups."""
+        if self._group_by_key is None:
+            groups = {None: elements}
+        else:
+            groups = _key_groups(elements, self._group_by_key, None)
+        for key, group in groups.items():
+            accumulators = self._groups.get(key)
+            if accumulators is None:
+                accumulators = self._groups[key] = dict([
+                    (name, accumulator.empty())
+                    for name, accumulator in self._accumulators.items()])
+            for accumulator in accumulators.values():
+                accumulator.update(group)
+
+    def result(self):
+        """Returns the current result of the query, after applying any appended elements.
+
+        The result is built only when the query produced new elements since it was last read,
+        and is otherwise shared between reads, so it must not be modified.
+
+        :return: A list of the elements of the query, or of its groups, ordered by key, if it
+            ends with a group_by. With accumulators, a dict of the result of each accumulator,
+            or a dict of those dicts by key if 'group_by' was given.
+        """
+        self.refresh()
+        with self._lock:
+            if self._result is None:
+                self._result = self._build_result()
+            return self._result
+
+    def _build_result(self):
+        """Builds the result of the query from the elements, groups or accumulators."""
+        if self._accumulators:
+            results = dict([(key, dict([(name, accumulator.result())
+                                        for name, accumulator in accumulators.items()]))
+                            for key, accumulators in self._groups.items()])
+            if self._group_by_key is None:
+                return results.get(None) or dict([
+                    (name, accumulator.empty().result())
+                    for name, accumulator in self._accumulators.items()])
+            return results
+        if self._grouping is not None:
+            _, _, result_transform = self._grouping
+            groups = [(key, list(self._groups[key])) for key in sorted(self._groups)]
+            if result_transform.__code__.co_argcount == 1:
+                return [result_transform(group) for group in groups]
+            return [result_transform(*group) for group in groups]
+        return list(self._elements)
+
+
+def materialized_view(queryable, group_by=None, **accumulators):
+    """Creates a view of a query over an :class:`ObservableSource` that is kept current
+    incrementally.
+
+    :param queryable: The query to maintain.
+    :type queryable: :class:`Queryable`
+    :param group_by: (optional) A function to extract the key of the group of each element.
+    :type group_by: function
+    :param accumulators: The accumulators of the aggregates to maintain, by name.
+    :return: The view of the query.
+    :rtype: :class:`MaterializedView`
+
+    Usage::
+
+      >>> source = pinq.ObservableSource()
+      >>> view = pinq.materialized_view(pinq.as_queryable(source).where(lambda x: x > 0),
+      ...                               group_by=lambda x: x % 2, total=pinq.sum_of())
+      >>> source.extend([1, 2, 3])
+      >>> view.result()
+      {0: {'total': 2}, 1: {'total': 4}}
+    """
+    if not isinstance(queryable, Queryable):
+        raise TypeError("Value for 'queryable' is not a Queryable.")
+    return MaterializedView(queryable, group_by, **accumulators)
@@ -0,0 +1,382 @@
+"""
+pinq.windows
+~~~~~~~~~~~~
+
+This module implements the windowing of possibly unbounded sequences into tumbling, sliding and
+session windows, the aggregates that are maintained incrementally as windows advance, and
+SQL-style window functions over ordered partitions.
+
+:copyright: (c) 2016 by David Shriver.
+:license: MIT, see LICENSE for more details.
+"""
+
+import math
+from collections import deque
+from numbers import Number
+from .compat import *
+from .transforms import identity
+
+# The aggregates that can be computed incrementally over a window.
+AGGREGATES = ('average', 'count', 'max', 'min', 'sum')
+
+# The window functions that rank the elements of a partition.
+RANKINGS = ('dense_rank', 'rank', 'row_number')
+
+# The window functions that select a value from an earlier or later element of a partition.
+OFFSETS = ('lag', 'lead')
+
+# The number of transformed values buffered before they are folded into a window's aggregate.
+FOLD_SIZE = 1024
+
+
+class _WindowAggregate(object):
+    """An aggregate of the values in a window, updated as values enter and leave it.
+
+    Values leave the window in the order they entered it. The minimum and maximum are kept with
+    monotonic deques of the values that may still become the extreme, so every value is pushed
+    and popped at most once.
+    """
+
+    def __init__(self, aggregate):
+        self.aggregate = aggregate
+        self.clear()
+
+    def clear(self):
+        """Removes every value from the window."""
+        self.count = 0
+        self.total = 0
+        self.entered = 0
+        self.extremes = deque()
+
+    def push(self, value):
+        """Adds a value to the end of the window."""
+        self.count += 1
+        if self.aggregate in ('sum', 'average'):
+            self.total += value
+        elif self.aggregate in ('min', 'max'):
+            extremes = self.extremes
+            if self.aggregate == 'min':
+                while extremes and not extremes[-1][1] < value:
+                    extremes.pop()
+            else:
+                while extremes and not value < extremes[-1][1]:
+                    extremes.pop()
+            extremes.append((self.entered, value))
+        self.entered += 1
+
+    def pop(self, value):
+        """Removes the value at the start of the window."""
+        if self.aggregate in ('sum', 'average'):
+            self.total -= value
+        elif self.aggregate in ('min', 'max'):
+            if self.extremes[0][0] == self.entered - self.count:
+                self.extremes.popleft()
+        self.count -= 1
+
+    def result(self):
+        """Returns the aggregate of the values in the window."""
+        if self.aggregate == 'count':
+            return self.count
+        elif self.aggregate == 'sum':
+            return self.total
+        elif self.aggregate == 'average':
+            return self.total / float(self.count)
+        return self.extremes[0][1]
+
+
+def _fold(aggregate, partial, values):
+    """Combines the partial aggregate of a window with the aggregate of more of its values."""
+    if aggregate == 'count':
+        return len(values) + (partial or 0)
+    elif aggregate in ('sum', 'average'):
+        return sum(values) + (partial or 0)
+    value = min(values) if aggregate == 'min' else max(values)
+    if partial is None:
+        return value
+    return min(partial, value) if aggregate == 'min' else max(partial, value)
+
+
+class _Window(object):
+    """The current window of a windowing operator, either as a list of its elements or as an
+    aggregate of their transformed values.
+
+    Transformed values are buffered and folded into the aggregate in chunks of
+    :data:`FOLD_SIZE`, so windows of any length are aggregated in bounded memory.
+    """
+
+    def __init__(self, aggregate, transform):
+        self.aggregate = aggregate
+        self.transform = transform
+        self.values = []
+        self.partial = None
+        self.folded = 0
+
+    def __len__(self):
+        return self.folded + len(self.values)
+
+    def add(self, element):
+        """Adds an element to the window."""
+        if self.aggregate is None:
+            self.values.append(element)
+            return
+        self.values.append(self.transform(element))
+        if len(self.values) >= FOLD_SIZE:
+            self._fold()
+
+    def _fold(self):
+        """Folds the buffered values into the aggregate."""
+        self.partial = _fold(self.aggregate, self.partial, self.values)
+        self.folded += len(self.values)
+        self.values = []
+
+    def close(self):
+        """Returns the result of the window and starts a new, empty window."""
+        if self.aggregate is None:
+            values, self.values = self.values, []
+            return values
+        if self.values:
+            self._fold()
+        result, count = self.partial, self.folded
+        self.partial = None
+        self.folded = 0
+        if self.aggregate == 'average':
+            return result / float(count)
+        return result
+
+
+def tumbling_windows(iterable, size, time_selector=None, aggregate=None, transform=identity):
+    """Yields consecutive, non-overlapping windows of a sequence.
+
+    Without a 'time_selector', each window holds 'size' elements. Otherwise, each window holds
+    the elements whose times fall in the same interval [n * 'size', (n + 1) * 'size'), for
+    numeric times, or [first + n * 'size', first + (n + 1) * 'size') for other times, such as
+    datetimes with a timedelta 'size', where 'first' is the time of the first element. Times
+    must not decrease, and an element with an earlier time than its predecessor is added to
+    the current window. A window is yielded as soon as the first element after it arrives, and
+    the last, possibly partial, window when the sequence ends.
+    """
+    if time_selector is None:
+        iterator = iter(iterable)
+        while True:
+            window = list(islice(iterator, size))
+            if not window:
+                return
+            if aggregate is None:
+                yield window
+                continue
+            if transform is not identity:
+                window = [transform(element) for element in window]
+            result = _fold(aggregate, None, window)
+            yield result / float(len(window)) if aggregate == 'average' else result
+    window = _Window(aggregate, transform)
+    current = None
+    first = None
+    for element in iterable:
+        time = time_selector(element)
+        if isinstance(size, Number):
+            interval = int(math.floor(time / float(size)))
+        else:
+            if first is None:
+                first = time
+            interval = _intervals(time - first, size)
+        if current is not None and interval > current and len(window):
+            yield window.close()
+        if current is None or interval > current:
+            current = interval
+        window.add(element)
+    if len(window):
+        yield window.close()
+
+
+def _intervals(duration, size):
+    """Returns the number of whole intervals of length 'size' in 'duration', which may be
+    timedeltas.
+    """
+    try:
+        return int(duration // size)
+    except TypeError:
+        # Python 2 cannot divide a timedelta by a timedelta.
+        return int(math.floor(duration.total_seconds() / size.total_seconds()))
+
+
+def sliding_windows(iterable, size, step=1, aggregate=None, transform=identity):
+    """Yields the windows of the last 'size' elements of a sequence, once 'size' elements have
+    arrived and then after every 'step' further elements.
+
+    Windows are yielded as lists of elements, or as the value of the aggregate, which is
+    updated as each element enters and leaves the window rather than recomputed.
+    """
+    elements = deque()
+    window = None
+    if aggregate is not None:
+        window = _WindowAggregate(aggregate)
+    countdown = size
+    for element in iterable:
+        value = element if window is None else transform(element)
+        elements.append(value)
+        if window is not None:
+            window.push(value)
+        if len(elements) > size:
+            oldest = elements.popleft()
+            if window is not None:
+                window.pop(oldest)
+        countdown -= 1
+        if not countdown:
+            countdown = step
+            if window is None:
+                yield list(elements)
+            else:
+                yield window.result()
+
+
+def session_windows(iterable, gap, time_selector, aggregate=None, transform=identity):
+    """Yields windows of consecutive elements whose times are no more than 'gap' apart.
+
+    A session is yielded as soon as the first element more than 'gap' after its last element
+    arrives, and the last session when the sequence ends.
+    """
+    window = _Window(aggregate, transform)
+    last = None
+    for element in iterable:
+        time = time_selector(element)
+        if last is not None and time - last > gap:
+            yield window.close()
+        if last is None or time > last:
+            last = time
+        window.add(element)
+    if len(window):
+        yield window.close()
+
+
+def parse_window_functions(functions):
+    """Checks the window functions given to :meth:`Queryable.with_window`.
+
+    Each function is given as the name of a ranking function or aggregate, or as a tuple of the
+    name and its arguments: ('lag', selector, offset, default), ('lead', selector, offset,
+    default), or (aggregate, transform).
+
+    :return: The (name, function, selector, offset, default) tuple of each window function.
+    :rtype: list
+    """
+    if not isinstance(functions, dict):
+        raise TypeError("Value for 'functions' is not a dict.")
+    if not functions:
+        raise ValueError("Value for 'functions' must not be empty.")
+    parsed = []
+    for name, spec in functions.items():
+        if not isinstance(spec, tuple):
+            spec = (spec,)
+        function, arguments = spec[0], spec[1:]
+        if function in RANKINGS:
+            if arguments:
+                raise ValueError("Window function '%s' takes no arguments." % name)
+            parsed.append((name, function, None, 0, None))
+        elif function in OFFSETS:
+            if len(arguments) > 3:
+                raise ValueError("Window function '%s' takes at most 3 arguments." % name)
+            selector, offset, default = (arguments + (identity, 1, None)[len(arguments):])
+            if not callable(selector):
+                raise TypeError("Selector of window function '%s' is not callable." % name)
+            if not isinstance(offset, int):
+                raise TypeError("Offset of window function '%s' is not an integer." % name)
+            if offset <= 0:
+                raise ValueError("Offset of window function '%s' must be positive." % name)
+            parsed.append((name, function, selector, offset, default))
+        elif function in AGGREGATES:
+            if len(arguments) > 1:
+                raise ValueError("Window function '%s' takes at most 1 argument." % name)
+            transform = arguments[0] if arguments else identity
+            if not callable(transform):
+                raise TypeError("Transform of window function '%s' is not callable." % name)
+            parsed.append((name, function, transform, 0, None))
+        else:
+            raise ValueError("Window function '%s' must be one of %s." % (
+                name, ", ".join(RANKINGS + OFFSETS + AGGREGATES)))
+    return parsed
+
+
+def _complete(pending, leads):
+    """Sets the 'lead' values of the oldest pending element of a partition, and returns it."""
+    element, values = pending[0]
+    for name, selector, offset, default in leads:
+        if offset < len(pending):
+            values[name] = selector(pending[offset][0])
+        else:
+            values[name] = default
+    return pending.popleft()
+
+
+def window_functions(iterable, functions, partition_key, order_key):
+    """Yields each element of a sequence with a dict of the values of its window functions.
+
+    The elements of each partition must be consecutive and ordered, and elements with equal
+    order keys rank equally. Only the elements needed by 'lag' and 'lead' are held: the
+    elements of each partition are yielded once the largest 'lead' offset of later elements
+    has arrived.
+
+    :param functions: The window functions, as returned by :func:`parse_window_functions`.
+    """
+    leads = [(name, selector, offset, default)
+             for name, function, selector, offset, default in functions if function == 'lead']
+    lookahead = max([offset for _, _, offset, _ in leads] or [0])
+    history = deque(maxlen=max([offset for _, function, _, offset, _ in functions
+                                if function == 'lag'] or [0]))
+    pending = deque()
+    partition = previous = None
+    row_number = rank = dense_rank = 0
+    states = {}
+    for element in iterable:
+        key = partition_key(element)
+        order = order_key(element)
+        if not row_number or key != partition:
+            while pending:
+                yield _complete(pending, leads)
+            history.clear()
+            states = {}
+            partition = key
+            row_number = rank = dense_rank = 0
+        row_number += 1
+        if row_number == 1 or order != previous:
+            rank = row_number
+            dense_rank += 1
+            previous = order
+        values = {}
+        for name, function, selector, offset, default in functions:
+            if function == 'row_number':
+                values[name] = row_number
+            elif function == 'rank':
+                values[name] = rank
+            elif function == 'dense_rank':
+                values[name] = dense_rank
+            elif function == 'lag':
+                if offset <= len(history):
+                    values[name] = selector(history[-offset])
+                else:
+                    values[name] = default
+            elif function != 'lead':
+                value = selector(element)
+                state = states.get(name)
+                if state is None:
+                    state = states[name] = [0, value]
+                elif function in ('sum', 'average'):
+                    state[1] += value
+                elif function == 'min' and value < state[1]:
+                    state[1] = value
+                elif function == 'max' and state[1] < value:
+                    state[1] = value
+                state[0] += 1
+                if function == 'count':
+                    values[name] = state[0]
+                elif function == 'average':
+                    values[name] = state[1] / float(state[0])
+                else:
+                    values[name] = state[1]
+        history.append(element)
+        if not leads:
+            yield element, values
+            continue
+        pending.append((element, values))
+        if len(pending) > lookahead:
+            yield _complete(pending, leads)
+    while pending:
+        yield _complete(pending, leads)
@@ -0,0 +1,84 @@
+import pickle
+import unittest
+from pinq.accumulators import Average, Count, Max, Min, Sum, Variance
+
+
+def square(x):
+    return x * x
+
+
+class accumulators_tests(unittest.TestCase):
+
+    def _merged(self, accumulator, left, right):
+        first, second = accumulator.empty(), accumulator.empty()
+        first.update(left)
+        second.update(right)
+        first.merge(pickle.loads(pickle.dumps(second)))
+        return first.result()
+
+    def test_count(self):
+        accumulator = Count(lambda x: x % 2 == 0)
+        accumulator.update(range(10))
+        self.assertEqual(accumulator.result(), 5)
+
+    def test_sum_compensated(self):
+        accumulator = Sum()
+        accumulator.update([1e100, 1.0, -1e100] * 10)
+        self.assertEqual(accumulator.result(), 10.0)
+
+    def test_sum_integers(self):
+        accumulator = Sum(square)
+        accumulator.update(range(4))
+        self.assertEqual(accumulator.result(), 14)
+        self.assertEqual(Sum().result(), 0)
+
+    def test_min_max(self):
+        low, high = Min(square), Max(square)
+        for accumulator in (low, high):
+            accumulator.update([-3, 1, 2])
+        self.assertEqual((low.result(), high.result()), (1, 9))
+        self.assertEqual((Min().result(), Max().result()), (None, None))
+
+    def test_average(self):
+        accumulator = Average()
+        accumulator.update([1e9 + 1, 1e9 + 2, 1e9 + 3])
+        self.assertEqual(accumulator.result(), 1e9 + 2)
+        self.assertEqual(Average().result(), None)
+
+    def test_variance_stable(self):
+        accumulator = Variance()
+        accumulator.update([1e9 + 4, 1e9 + 7, 1e9 + 13, 1e9 + 16])
+        self.assertEqual(accumulator.result(), 30.0)
+        population = Variance(sample=False)
+        population.update([4, 7, 13, 16])
+        self.assertEqual(population.result(), 22.5)
+
+    def test_variance_too_few(self):
+        accumulator = Variance()
+        accumulator.add(1)
+        self.assertEqual(accumulator.result(), None)
+        self.assertEqual(Variance(sample=False).result(), None)
+
+    def test_merge(self):
+        values = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3]
+        for accumulator in (Count(), Sum(square), Min(), Max(), Average()):
+            whole = accumulator.empty()
+            whole.update(values)
+            self.assertAlmostEqual(self._merged(accumulator, values[:3], values[3:]),
+                                   whole.result())
+            self.assertAlmostEqual(self._merged(accumulator, [], values), whole.result())
+            self.assertAlmostEqual(self._merged(accumulator, values, []), whole.result())
+        self.assertAlmostEqual(self._merged(Variance(), values[:4], values[4:]), 6.1)
+
+    def test_empty(self):
+        accumulator = Variance(square, sample=False)
+        accumulator.update([1, 2])
+        empty = accumulator.empty()
+        self.assertEqual((empty.count, empty.transform, empty.sample), (0, square, False))
+
+    def test_merge_value_error(self):
+        self.assertRaises(ValueError, Sum().merge, Count())
+
+    def test_accumulator_type_error(self):
+        self.assertRaises(TypeError, Sum, 100)
+        self.assertRaises(TypeError, Count, 100)
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import pinq
+
+
+def _endless():
+    i = 0
+    while True:
+        yield i
+        i += 1
+
+
+class cancellation_token_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.queryable = pinq.as_queryable(range(10000))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cancellation_token_inactive(self):
+        token = pinq.CancellationToken()
+        token.cancel()
+        self.assertEqual(self.queryable.count(), 10000)
+
+    def test_cancellation_token_not_cancelled(self):
+        with pinq.CancellationToken() as token:
+            self.assertEqual(self.queryable.where(lambda x: x % 2 == 0).count(), 5000)
+        self.assertFalse(token.cancelled)
+        self.assertEqual(token.remaining(), None)
+
+    def test_cancellation_token_cancelled(self):
+        with pinq.CancellationToken() as token:
+            token.cancel("stop")
+            self.assertRaises(pinq.QueryCancelled, self.queryable.to_list)
+        self.assertEqual(token.reason, "stop")
+
+    def test_cancellation_token_cancel_during_query(self):
+        token = pinq.CancellationToken(check_interval=16)
+
+        def _cancel_at(x):
+            if x == 100:
+                token.cancel()
+            return x
+        with token:
+            self.assertRaises(pinq.QueryCancelled,
+                              pinq.as_queryable(_endless()).select(_cancel_at).count)
+
+    def test_cancellation_token_from_other_thread(self):
+        token = pinq.CancellationToken()
+        threading.Timer(0.05, token.cancel).start()
+        with token:
+            self.assertRaises(pinq.QueryCancelled, pinq.as_queryable(_endless()).count)
+
+    def test_cancellation_token_timeout(self):
+        with pinq.CancellationToken(timeout=0.05) as token:
+            self.assertRaises(pinq.QueryCancelled,
+                              pinq.as_queryable(_endless()).where(lambda x: x < 0).first_or_default)
+        self.assertTrue(token.cancelled)
+        self.assertEqual(token.remaining(), 0.0)
+
+    def test_cancellation_token_deadline(self):
+        with pinq.CancellationToken(deadline=time.time() - 1):
+            self.assertRaises(pinq.QueryCancelled, self.queryable.to_list)
+
+    def test_cancellation_token_releases_spill_files(self):
+        token = pinq.CancellationToken(check_interval=16)
+
+        def _cancel_at(x):
+            if x == 9000:
+                token.cancel()
+            return x
+        with pinq.MemoryBudget(4096, spill=True, spill_directory=self.directory) as budget:
+            with token:
+                self.assertRaises(pinq.QueryCancelled, self.queryable.select(
+                    _cancel_at).order_by(lambda x: -x).to_list)
+        self.assertEqual(budget.used, 0)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_cancellation_token_file_source(self):
+        path = os.path.join(self.directory, "lines.txt")
+        with open(path, "w") as lines:
+            lines.write("line\n" * 5000)
+        with pinq.CancellationToken() as token:
+            token.cancel()
+            self.assertRaises(pinq.QueryCancelled, pinq.from_lines(path).count)
+
+    def test_cancellation_token_value_error(self):
+        self.assertRaises(ValueError, pinq.CancellationToken, 1, time.time())
+        self.assertRaises(ValueError, pinq.CancellationToken, check_interval=0)
+
+    def test_cancellation_token_type_error(self):
+        self.assertRaises(TypeError, pinq.CancellationToken, check_interval=1.5)
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+import pinq
+
+
+class api_from_lines_tests(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b"INFO start\nERROR disk\r\nINFO ok\nERROR net")
+        fd, self.empty_path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+        os.remove(self.empty_path)
+
+    def test_from_lines(self):
+        self.assertEqual(list(pinq.from_lines(self.path)), [
+            b"INFO start", b"ERROR disk", b"INFO ok", b"ERROR net"])
+
+    def test_from_lines_empty(self):
+        self.assertEqual(list(pinq.from_lines(self.empty_path)), [])
+
+    def test_from_lines_with_encoding(self):
+        self.assertEqual(list(pinq.from_lines(self.path, encoding="utf-8").take(1)), [
+            u"INFO start"])
+
+    def test_from_lines_with_bytes_prefilter(self):
+        self.assertEqual(list(pinq.from_lines(self.path, b"ERROR")), [
+            b"ERROR disk", b"ERROR net"])
+
+    def test_from_lines_with_function_prefilter(self):
+        self.assertEqual(list(pinq.from_lines(self.path, lambda l: l.endswith(b"ok"))), [
+            b"INFO ok"])
+
+    def test_from_lines_reiterable(self):
+        queryable = pinq.from_lines(self.path, b"INFO")
+        self.assertEqual(queryable.count(), 2)
+        self.assertEqual(queryable.count(), 2)
+
+    def test_from_lines_prefilter_type_error(self):
+        self.assertRaises(TypeError, pinq.from_lines, self.path, 100)
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+import pinq
+
+
+def parse_row(line):
+    return tuple(int(value) for value in line.split(b","))
+
+
+def is_even_row(row):
+    return row[0] % 2 == 0
+
+
+def row_sum(row):
+    return sum(row)
+
+
+class api_from_partitions_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "a.csv")
+        with open(self.path, 'wb') as f:
+            for i in range(100):
+                f.write(("%d,%d\n" % (i, i * i)).encode("ascii"))
+        with open(os.path.join(self.directory, "b.csv"), 'wb') as f:
+            f.write(b"100,1\n101,2")
+        self.rows = [(i, i * i) for i in range(100)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_from_partitions(self):
+        self.assertEqual(list(pinq.from_partitions(self.path, parse_row, partitions=7)), self.rows)
+
+    def test_from_partitions_in_processes(self):
+        self.assertEqual(
+            list(pinq.from_partitions(self.path, parse_row, partitions=5, processes=2)), self.rows)
+
+    def test_from_partitions_without_parser(self):
+        self.assertEqual(pinq.from_partitions(self.path, processes=1).first(), b"0,0")
+
+    def test_from_partitions_with_encoding(self):
+        self.assertEqual(
+            pinq.from_partitions(self.path, encoding="ascii", processes=1).last(), u"99,9801")
+
+    def test_from_partitions_directory(self):
+        self.assertEqual(list(pinq.from_partitions(
+            self.directory, parse_row, partitions=3, processes=2).skip(99)), [
+                (99, 9801), (100, 1), (101, 2)])
+
+    def test_from_partitions_stages_in_processes(self):
+        self.assertEqual(
+            list(pinq.from_partitions(self.path, parse_row, partitions=4, processes=2)
+                 .where(is_even_row).select(row_sum).take(3)), [0, 6, 20])
+
+    def test_from_partitions_count_distinct(self):
+        queryable = pinq.from_partitions(self.directory, parse_row, partitions=4, processes=2)
+        self.assertEqual(queryable.count_distinct(is_even_row), 2)
+        self.assertTrue(100 <= queryable.count_distinct(row_sum, approximate=True) <= 104)
+
+    def test_from_partitions_aggregate_many(self):
+        queryable = pinq.from_partitions(self.directory, parse_row, partitions=4, processes=2)
+        self.assertEqual(queryable.aggregate_many(
+            count=pinq.count_of(is_even_row), total=pinq.sum_of(row_sum)), {
+                "count": 51, "total": sum(i + i * i for i in range(100)) + 101 + 103})
+        description = queryable.where(is_even_row).select(row_sum).describe()
+        expected = pinq.as_queryable(self.rows + [(100, 1), (101, 2)]).where(
+            is_even_row).select(row_sum).describe()
+        self.assertEqual(description["count"], expected["count"])
+        self.assertAlmostEqual(description["variance"], expected["variance"])
+
+    def test_from_partitions_unpicklable_stages(self):
+        queryable = pinq.from_partitions(self.path, parse_row, partitions=4, processes=2)
+        stage = queryable.where(lambda row: row[0] % 2 == 0)
+        self.assertFalse(isinstance(stage, pinq.PartitionedQueryable))
+        self.assertEqual(list(stage.select(lambda row: row[1]).take(3)), [0, 4, 16])
+        self.assertEqual(list(queryable.select(row_sum).select_many(lambda x: (x, -x)).take(4)),
+                         [0, 0, 2, -2])
+        self.assertEqual(queryable.aggregate_many(total=pinq.sum_of(lambda row: row[0])),
+                         {"total": 4950})
+        self.assertTrue(
+            97 <= queryable.count_distinct(lambda row: row[1], approximate=True) <= 103)
+
+    def test_from_partitions_unpicklable_parser(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            queryable = pinq.from_partitions(self.path, lambda line: line.split(b",")[0],
+                                             partitions=4, processes=2)
+        self.assertEqual([warning.category for warning in caught], [RuntimeWarning])
+        self.assertEqual(queryable.processes, 1)
+        self.assertEqual(queryable.where(lambda x: x > b"97").to_list(), [b"98", b"99"])
+
+    def test_from_partitions_select_many(self):
+        self.assertEqual(
+            list(pinq.from_partitions(self.path, parse_row, processes=1)
+                 .select_many(lambda row: row).take(4)), [0, 0, 1, 1])
+
+    def test_from_partitions_indexed_where(self):
+        self.assertEqual(
+            list(pinq.from_partitions(self.path, parse_row, processes=1)
+                 .where(lambda row, i: i < 2)), [(0, 0), (1, 1)])
+
+    def test_from_partitions_parser_type_error(self):
+        self.assertRaises(TypeError, pinq.from_partitions, self.path, 100)
+
+    def test_from_partitions_processes_type_error(self):
+        self.assertRaises(TypeError, pinq.from_partitions, self.path, processes="two")
+
+    def test_from_partitions_where_type_error(self):
+        self.assertRaises(TypeError, pinq.from_partitions(self.path).where, 100)
@@ -0,0 +1,53 @@
+import os
+import struct
+import tempfile
+import unittest
+import pinq
+
+
+class api_from_records_tests(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as f:
+            for i in range(10):
+                f.write(struct.pack("<ih", i, -i))
+            f.write(b"\x00\x01")
+        self.queryable = pinq.from_records(self.path, "<ih")
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_from_records(self):
+        self.assertEqual(list(self.queryable), [(i, -i) for i in range(10)])
+
+    def test_from_records_where(self):
+        self.assertEqual(list(self.queryable.where(lambda r: r[0] > 7)), [(8, -8), (9, -9)])
+
+    def test_from_records_count(self):
+        self.assertEqual(self.queryable.count(), 10)
+
+    def test_from_records_count_with_predicate(self):
+        self.assertEqual(self.queryable.count(lambda r: r[0] % 2), 5)
+
+    def test_from_records_skip(self):
+        self.assertEqual(list(self.queryable.skip(8)), [(8, -8), (9, -9)])
+
+    def test_from_records_skip_past_end(self):
+        self.assertEqual(list(self.queryable.skip(20)), [])
+
+    def test_from_records_take(self):
+        self.assertEqual(list(self.queryable.skip(2).take(2)), [(2, -2), (3, -3)])
+
+    def test_from_records_skip_take_count(self):
+        self.assertEqual(self.queryable.skip(3).take(4).skip(2).count(), 2)
+
+    def test_from_records_element_at(self):
+        self.assertEqual(self.queryable.skip(1).element_at(3), (4, -4))
+
+    def test_from_records_element_at_index_error(self):
+        self.assertRaises(IndexError, self.queryable.element_at, 10)
+        self.assertRaises(IndexError, self.queryable.element_at, -1)
+
+    def test_from_records_skip_num_type_error(self):
+        self.assertRaises(TypeError, self.queryable.skip, "apple")
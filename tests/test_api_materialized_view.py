@@ -0,0 +1,101 @@
+import unittest
+import pinq
+
+
+class materialized_view_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.source = pinq.ObservableSource(range(10))
+        self.queryable = pinq.as_queryable(self.source)
+
+    def assert_current(self, query):
+        view = pinq.materialized_view(query(self.queryable))
+        for elements in ([], [10, 11, 12], range(13, 40), [40]):
+            self.source.extend(elements)
+            self.assertEqual(view.result(), query(pinq.as_queryable(self.source)).to_list())
+
+    def test_materialized_view_elements(self):
+        view = pinq.materialized_view(self.queryable.where(lambda x: x % 3)
+                                      .select(lambda x: x * 2))
+        self.assertEqual(view.result(), [2, 4, 8, 10, 14, 16])
+        self.assert_current(lambda q: q.where(lambda x: x % 3).select(lambda x: x * 2))
+
+    def test_materialized_view_indexed(self):
+        self.assert_current(lambda q: q.where(lambda x, i: i % 2).select(lambda x, i: (x, i)))
+
+    def test_materialized_view_distinct_skip_take(self):
+        self.assert_current(lambda q: q.select(lambda x: x // 3).distinct().skip(2).take(8))
+
+    def test_materialized_view_select_many(self):
+        self.assert_current(lambda q: q.select_many(lambda x: range(x % 3)))
+
+    def test_materialized_view_join(self):
+        other = [(0, "even"), (1, "odd"), (1, "also odd")]
+        self.assert_current(lambda q: q.join(
+            other, lambda x: x % 2, lambda y: y[0], lambda x, y: (x, y[1])))
+
+    def test_materialized_view_group_by(self):
+        self.assert_current(lambda q: q.group_by(
+            lambda x: x % 4, result_transform=lambda key, values: (key, len(values))))
+
+    def test_materialized_view_aggregates(self):
+        view = pinq.materialized_view(self.queryable.where(lambda x: x > 2),
+                                      total=pinq.sum_of(), count=pinq.count_of())
+        self.assertEqual(view.result(), {"total": 42, "count": 7})
+        self.source.append(10)
+        self.assertEqual(view.result(), {"total": 52, "count": 8})
+
+    def test_materialized_view_grouped_aggregates(self):
+        view = pinq.materialized_view(self.queryable, group_by=lambda x: x % 2,
+                                      total=pinq.sum_of(), largest=pinq.max_of())
+        self.assertEqual(view.result(), {0: {"total": 20, "largest": 8},
+                                         1: {"total": 25, "largest": 9}})
+        self.source.extend([11, 12])
+        self.assertEqual(view.result(), {0: {"total": 32, "largest": 12},
+                                         1: {"total": 36, "largest": 11}})
+
+    def test_materialized_view_empty_aggregates(self):
+        view = pinq.materialized_view(pinq.as_queryable(pinq.ObservableSource()),
+                                      total=pinq.sum_of(), largest=pinq.max_of())
+        self.assertEqual(view.result(), {"total": 0, "largest": None})
+
+    def test_materialized_view_refresh(self):
+        view = pinq.materialized_view(self.queryable)
+        self.assertEqual(view.refresh(), 10)
+        self.assertEqual(view.refresh(), 0)
+        self.source.append(10)
+        self.assertEqual(view.refresh(), 1)
+        self.assertEqual(view.result(), list(range(11)))
+
+    def test_materialized_view_result_reused(self):
+        view = pinq.materialized_view(self.queryable.where(lambda x: x % 2))
+        result = view.result()
+        self.assertTrue(view.result() is result)
+        self.source.extend([10, 12])
+        self.assertTrue(view.result() is result)
+        self.source.append(11)
+        self.assertEqual(view.result(), [1, 3, 5, 7, 9, 11])
+        self.assertEqual(result, [1, 3, 5, 7, 9])
+
+    def test_materialized_view_source_snapshot(self):
+        queryable = pinq.as_queryable(self.source)
+        self.source.append(10)
+        self.assertEqual(queryable.count(), 10)
+        self.assertEqual(pinq.as_queryable(self.source).count(), 11)
+
+    def test_materialized_view_source_iteration(self):
+        self.assertEqual(len(self.source), 10)
+        self.assertEqual(self.queryable.sum(), 45)
+
+    def test_materialized_view_type_error(self):
+        self.assertRaises(TypeError, pinq.materialized_view, list(self.source))
+        self.assertRaises(TypeError, pinq.materialized_view, self.queryable, 100)
+        self.assertRaises(TypeError, pinq.materialized_view, self.queryable, total=sum)
+
+    def test_materialized_view_value_error(self):
+        self.assertRaises(ValueError, pinq.materialized_view, pinq.as_queryable(range(10)))
+        self.assertRaises(ValueError, pinq.materialized_view, self.queryable.reverse())
+        self.assertRaises(ValueError, pinq.materialized_view,
+                          self.queryable.group_by(lambda x: x % 2).select(lambda x: x))
+        self.assertRaises(ValueError, pinq.materialized_view, self.queryable,
+                          group_by=lambda x: x % 2)
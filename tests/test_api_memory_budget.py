@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pinq
+from pinq.memory import SPILL_FANOUT, _partition
+
+
+class memory_budget_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.data = [(i * 7919) % 1000 for i in range(5000)]
+        self.queryable = pinq.as_queryable(self.data)
+
+    def tearDown(self):
+        pinq.set_memory_budget(None)
+        shutil.rmtree(self.directory)
+
+    def test_memory_budget_distinct_raises(self):
+        with pinq.MemoryBudget(4096):
+            self.assertRaises(pinq.MemoryBudgetExceeded,
+                              self.queryable.distinct().to_list)
+
+    def test_memory_budget_join_raises(self):
+        with pinq.MemoryBudget(4096, spill=True):
+            self.assertRaises(pinq.MemoryBudgetExceeded, self.queryable.join(
+                self.data, lambda x: x, lambda x: x, lambda x, y: x).to_list)
+
+    def test_memory_budget_within_limit(self):
+        with pinq.MemoryBudget(1 << 18) as budget:
+            self.assertEqual(self.queryable.distinct().count(), 1000)
+            self.assertEqual(sorted(self.queryable.intersect(range(10))), list(range(10)))
+        self.assertEqual(budget.used, 0)
+        self.assertTrue(0 < budget.peak <= budget.limit)
+
+    def test_memory_budget_order_by_spills(self):
+        with pinq.MemoryBudget(4096, spill=True, spill_directory=self.directory) as budget:
+            self.assertEqual(self.queryable.order_by(lambda x: x).to_list(), sorted(self.data))
+        self.assertEqual(budget.used, 0)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_memory_budget_then_by_descending_spills(self):
+        pairs = [(x % 10, i) for i, x in enumerate(self.data)]
+        expected = sorted(sorted(pairs, key=lambda p: p[1], reverse=True), key=lambda p: p[0])
+        with pinq.MemoryBudget(4096, spill=True):
+            self.assertEqual(pinq.as_queryable(pairs).order_by(lambda p: p[0]).then_by_descending(
+                lambda p: p[1]).to_list(), expected)
+
+    def test_memory_budget_order_by_stable(self):
+        pairs = [(x % 10, i) for i, x in enumerate(self.data)]
+        with pinq.MemoryBudget(4096, spill=True):
+            self.assertEqual(pinq.as_queryable(pairs).order_by(lambda p: p[0]).to_list(),
+                             sorted(pairs, key=lambda p: p[0]))
+
+    def test_memory_budget_group_by_spills(self):
+        with pinq.MemoryBudget(4096, spill=True):
+            groups = self.queryable.group_by(lambda x: x % 3).to_list()
+        self.assertEqual([key for key, _ in groups], [0, 1, 2])
+        self.assertEqual(groups[1][1], [x for x in self.data if x % 3 == 1])
+
+    def test_memory_budget_reverse_spills(self):
+        with pinq.MemoryBudget(4096, spill=True):
+            self.assertEqual(self.queryable.reverse().to_list(), self.data[::-1])
+
+    def test_memory_budget_order_by_raises_without_spill(self):
+        with pinq.MemoryBudget(4096):
+            self.assertRaises(pinq.MemoryBudgetExceeded,
+                              self.queryable.order_by(lambda x: x).to_list)
+
+    def test_memory_budget_partitions_split(self):
+        for level in range(1, 4):
+            keys = [key for key in range(20000) if _partition(key, level) == 0]
+            buckets = set(_partition(key, level + 1) for key in keys)
+            self.assertTrue(len(buckets) > SPILL_FANOUT // 2)
+            keys = ["key%d" % key for key in range(5000)]
+            keys = [key for key in keys if _partition(key, level) == 3]
+            buckets = set(_partition(key, level + 1) for key in keys)
+            self.assertTrue(len(buckets) > SPILL_FANOUT // 2)
+
+    def test_set_memory_budget(self):
+        pinq.set_memory_budget(pinq.MemoryBudget(4096))
+        self.assertRaises(pinq.MemoryBudgetExceeded, self.queryable.distinct().to_list)
+        pinq.set_memory_budget(None)
+        self.assertEqual(self.queryable.distinct().count(), 1000)
+
+    def test_memory_budget_type_error(self):
+        self.assertRaises(TypeError, pinq.MemoryBudget, "100")
+        self.assertRaises(TypeError, pinq.set_memory_budget, 100)
+
+    def test_memory_budget_value_error(self):
+        self.assertRaises(ValueError, pinq.MemoryBudget, 0)
@@ -0,0 +1,67 @@
+import time
+import unittest
+import pinq
+
+
+class query_cache_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = pinq.QueryCache(maxsize=2)
+
+    def test_query_cache_get_put(self):
+        self.assertEqual(self.cache.get("a"), (False, None))
+        self.cache.put("a", 1)
+        self.assertEqual(self.cache.get("a"), (True, 1))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_query_cache_lru_eviction(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.cache.get("a")
+        self.cache.put("c", 3)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertEqual(self.cache.get("b"), (False, None))
+        self.assertEqual(self.cache.get("a"), (True, 1))
+        self.assertEqual(self.cache.get("c"), (True, 3))
+
+    def test_query_cache_replace(self):
+        self.cache.put("a", 1)
+        self.cache.put("a", 2)
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.get("a"), (True, 2))
+
+    def test_query_cache_ttl(self):
+        cache = pinq.QueryCache(ttl=0.05)
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), (True, 1))
+        time.sleep(0.1)
+        self.assertEqual(cache.get("a"), (False, None))
+        self.assertEqual(len(cache), 0)
+
+    def test_query_cache_invalidate(self):
+        source = [1, 2]
+        self.cache.put("a", 1, source)
+        self.cache.put("b", 2, [1, 2])
+        self.cache.invalidate(source)
+        self.assertEqual(self.cache.get("a"), (False, None))
+        self.assertEqual(self.cache.get("b"), (True, 2))
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_query_cache_clear(self):
+        self.cache.put("a", 1)
+        self.cache.get("a")
+        self.cache.clear()
+        self.assertEqual((len(self.cache), self.cache.hits, self.cache.misses), (0, 0, 0))
+        self.cache.put("b", 2)
+        self.assertEqual(self.cache.get("b"), (True, 2))
+
+    def test_query_cache_type_error(self):
+        self.assertRaises(TypeError, pinq.QueryCache, "10")
+        self.assertRaises(TypeError, pinq.QueryCache, 10, "60")
+        self.assertRaises(TypeError, self.cache.get, [])
+
+    def test_query_cache_value_error(self):
+        self.assertRaises(ValueError, pinq.QueryCache, 0)
+        self.assertRaises(ValueError, pinq.QueryCache, 10, -1)
@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "benchmarks"))
+
+import compare
+
+
+def _result(operator, times, baseline=1.0, peak_memory=None, scale=1000):
+    return dict([
+        ('operator', operator), ('scale', scale),
+        ('pinq', dict([('times', times), ('peak_memory', peak_memory)])),
+        ('baseline', dict([('median', baseline)]))])
+
+
+def _run(*results):
+    return dict([('results', list(results))])
+
+
+class benchmarks_compare_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+
+    def tearDown(self):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+        shutil.rmtree(self.directory)
+
+    def status(self, old_times, new_times, threshold=0.1):
+        comparisons = compare.compare(_run(_result("where", old_times)),
+                                      _run(_result("where", new_times)), threshold)
+        self.assertEqual(len(comparisons), 1)
+        return comparisons[0]['status']
+
+    def write(self, name, run):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            json.dump(run, f)
+        return path
+
+    def test_quantile(self):
+        self.assertEqual(compare.quantile([3, 1, 2], 0.5), 2)
+        self.assertEqual(compare.quantile([1, 2, 3, 4, 5], 0.25), 2)
+        self.assertEqual(compare.quantile([1, 2], 0.25), 1.25)
+        self.assertEqual(compare.quantile([7], 0.75), 7)
+
+    def test_summarize(self):
+        self.assertEqual(compare.summarize([5, 1, 4, 2, 3]), (3, 2, 4))
+
+    def test_compare_regressed(self):
+        self.assertEqual(self.status([1.0, 1.0, 1.1], [1.5, 1.5, 1.6]), "regressed")
+
+    def test_compare_improved(self):
+        self.assertEqual(self.status([1.5, 1.5, 1.6], [1.0, 1.0, 1.1]), "improved")
+
+    def test_compare_noisy(self):
+        self.assertEqual(self.status([1.0, 1.0, 2.0], [1.0, 1.5, 2.0]), "noisy")
+
+    def test_compare_unchanged(self):
+        self.assertEqual(self.status([1.0, 1.0, 1.1], [1.0, 1.05, 1.1]), "unchanged")
+
+    def test_compare_threshold(self):
+        self.assertEqual(self.status([1.0, 1.0, 1.0], [1.2, 1.2, 1.2], 0.3), "unchanged")
+        self.assertEqual(self.status([1.0, 1.0, 1.0], [1.2, 1.2, 1.2], 0.1), "regressed")
+
+    def test_compare_change(self):
+        comparison = compare.compare(_run(_result("where", [2.0])),
+                                     _run(_result("where", [3.0])), 0.1)[0]
+        self.assertEqual(comparison['old'], 2.0)
+        self.assertEqual(comparison['new'], 3.0)
+        self.assertEqual(comparison['change'], 0.5)
+
+    def test_compare_normalize(self):
+        old = _run(_result("where", [1.0, 1.0, 1.0], baseline=1.0))
+        new = _run(_result("where", [2.0, 2.0, 2.0], baseline=2.0))
+        self.assertEqual(compare.compare(old, new, 0.1)[0]['status'], "regressed")
+        self.assertEqual(compare.compare(old, new, 0.1, normalize=True)[0]['status'],
+                         "unchanged")
+
+    def test_compare_memory_threshold(self):
+        old = _run(_result("where", [1.0], peak_memory=1000))
+        new = _run(_result("where", [1.0], peak_memory=1500))
+        comparison = compare.compare(old, new, 0.1)[0]
+        self.assertEqual(comparison['memory_change'], 0.5)
+        self.assertEqual(comparison['status'], "unchanged")
+        self.assertEqual(compare.compare(old, new, 0.1, memory_threshold=0.6)[0]['status'],
+                         "unchanged")
+        self.assertEqual(compare.compare(old, new, 0.1, memory_threshold=0.4)[0]['status'],
+                         "regressed")
+
+    def test_compare_missing(self):
+        old = _run(_result("where", [1.0]), _result("select", [1.0]),
+                   _result("where", [1.0], scale=10))
+        new = _run(_result("where", [1.0]), _result("sum", [1.0]))
+        comparisons = compare.compare(old, new, 0.1)
+        self.assertEqual([(c['operator'], c['scale'], c['status']) for c in comparisons],
+                         [("where", 1000, "unchanged"), ("select", 1000, "missing"),
+                          ("where", 10, "missing")])
+
+    def test_main(self):
+        old = self.write("old.json", _run(_result("where", [1.0, 1.0, 1.1])))
+        same = self.write("same.json", _run(_result("where", [1.0, 1.0, 1.1])))
+        slower = self.write("slower.json", _run(_result("where", [1.5, 1.5, 1.6])))
+        self.assertEqual(compare.main([old, same]), 0)
+        self.assertEqual(compare.main([old, slower]), 1)
+        self.assertEqual(compare.main([old, slower, "--threshold", "0.6"]), 0)
+
+    def test_main_missing(self):
+        old = self.write("old.json", _run(_result("where", [1.0]), _result("select", [1.0])))
+        new = self.write("new.json", _run(_result("where", [1.0])))
+        self.assertEqual(compare.main([old, new]), 1)
+        self.assertEqual(compare.main([new, old]), 0)
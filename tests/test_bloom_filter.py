@@ -0,0 +1,49 @@
+import unittest
+from pinq.sketches import BloomFilter, stable_hash
+
+
+class bloom_filter_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.bloom_filter = BloomFilter(1000, 0.01)
+
+    def test_bloom_filter_add(self):
+        self.assertFalse(self.bloom_filter.add("a"))
+        self.assertTrue(self.bloom_filter.add("a"))
+        self.assertTrue("a" in self.bloom_filter)
+        self.assertEqual(len(self.bloom_filter), 1)
+
+    def test_bloom_filter_no_false_negatives(self):
+        for i in range(1000):
+            self.bloom_filter.add(i)
+        self.assertTrue(all(i in self.bloom_filter for i in range(1000)))
+
+    def test_bloom_filter_error_rate(self):
+        for i in range(1000):
+            self.bloom_filter.add(i)
+        false_positives = sum(1 for i in range(1000, 11000) if i in self.bloom_filter)
+        self.assertTrue(false_positives < 300)
+
+    def test_bloom_filter_merge(self):
+        other = BloomFilter(1000, 0.01)
+        self.bloom_filter.add((1, "a"))
+        other.add(2.5)
+        self.bloom_filter.merge(other)
+        self.assertTrue((1, "a") in self.bloom_filter)
+        self.assertTrue(2.5 in self.bloom_filter)
+
+    def test_bloom_filter_merge_value_error(self):
+        self.assertRaises(ValueError, self.bloom_filter.merge, BloomFilter(10))
+
+    def test_bloom_filter_type_error(self):
+        self.assertRaises(TypeError, BloomFilter, "1000")
+
+    def test_bloom_filter_value_error(self):
+        self.assertRaises(ValueError, BloomFilter, 0)
+        self.assertRaises(ValueError, BloomFilter, 10, 0)
+
+    def test_stable_hash(self):
+        self.assertEqual(stable_hash(1), stable_hash(1.0))
+        self.assertEqual(stable_hash(u"abc"), stable_hash(u"abc"))
+        self.assertNotEqual(stable_hash((1, 2)), stable_hash((2, 1)))
+        self.assertEqual(stable_hash(b"abc"), 0xb04fd23c98500190)
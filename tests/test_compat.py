@@ -9,6 +9,8 @@ import unittest
 class ItertoolsMock:
 
     def __getattr__(self, name):
+        if name == "accumulate":
+            raise ImportError()
         if name == "zip_longest":
             raise ImportError()
         if name == "izip_longest":
@@ -30,6 +32,26 @@ class FunctoolsMock:
 
 class compat_tests(unittest.TestCase):
 
+    def test_compat_accumulate(self):
+        sys.modules["itertools"] = ItertoolsMock()
+        if "pinq.compat" in sys.modules:
+            del sys.modules["pinq.compat"]
+        from pinq.compat import accumulate
+        self.assertEqual(accumulate.__doc__,
+                         "A default accumulate if accumulate does not exist.")
+        self.assertEqual(list(accumulate([1, 2, 3])), [1, 3, 6])
+        self.assertEqual(list(accumulate([3, 1, 2], min)), [3, 1, 1])
+        self.assertEqual(list(accumulate([])), [])
+
+    def test_compat_array_bytes(self):
+        from array import array
+        from pinq.compat import array_from_bytes, array_to_bytes
+        values = array('d', [1.5, -2.0])
+        loaded = array('d')
+        array_from_bytes(loaded, array_to_bytes(values))
+        self.assertEqual(loaded, values)
+        self.assertEqual(len(array_to_bytes(values)), 2 * values.itemsize)
+
     def test_compat_lru_cache(self):
         sys.modules["functools"] = FunctoolsMock()
         if "pinq.compat" in sys.modules:
@@ -40,6 +62,23 @@ class compat_tests(unittest.TestCase):
         function = lru_cache(1, False)(lambda x: x + 2)
         self.assertEqual(function(100), 102)
 
+    def test_compat_reraise(self):
+        import traceback
+        from pinq.compat import reraise
+
+        def _fail():
+            raise KeyError(1)
+        try:
+            _fail()
+        except KeyError:
+            exc_info = sys.exc_info()
+        try:
+            reraise(exc_info)
+        except KeyError:
+            error, tb = sys.exc_info()[1:]
+        self.assertTrue(error is exc_info[1])
+        self.assertEqual(traceback.extract_tb(tb)[-1][2], "_fail")
+
     def test_compat_zip_longest(self):
         sys.modules["itertools"] = ItertoolsMock()
         if "pinq.compat" in sys.modules:
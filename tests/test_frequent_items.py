@@ -0,0 +1,42 @@
+import unittest
+from pinq.sketches import FrequentItems
+
+
+class frequent_items_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.sketch = FrequentItems(4)
+
+    def test_frequent_items_exact_under_capacity(self):
+        sketch = FrequentItems(5)
+        sketch.update("abracadabra")
+        top = sketch.top(3)
+        self.assertEqual(top[0], ("a", 5))
+        self.assertEqual(set(top[1:]), set([("b", 2), ("r", 2)]))
+        self.assertEqual(sketch.offset, 0)
+        self.assertEqual(len(sketch), 11)
+
+    def test_frequent_items_bounds(self):
+        keys = [i % 50 for i in range(1000)] + [7] * 500
+        self.sketch.update(keys)
+        self.assertEqual(self.sketch.top(1)[0][0], 7)
+        self.assertTrue(520 <= self.sketch.estimate(7) <= 520 + self.sketch.offset)
+        self.assertTrue(len(self.sketch.counts) <= 4)
+
+    def test_frequent_items_add(self):
+        self.sketch.add("a", 10)
+        self.sketch.add("b")
+        self.assertEqual(self.sketch.top(5), [("a", 10), ("b", 1)])
+
+    def test_frequent_items_merge(self):
+        other = FrequentItems(4)
+        self.sketch.update("aaab")
+        other.update("abbb")
+        self.sketch.merge(other)
+        self.assertEqual(sorted(self.sketch.top(2)), [("a", 4), ("b", 4)])
+
+    def test_frequent_items_type_error(self):
+        self.assertRaises(TypeError, FrequentItems, "4")
+
+    def test_frequent_items_value_error(self):
+        self.assertRaises(ValueError, FrequentItems, 1)
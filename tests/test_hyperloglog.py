@@ -0,0 +1,35 @@
+import pickle
+import unittest
+from pinq.sketches import HyperLogLog
+
+
+class hyperloglog_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.sketch = HyperLogLog()
+
+    def test_hyperloglog_add(self):
+        for key in ["a", "b", "a", "c"]:
+            self.sketch.add(key)
+        self.assertEqual(len(self.sketch), 3)
+
+    def test_hyperloglog_update(self):
+        self.sketch.update(str(i) for i in range(50000))
+        self.assertTrue(48500 <= len(self.sketch) <= 51500)
+
+    def test_hyperloglog_merge(self):
+        other = HyperLogLog()
+        self.sketch.update(range(0, 30000))
+        other.update(range(20000, 50000))
+        self.sketch.merge(pickle.loads(pickle.dumps(other)))
+        self.assertTrue(48500 <= len(self.sketch) <= 51500)
+
+    def test_hyperloglog_merge_value_error(self):
+        self.assertRaises(ValueError, self.sketch.merge, HyperLogLog(10))
+
+    def test_hyperloglog_type_error(self):
+        self.assertRaises(TypeError, HyperLogLog, "14")
+
+    def test_hyperloglog_value_error(self):
+        self.assertRaises(ValueError, HyperLogLog, 3)
+        self.assertRaises(ValueError, HyperLogLog, 19)
@@ -0,0 +1,46 @@
+import pickle
+import random
+import unittest
+from pinq.sketches import KLLSketch
+
+
+class kll_sketch_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.values = list(range(100000))
+        random.Random(0).shuffle(self.values)
+        self.sketch = KLLSketch(seed=0)
+
+    def test_kll_sketch_small(self):
+        self.sketch.update([3, 1, 2])
+        self.assertEqual(self.sketch.quantiles([0, 0.5, 1]), [1, 2, 3])
+        self.assertEqual(len(self.sketch), 3)
+
+    def test_kll_sketch_quantiles(self):
+        self.sketch.update(self.values)
+        for fraction, value in zip([0.1, 0.5, 0.9], self.sketch.quantiles([0.1, 0.5, 0.9])):
+            self.assertTrue(abs(value - fraction * 100000) <= 2000)
+
+    def test_kll_sketch_bounded(self):
+        self.sketch.update(self.values)
+        self.assertTrue(sum(len(compactor) for compactor in self.sketch.compactors) < 1000)
+
+    def test_kll_sketch_merge(self):
+        other = KLLSketch(seed=1)
+        self.sketch.update(self.values[:50000])
+        other.update(self.values[50000:])
+        self.sketch.merge(pickle.loads(pickle.dumps(other)))
+        self.assertEqual(len(self.sketch), 100000)
+        self.assertTrue(abs(self.sketch.quantile(0.5) - 50000) <= 2000)
+
+    def test_kll_sketch_merge_value_error(self):
+        self.assertRaises(ValueError, self.sketch.merge, KLLSketch(100))
+
+    def test_kll_sketch_empty(self):
+        self.assertRaises(ValueError, self.sketch.quantile, 0.5)
+
+    def test_kll_sketch_type_error(self):
+        self.assertRaises(TypeError, KLLSketch, 200.0)
+
+    def test_kll_sketch_value_error(self):
+        self.assertRaises(ValueError, KLLSketch, 4)
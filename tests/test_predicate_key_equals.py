@@ -0,0 +1,18 @@
+import unittest
+from pinq.predicates import key_equals
+
+
+class predicate_key_equals_tests(unittest.TestCase):
+
+    def test_key_equals(self):
+        predicate = key_equals(len, 3)
+        self.assertEqual(predicate("abc"), True)
+        self.assertEqual(predicate("abcd"), False)
+
+    def test_key_equals_attributes(self):
+        predicate = key_equals(len, 3)
+        self.assertTrue(predicate.key_selector is len)
+        self.assertEqual(predicate.key, 3)
+
+    def test_key_equals_type_error(self):
+        self.assertRaises(TypeError, key_equals, 3, 3)
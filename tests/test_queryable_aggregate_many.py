@@ -0,0 +1,43 @@
+import unittest
+import pinq
+
+
+class queryable_aggregate_many_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable = pinq.as_queryable(range(1, 11))
+
+    def test_aggregate_many_empty(self):
+        self.assertEqual(self.queryable0.aggregate_many(
+            count=pinq.count_of(), total=pinq.sum_of(), low=pinq.min_of()), {
+                "count": 0, "total": 0, "low": None})
+
+    def test_aggregate_many(self):
+        self.assertEqual(self.queryable.aggregate_many(
+            count=pinq.count_of(lambda x: x > 5), total=pinq.sum_of(lambda x: x * 2),
+            low=pinq.min_of(), high=pinq.max_of(lambda x: -x), mean=pinq.average_of()), {
+                "count": 5, "total": 110, "low": 1, "high": -1, "mean": 5.5})
+
+    def test_aggregate_many_single_pass(self):
+        elements = []
+
+        def _elements():
+            for i in range(5):
+                elements.append(i)
+                yield i
+        self.assertEqual(pinq.as_queryable(_elements()).stream().aggregate_many(
+            total=pinq.sum_of(), high=pinq.max_of()), {"total": 10, "high": 4})
+        self.assertEqual(elements, [0, 1, 2, 3, 4])
+
+    def test_aggregate_many_reuses_templates(self):
+        total = pinq.sum_of()
+        self.assertEqual(self.queryable.aggregate_many(total=total), {"total": 55})
+        self.assertEqual(self.queryable.aggregate_many(total=total), {"total": 55})
+        self.assertEqual(total.result(), 0)
+
+    def test_aggregate_many_type_error(self):
+        self.assertRaises(TypeError, self.queryable.aggregate_many, total=sum)
+
+    def test_aggregate_many_value_error(self):
+        self.assertRaises(ValueError, self.queryable.aggregate_many)
@@ -0,0 +1,106 @@
+import unittest
+import pinq
+
+
+class queryable_cached_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = pinq.QueryCache()
+        self.data = list(range(100))
+        self.evaluated = []
+
+    def _query(self, divisor, version=None):
+        def _record(x):
+            self.evaluated.append(x)
+            return x
+        return pinq.as_queryable(self.data).select(_record).where(
+            lambda x: x % divisor == 0).cached(self.cache, version)
+
+    def test_cached_hit(self):
+        self.assertEqual(self._query(2).count(), 50)
+        self.assertEqual(self._query(2).count(), 50)
+        self.assertEqual(len(self.evaluated), 100)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_cached_different_arguments(self):
+        self.assertEqual(self._query(2).count(), 50)
+        self.assertEqual(self._query(5).count(), 20)
+        self.assertEqual(self._query(2).count(), 50)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_cached_different_terminals(self):
+        self.assertEqual(self._query(50).to_list(), [0, 50])
+        self.assertEqual(self._query(50).sum(), 50)
+        self.assertEqual(self._query(50).sum(lambda x: -x), -50)
+        self.assertEqual(self.cache.misses, 3)
+
+    def test_cached_different_source(self):
+        self.assertEqual(self._query(2).count(), 50)
+        self.data = list(range(10))
+        self.assertEqual(self._query(2).count(), 5)
+
+    def test_cached_version(self):
+        self.assertEqual(self._query(2, version=1).count(), 50)
+        self.data.append(100)
+        self.assertEqual(self._query(2, version=1).count(), 50)
+        self.assertEqual(self._query(2, version=lambda: len(self.data)).count(), 51)
+
+    def test_cached_invalidate(self):
+        self.assertEqual(self._query(2).count(), 50)
+        self.data.append(100)
+        self.cache.invalidate(self.data)
+        self.assertEqual(self._query(2).count(), 51)
+
+    def test_cached_result_copied(self):
+        self._query(50).to_list().append(1)
+        self.assertEqual(self._query(50).to_list(), [0, 50])
+        result = self._query(50).to_dict(lambda x: x)
+        result.clear()
+        self.assertEqual(self._query(50).to_dict(lambda x: x), {0: 0, 50: 50})
+
+    def test_cached_ordered(self):
+        ordered = pinq.as_queryable(self.data).order_by(lambda x: x % 3)
+        first = ordered.then_by(lambda x: -x).cached(self.cache).to_list()
+        second = pinq.as_queryable(self.data).order_by(lambda x: x % 3).cached(
+            self.cache).to_list()
+        self.assertNotEqual(first, second)
+
+    def test_cached_equal_arguments_of_different_types(self):
+        data = [1, 2, 3]
+
+        def _query(factor):
+            return pinq.as_queryable(data).select(
+                lambda x: str((x + 1) * factor)).cached(self.cache)
+        self.assertEqual(_query(2).to_list(), ['4', '6', '8'])
+        self.assertEqual(_query(2.0).to_list(), ['4.0', '6.0', '8.0'])
+        self.assertEqual(_query((2,)).to_list(), ['(2, 2)', '(2, 2, 2)', '(2, 2, 2, 2)'])
+        self.assertEqual(_query((2.0,)).to_list(),
+                         ['(2.0, 2.0)', '(2.0, 2.0, 2.0)', '(2.0, 2.0, 2.0, 2.0)'])
+        self.assertEqual(self.cache.misses, 4)
+
+    def test_cached_query_iterated_on_miss(self):
+        class _Counted(pinq.queryable.Queryable):
+            iterations = 0
+
+            def __iter__(self):
+                _Counted.iterations += 1
+                return iter(range(10))
+        counted = _Counted(None)
+        self.assertEqual(counted.cached(self.cache).sum(), 45)
+        self.assertEqual(_Counted.iterations, 1)
+        queryable = counted.cached(self.cache)
+        self.assertEqual(_Counted.iterations, 1)
+        self.assertEqual(queryable.sum(), 45)
+        self.assertEqual(_Counted.iterations, 1)
+
+    def test_cached_unhashable_argument(self):
+        queryable = pinq.as_queryable(self.data).where(
+            lambda x, cache=[bytearray()]: x < 3).cached(self.cache)
+        self.assertEqual(queryable.to_list(), [0, 1, 2])
+        self.assertEqual(len(self.cache), 0)
+
+    def test_cached_not_terminal(self):
+        self.assertEqual(self._query(2).cached(self.cache).take(2).to_list(), [0, 2])
+
+    def test_cached_type_error(self):
+        self.assertRaises(TypeError, pinq.as_queryable(self.data).cached, {})
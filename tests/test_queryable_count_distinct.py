@@ -0,0 +1,46 @@
+import unittest
+import pinq
+
+
+class queryable_count_distinct_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable1 = pinq.as_queryable([1, 2, 3, 1, 4, 5, 2, 5, 6])
+        self.queryable2 = pinq.as_queryable(range(100000))
+
+    def test_count_distinct_empty(self):
+        self.assertEqual(self.queryable0.count_distinct(), 0)
+        self.assertEqual(self.queryable0.count_distinct(approximate=True), 0)
+
+    def test_count_distinct(self):
+        self.assertEqual(self.queryable1.count_distinct(), 6)
+
+    def test_count_distinct_with_key_selector(self):
+        self.assertEqual(self.queryable1.count_distinct(lambda x: x % 2), 2)
+
+    def test_count_distinct_spilling(self):
+        with pinq.MemoryBudget(8192, spill=True):
+            self.assertEqual(self.queryable2.count_distinct(lambda x: x % 5000), 5000)
+
+    def test_count_distinct_approximate_small(self):
+        self.assertEqual(self.queryable1.count_distinct(approximate=True), 6)
+
+    def test_count_distinct_approximate(self):
+        estimate = self.queryable2.count_distinct(approximate=True)
+        self.assertTrue(97000 <= estimate <= 103000)
+
+    def test_count_distinct_approximate_precision(self):
+        estimate = self.queryable2.count_distinct(lambda x: x % 50000, True, 10)
+        self.assertTrue(40000 <= estimate <= 60000)
+
+    def test_count_distinct_key_selector_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.count_distinct, 100)
+
+    def test_count_distinct_precision_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.count_distinct, approximate=True,
+                          precision=1.5)
+
+    def test_count_distinct_precision_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.count_distinct, approximate=True,
+                          precision=3)
@@ -17,3 +17,19 @@ class queryable_default_if_empty_tests(unittest.TestCase):
 
     def test_default_if_empty_is_empty_provide_value(self):
         self.assertEqual(list(self.queryable1.default_if_empty(0)), [0])
+
+    def test_default_if_empty_stream(self):
+        self.assertEqual(pinq.as_queryable(iter([1, 2, 3])).stream().default_if_empty(0)
+                         .to_list(), [1, 2, 3])
+        self.assertEqual(pinq.as_queryable(iter([])).stream().default_if_empty(0).to_list(), [0])
+
+    def test_default_if_empty_lazy(self):
+        consumed = []
+
+        def _elements():
+            for element in range(3):
+                consumed.append(element)
+                yield element
+        queryable = pinq.as_queryable(_elements()).default_if_empty()
+        self.assertEqual(consumed, [])
+        self.assertEqual(queryable.to_list(), [0, 1, 2])
@@ -0,0 +1,28 @@
+import unittest
+import pinq
+
+
+class queryable_describe_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable = pinq.as_queryable([4, 7, 13, 16])
+
+    def test_describe_empty(self):
+        self.assertEqual(self.queryable0.describe(), {
+            "count": 0, "mean": None, "variance": None, "min": None, "max": None})
+
+    def test_describe(self):
+        self.assertEqual(self.queryable.describe(), {
+            "count": 4, "mean": 10.0, "variance": 30.0, "min": 4, "max": 16})
+
+    def test_describe_transform(self):
+        self.assertEqual(self.queryable.describe(lambda x: x + 1e9), {
+            "count": 4, "mean": 1e9 + 10, "variance": 30.0, "min": 1e9 + 4, "max": 1e9 + 16})
+
+    def test_describe_single(self):
+        self.assertEqual(pinq.as_queryable([2]).describe(), {
+            "count": 1, "mean": 2.0, "variance": None, "min": 2, "max": 2})
+
+    def test_describe_transform_type_error(self):
+        self.assertRaises(TypeError, self.queryable.describe, 100)
@@ -38,3 +38,30 @@ class queryable_distinct_tests(unittest.TestCase):
 
     def test_distinct_key_selector_type_error(self):
         self.assertRaises(TypeError, self.queryable2.distinct, 100)
+
+    def test_distinct_spilling(self):
+        data = [(i * 7919) % 3000 for i in range(20000)]
+        with pinq.MemoryBudget(8192, spill=True) as budget:
+            result = pinq.as_queryable(data).distinct().to_list()
+        self.assertEqual(sorted(result), list(range(3000)))
+        self.assertEqual(result[:10], data[:10])
+        self.assertEqual(budget.used, 0)
+
+    def test_distinct_spilling_with_key_selector(self):
+        data = list(range(20000))
+        with pinq.MemoryBudget(8192, spill=True):
+            result = pinq.as_queryable(data).distinct(lambda x: x % 5000).to_list()
+        self.assertEqual(sorted(result), list(range(5000)))
+
+    def test_distinct_approximate(self):
+        self.assertEqual(list(self.queryable3.distinct(approximate=True)), [1, 2, 3, 4, 5, 6])
+        result = pinq.as_queryable(range(20000)).select(lambda x: x % 10000).distinct(
+            approximate=True, capacity=10000, error_rate=0.01).count()
+        self.assertTrue(9800 <= result <= 10000)
+
+    def test_distinct_approximate_type_error(self):
+        self.assertRaises(TypeError, self.queryable2.distinct, approximate=True, capacity=1.5)
+
+    def test_distinct_approximate_value_error(self):
+        self.assertRaises(ValueError, self.queryable2.distinct, approximate=True, capacity=0)
+        self.assertRaises(ValueError, self.queryable2.distinct, approximate=True, error_rate=1)
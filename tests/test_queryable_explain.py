@@ -0,0 +1,86 @@
+import unittest
+import pinq
+
+
+class queryable_explain_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.source = range(1, 11)
+        self.queryable = pinq.as_queryable(self.source)
+        self.label = "source: Queryable(%s)" % type(self.source).__name__
+
+    def test_explain_nodes(self):
+        plan = self.queryable.where(lambda x: x % 2).select(lambda x: x * 2).take(3).explain()
+        self.assertEqual([node.operator for node in plan.nodes], [
+            self.label, "where", "select", "take"])
+        self.assertEqual([(node.estimate, node.exact) for node in plan.nodes], [
+            (10, True), (10, False), (10, False), (3, False)])
+
+    def test_explain_known_size(self):
+        plan = self.queryable.select(lambda x: x).order_by(lambda x: -x).skip(2).explain()
+        self.assertEqual([(node.estimate, node.exact) for node in plan.nodes], [
+            (10, True), (10, True), (10, True), (8, True)])
+
+    def test_explain_ordering_and_strategy(self):
+        plan = self.queryable.order_by(lambda x: -x).where(lambda x: x > 2).group_by(
+            lambda x: x % 2).explain()
+        self.assertEqual([node.ordered for node in plan.nodes], [False, True, True, False])
+        self.assertEqual(plan.nodes[3].strategy, "sort-based grouping, buffers the whole input")
+
+    def test_explain_strategy_memory_budget(self):
+        queryable = self.queryable.distinct().order_by(lambda x: -x).join(
+            [1, 2], lambda x: x, lambda y: y, lambda x, y: x)
+        with pinq.MemoryBudget(1 << 20, spill=True):
+            plan = queryable.explain()
+        self.assertEqual([node.strategy for node in plan.nodes[1:]], [
+            "hash set of the keys seen so far, spills keys to hash partitions beyond 1048576 bytes",
+            "external merge sort, spills sorted runs beyond 1048576 bytes",
+            "hash join, build side: other input, fails beyond 1048576 bytes"])
+        with pinq.MemoryBudget(1024):
+            plan = queryable.explain()
+        self.assertEqual(plan.nodes[2].strategy,
+                         "full sort, buffers the whole input, fails beyond 1024 bytes")
+        self.assertEqual(queryable.explain().nodes[2].strategy,
+                         "full sort, buffers the whole input")
+
+    def test_explain_strategy_arguments(self):
+        plan = self.queryable.distinct(approximate=True).union([1], lambda x: x, True).explain()
+        self.assertEqual([node.strategy for node in plan.nodes[1:]], [
+            "Bloom filter of the keys seen so far"] * 2)
+        plan = self.queryable.with_window({"n": "row_number"}, presorted=True).explain()
+        self.assertEqual(plan.root.strategy, "single pass over presorted partitions, buffers "
+                                             "the elements for lag and lead")
+
+    def test_explain_sampling(self):
+        plan = self.queryable.sample_fraction(0.5).sample(3).explain()
+        self.assertEqual([(node.estimate, node.exact) for node in plan.nodes], [
+            (10, True), (5, False), (3, False)])
+        self.assertEqual([node.ordered for node in plan.nodes], [False, False, False])
+
+    def test_explain_functions(self):
+        def is_odd(x):
+            return x % 2
+        plan = self.queryable.where(is_odd).order_by(is_odd).then_by_descending(abs).explain()
+        self.assertEqual(plan.nodes[1].functions, ["is_odd"])
+        self.assertEqual(plan.nodes[2].functions, ["is_odd", "abs"])
+
+    def test_explain_other_input(self):
+        other = pinq.as_queryable([1, 2]).where(lambda y: y > 1)
+        plan = self.queryable.join(other, lambda x: x, lambda y: y, lambda x, y: x).explain()
+        self.assertEqual(plan.root.operator, "join")
+        self.assertEqual([child.operator for child in plan.root.children], [
+            self.label, "where"])
+        self.assertEqual(plan.root.strategy, "hash join, build side: other input")
+
+    def test_explain_analyze(self):
+        plan = self.queryable.where(lambda x: x % 2).take(2).explain(analyze=True)
+        self.assertEqual([node.actual for node in plan.nodes], [3, 2, 2])
+        self.assertEqual(plan.profile.result, [1, 3])
+        self.assertTrue("actual=2" in str(plan))
+
+    def test_explain_str(self):
+        text = str(self.queryable.where(lambda x: x % 2).explain())
+        self.assertEqual(text.splitlines()[1], "`- %s  rows=10" % self.label)
+
+    def test_explain_terminal_type_error(self):
+        self.assertRaises(TypeError, self.queryable.explain, True, 100)
@@ -0,0 +1,122 @@
+import gc
+import sys
+import threading
+import traceback
+import unittest
+import weakref
+import pinq
+
+
+class Element(object):
+
+    def __init__(self, value):
+        self.value = value
+
+
+def _endless():
+    i = 0
+    while True:
+        yield i
+        i += 1
+
+
+class queryable_fork_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable = pinq.as_queryable(range(1000))
+
+    def test_fork_empty(self):
+        self.assertEqual(self.queryable0.fork(lambda q: q.count(), lambda q: q.to_list()),
+                         (0, []))
+
+    def test_fork(self):
+        self.assertEqual(self.queryable.fork(
+            lambda q: q.count(),
+            lambda q: q.where(lambda x: x % 2 == 0).sum(),
+            lambda q: q.select(lambda x: -x).min()), (1000, 249500, -999))
+
+    def test_fork_single_pass(self):
+        reads = []
+
+        def _elements():
+            for i in range(1000):
+                reads.append(i)
+                yield i
+        self.assertEqual(pinq.as_queryable(_elements()).stream().fork(
+            lambda q: q.count(), lambda q: q.max()), (1000, 999))
+        self.assertEqual(reads, list(range(1000)))
+
+    def test_fork_queryable_result(self):
+        self.assertEqual(self.queryable.fork(lambda q: q.skip(998), lambda q: q.take(1)),
+                         ([998, 999], [0]))
+
+    def test_fork_stops_early(self):
+        self.assertEqual(pinq.as_queryable(_endless()).stream().fork(
+            lambda q: q.first(lambda x: x > 5000), lambda q: q.take(3).to_list()),
+            (5001, [0, 1, 2]))
+
+    def test_fork_bounded_buffering(self):
+        alive = []
+
+        def _elements():
+            for i in range(20000):
+                element = Element(i)
+                alive.append(weakref.ref(element))
+                yield element
+
+        def _peak(q):
+            peak = 0
+            for i, _ in enumerate(q):
+                if i % 1000 == 0:
+                    gc.collect()
+                    peak = max(peak, len([ref for ref in alive if ref() is not None]))
+            return peak
+        peak, count = pinq.as_queryable(_elements()).stream().fork(_peak, lambda q: q.count())
+        self.assertEqual(count, 20000)
+        self.assertTrue(peak < 5000)
+
+    def test_fork_raises(self):
+        def _fail(q):
+            for x in q:
+                if x == 500:
+                    raise KeyError(x)
+        self.assertRaises(KeyError, self.queryable.fork, lambda q: q.count(), _fail)
+
+    def test_fork_raises_traceback(self):
+        def _fail(q):
+            raise KeyError(q)
+        try:
+            self.queryable.fork(_fail)
+        except KeyError:
+            tb = sys.exc_info()[2]
+        self.assertEqual(traceback.extract_tb(tb)[-1][2], "_fail")
+
+    def test_fork_source_raises(self):
+        def _elements():
+            yield 1
+            raise IOError("source failed")
+        self.assertRaises(IOError, pinq.as_queryable(_elements()).fork, lambda q: q.count())
+
+    def test_fork_cancellation_token(self):
+        token = pinq.CancellationToken(check_interval=16)
+        with token:
+            token.cancel()
+            self.assertRaises(pinq.QueryCancelled, pinq.as_queryable(_endless()).stream().fork,
+                              lambda q: q.count())
+
+    def test_fork_memory_budget(self):
+        with pinq.MemoryBudget(4096):
+            self.assertRaises(pinq.MemoryBudgetExceeded, self.queryable.fork,
+                              lambda q: q.count(), lambda q: q.distinct().to_list())
+
+    def test_fork_threads_finish(self):
+        threads = threading.active_count()
+        self.queryable.fork(lambda q: q.first(), lambda q: q.count())
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_fork_type_error(self):
+        self.assertRaises(TypeError, self.queryable.fork, lambda q: q.count(), 100)
+
+    def test_fork_value_error(self):
+        self.assertRaises(ValueError, self.queryable.fork)
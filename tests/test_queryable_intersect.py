@@ -52,3 +52,20 @@ class queryable_intersect_tests(unittest.TestCase):
 
     def test_intersect_key_selector_type_error(self):
         self.assertRaises(TypeError, self.queryable1.intersect, [1, 5], 100)
+
+    def test_intersect_spilling(self):
+        other = [(i * 7919) % 6000 for i in range(6000)]
+        with pinq.MemoryBudget(8192, spill=True) as budget:
+            result = pinq.as_queryable(range(3000, 9000)).intersect(other + other).to_list()
+        self.assertEqual(sorted(result), list(range(3000, 6000)))
+        self.assertEqual(budget.used, 0)
+
+    def test_intersect_budget_exceeded(self):
+        with pinq.MemoryBudget(8192):
+            self.assertRaises(pinq.MemoryBudgetExceeded,
+                              pinq.as_queryable(range(10)).intersect(range(6000)).to_list)
+
+    def test_intersect_approximate(self):
+        self.assertEqual(
+            list(self.queryable1.intersect(self.queryable4, approximate=True)), [3, 5, 7])
+        self.assertEqual(list(self.queryable1.intersect(self.queryable3, approximate=True)), [])
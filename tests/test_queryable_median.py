@@ -0,0 +1,29 @@
+import unittest
+import pinq
+
+
+class queryable_median_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable1 = pinq.as_queryable([3, 1, 2])
+        self.queryable2 = pinq.as_queryable([4, 1, 3, 2])
+
+    def test_median_odd(self):
+        self.assertEqual(self.queryable1.median(), 2)
+
+    def test_median_even(self):
+        self.assertEqual(self.queryable2.median(), 2.5)
+
+    def test_median_with_transform(self):
+        self.assertEqual(self.queryable1.median(lambda x: x * 10), 20)
+
+    def test_median_approximate(self):
+        self.assertEqual(self.queryable1.median(approximate=True), 2)
+        self.assertTrue(4800 <= pinq.as_queryable(range(10001)).median(approximate=True) <= 5200)
+
+    def test_median_empty(self):
+        self.assertRaises(ValueError, self.queryable0.median)
+
+    def test_median_transform_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.median, 100)
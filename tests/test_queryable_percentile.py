@@ -0,0 +1,30 @@
+import unittest
+import pinq
+
+
+class queryable_percentile_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable1 = pinq.as_queryable(range(101))
+
+    def test_percentile(self):
+        self.assertEqual(self.queryable1.percentile(99), 99)
+        self.assertEqual(self.queryable1.percentile(0), 0)
+        self.assertEqual(self.queryable1.percentile(100), 100)
+
+    def test_percentile_interpolated(self):
+        self.assertEqual(self.queryable1.percentile(99.5), 99.5)
+
+    def test_percentile_approximate(self):
+        self.assertTrue(97 <= self.queryable1.percentile(99, approximate=True) <= 100)
+
+    def test_percentile_empty(self):
+        self.assertRaises(ValueError, self.queryable0.percentile, 50)
+
+    def test_percentile_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.percentile, "50")
+
+    def test_percentile_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.percentile, 101)
+        self.assertRaises(ValueError, self.queryable1.percentile, -1)
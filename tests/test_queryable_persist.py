@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pinq
+
+
+class queryable_persist_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "result.pinq")
+        self.queryable = pinq.as_queryable(range(10))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_persist(self):
+        self.assertEqual(self.queryable.select(lambda x: (x, str(x))).persist(self.path), 10)
+        self.assertEqual(pinq.load(self.path).to_list(), [(x, str(x)) for x in range(10)])
+
+    def test_persist_chunks(self):
+        self.queryable.persist(self.path, chunk_size=3)
+        loaded = pinq.load(self.path)
+        self.assertEqual(loaded.to_list(), list(range(10)))
+        self.assertEqual(loaded.count(), 10)
+        self.assertEqual(loaded.element_at(7), 7)
+        self.assertEqual(loaded.count(lambda x: x > 4), 5)
+
+    def test_persist_typecode(self):
+        self.queryable.select(lambda x: x / 2.0).persist(self.path, "d", chunk_size=4)
+        loaded = pinq.load(self.path)
+        self.assertEqual(loaded.to_list(), [x / 2.0 for x in range(10)])
+        self.assertEqual(loaded.element_at(9), 4.5)
+        self.assertEqual(loaded.count(), 10)
+
+    def test_persist_empty(self):
+        self.assertEqual(pinq.as_queryable([]).persist(self.path), 0)
+        self.assertEqual(pinq.load(self.path).to_list(), [])
+
+    def test_persist_fingerprint(self):
+        self.queryable.persist(self.path, fingerprint="abc")
+        self.assertEqual(pinq.load(self.path, "abc").fingerprint, "abc")
+        self.assertRaises(ValueError, pinq.load, self.path, "def")
+
+    def test_persist_verify(self):
+        self.queryable.persist(self.path, "i")
+        self.assertTrue(pinq.load(self.path, verify=True).verify())
+        with open(self.path, 'r+b') as f:
+            f.seek(6)
+            f.write(b"\xff")
+        self.assertRaises(ValueError, pinq.load, self.path, verify=True)
+
+    def test_persist_load_not_persisted(self):
+        with open(self.path, 'wb') as f:
+            f.write(b"nothing to see here")
+        self.assertRaises(ValueError, pinq.load, self.path)
+
+    def test_persist_element_at_index_error(self):
+        self.queryable.persist(self.path)
+        self.assertRaises(IndexError, pinq.load(self.path).element_at, 10)
+
+    def test_persist_chunk_size_type_error(self):
+        self.assertRaises(TypeError, self.queryable.persist, self.path, chunk_size="big")
+
+    def test_persist_chunk_size_value_error(self):
+        self.assertRaises(ValueError, self.queryable.persist, self.path, chunk_size=0)
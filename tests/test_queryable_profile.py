@@ -0,0 +1,78 @@
+import time
+import unittest
+import pinq
+
+
+def slow_identity(x):
+    time.sleep(0.001)
+    return x
+
+
+class queryable_profile_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.source = range(1, 11)
+        self.queryable = pinq.as_queryable(self.source)
+
+    def test_profile_result(self):
+        profile = self.queryable.where(lambda x: x % 2).select(lambda x: x * 10).profile()
+        self.assertEqual(profile.result, [10, 30, 50, 70, 90])
+
+    def test_profile_elements(self):
+        profile = self.queryable.where(lambda x: x % 2).select(lambda x: x * 10).profile()
+        self.assertEqual([(stage.operator, stage.elements_in, stage.elements_out)
+                          for stage in profile.stages], [
+                              ("Queryable(%s)" % type(self.source).__name__, None, 10),
+                              ("where", 10, 5), ("select", 5, 5)])
+
+    def test_profile_terminal(self):
+        profile = self.queryable.take(4).profile(lambda q: q.count())
+        self.assertEqual(profile.result, 4)
+        self.assertEqual(profile.stages[0].elements_out, 4)
+
+    def test_profile_user_time(self):
+        profile = self.queryable.select(slow_identity).profile()
+        stage = profile.stages[1]
+        self.assertEqual(stage.functions, ["slow_identity"])
+        self.assertTrue(stage.user_time >= 0.01)
+        self.assertTrue(stage.time >= stage.user_time * 0.9)
+        self.assertTrue(profile.total_time >= stage.time)
+
+    def test_profile_buffered(self):
+        profile = self.queryable.where(lambda x: x > 2).order_by(lambda x: -x).then_by(
+            lambda x: x).join(range(5), lambda x: x % 3, lambda y: y % 3, lambda x, y: (x, y)
+                              ).take(1).profile()
+        self.assertEqual([stage.peak_buffered for stage in profile.stages], [0, 0, 8, 5, 0])
+        self.assertEqual(len(profile.stages[2].functions), 2)
+
+    def test_profile_does_not_change_query(self):
+        queryable = self.queryable.distinct(lambda x: x % 3)
+        queryable.profile()
+        self.assertEqual(list(queryable), [1, 2, 3])
+
+    def test_profile_with_window_inherited_order(self):
+        rows = [("a", 3), ("b", 1), ("a", 1), ("b", 2), ("a", 2), ("b", 2)]
+        queryable = pinq.as_queryable(rows).order_by(lambda row: row[1]).then_by_descending(
+            lambda row: row[0]).with_window({"rank": "rank"}, partition_by=lambda row: row[0])
+        profile = queryable.profile()
+        self.assertEqual(profile.result, queryable.to_list())
+        self.assertEqual([values["rank"] for _, values in profile.result], [1, 2, 3, 1, 2, 2])
+        self.assertEqual([stage.elements_out for stage in profile.stages], [6, 6, 6])
+
+    def test_profile_indexed_where(self):
+        key = lambda x: x % 4
+        queryable = pinq.as_queryable(range(20)).with_index(key)
+        profile = queryable.where(pinq.predicates.key_equals(key, 1)).profile()
+        self.assertEqual(profile.result, [1, 5, 9, 13, 17])
+        self.assertEqual([stage.elements_out for stage in profile.stages], [5, 5])
+        profile = queryable.where(lambda x: key(x) == 1).profile()
+        self.assertEqual(profile.result, [1, 5, 9, 13, 17])
+        self.assertEqual([stage.elements_out for stage in profile.stages], [20, 5])
+
+    def test_profile_report(self):
+        profile = self.queryable.group_by(lambda x: x % 2).profile()
+        self.assertTrue("group_by" in str(profile))
+        self.assertEqual(profile.as_dicts()[1]["peak_buffered"], 10)
+
+    def test_profile_terminal_type_error(self):
+        self.assertRaises(TypeError, self.queryable.profile, 100)
@@ -0,0 +1,58 @@
+import random
+import unittest
+import pinq
+
+
+class queryable_quantiles_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable1 = pinq.as_queryable([5, 1, 4, 2, 3])
+        values = list(range(10001))
+        random.Random(0).shuffle(values)
+        self.queryable2 = pinq.as_queryable(values)
+
+    def test_quantiles(self):
+        self.assertEqual(self.queryable1.quantiles([0, 0.25, 0.5, 1]), [1, 2, 3, 5])
+
+    def test_quantiles_interpolated(self):
+        self.assertEqual(self.queryable1.quantiles([0.125, 0.9]), [1.5, 4.6])
+
+    def test_quantiles_large(self):
+        self.assertEqual(self.queryable2.quantiles([0.01, 0.5, 0.99]), [100, 5000, 9900])
+
+    def test_quantiles_duplicates(self):
+        self.assertEqual(pinq.as_queryable([1] * 50 + [2] * 50).quantiles([0.25, 0.75]), [1, 2])
+
+    def test_quantiles_not_numbers(self):
+        self.assertEqual(pinq.as_queryable(["d", "a", "c", "b"]).quantiles([0.5]), ["b"])
+
+    def test_quantiles_with_transform(self):
+        self.assertEqual(self.queryable1.quantiles([1], lambda x: -x), [-1])
+
+    def test_quantiles_approximate(self):
+        low, middle, high = self.queryable2.quantiles([0.01, 0.5, 0.99], approximate=True)
+        self.assertTrue(0 <= low <= 300)
+        self.assertTrue(4800 <= middle <= 5200)
+        self.assertTrue(9700 <= high <= 10000)
+
+    def test_quantiles_budget_exceeded(self):
+        with pinq.MemoryBudget(4096):
+            self.assertRaises(pinq.MemoryBudgetExceeded, self.queryable2.quantiles, [0.5])
+
+    def test_quantiles_empty(self):
+        self.assertRaises(ValueError, self.queryable0.quantiles, [0.5])
+        self.assertRaises(ValueError, self.queryable0.quantiles, [0.5], approximate=True)
+
+    def test_quantiles_fractions_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.quantiles, 0.5)
+        self.assertRaises(TypeError, self.queryable1.quantiles, ["0.5"])
+
+    def test_quantiles_fractions_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.quantiles, [1.5])
+
+    def test_quantiles_transform_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.quantiles, [0.5], 100)
+
+    def test_quantiles_k_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.quantiles, [0.5], approximate=True, k=4)
@@ -0,0 +1,37 @@
+import unittest
+import pinq
+
+
+class queryable_running_average_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable = pinq.as_queryable([2, 4, 6, 0])
+
+    def test_running_average_empty(self):
+        self.assertEqual(self.queryable0.running_average().to_list(), [])
+
+    def test_running_average(self):
+        self.assertEqual(self.queryable.running_average().to_list(), [2.0, 3.0, 4.0, 3.0])
+
+    def test_running_average_transform(self):
+        self.assertEqual(self.queryable.running_average(lambda x: x // 2).to_list(),
+                         [1.0, 1.5, 2.0, 1.5])
+
+    def test_running_average_exponential(self):
+        self.assertEqual(self.queryable.running_average(alpha=0.5).to_list(),
+                         [2.0, 3.0, 4.5, 2.25])
+
+    def test_running_average_exponential_alpha_one(self):
+        self.assertEqual(self.queryable.running_average(alpha=1).to_list(),
+                         [2.0, 4.0, 6.0, 0.0])
+
+    def test_running_average_transform_type_error(self):
+        self.assertRaises(TypeError, self.queryable.running_average, 100)
+
+    def test_running_average_alpha_type_error(self):
+        self.assertRaises(TypeError, self.queryable.running_average, alpha="0.5")
+
+    def test_running_average_alpha_value_error(self):
+        self.assertRaises(ValueError, self.queryable.running_average, alpha=0)
+        self.assertRaises(ValueError, self.queryable.running_average, alpha=1.5)
@@ -0,0 +1,22 @@
+import unittest
+import pinq
+
+
+class queryable_running_count_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable = pinq.as_queryable([3, 1, 4, 1, 5])
+
+    def test_running_count_empty(self):
+        self.assertEqual(self.queryable0.running_count().to_list(), [])
+
+    def test_running_count(self):
+        self.assertEqual(self.queryable.running_count().to_list(), [1, 2, 3, 4, 5])
+
+    def test_running_count_predicate(self):
+        self.assertEqual(self.queryable.running_count(lambda x: x > 2).to_list(),
+                         [1, 1, 2, 2, 3])
+
+    def test_running_count_predicate_type_error(self):
+        self.assertRaises(TypeError, self.queryable.running_count, 100)
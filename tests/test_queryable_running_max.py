@@ -0,0 +1,22 @@
+import unittest
+import pinq
+
+
+class queryable_running_max_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable = pinq.as_queryable([3, 1, 4, 1, 5])
+
+    def test_running_max_empty(self):
+        self.assertEqual(self.queryable0.running_max().to_list(), [])
+
+    def test_running_max(self):
+        self.assertEqual(self.queryable.running_max().to_list(), [3, 3, 4, 4, 5])
+
+    def test_running_max_transform(self):
+        self.assertEqual(self.queryable.running_max(lambda x: -x).to_list(),
+                         [-3, -1, -1, -1, -1])
+
+    def test_running_max_transform_type_error(self):
+        self.assertRaises(TypeError, self.queryable.running_max, 100)
@@ -0,0 +1,22 @@
+import unittest
+import pinq
+
+
+class queryable_running_min_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable = pinq.as_queryable([3, 1, 4, 1, 5])
+
+    def test_running_min_empty(self):
+        self.assertEqual(self.queryable0.running_min().to_list(), [])
+
+    def test_running_min(self):
+        self.assertEqual(self.queryable.running_min().to_list(), [3, 1, 1, 1, 1])
+
+    def test_running_min_transform(self):
+        self.assertEqual(self.queryable.running_min(lambda x: -x).to_list(),
+                         [-3, -3, -4, -4, -5])
+
+    def test_running_min_transform_type_error(self):
+        self.assertRaises(TypeError, self.queryable.running_min, 100)
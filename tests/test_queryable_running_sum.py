@@ -0,0 +1,27 @@
+import unittest
+import pinq
+
+
+class queryable_running_sum_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable = pinq.as_queryable([3, 1, 4, 1, 5])
+
+    def test_running_sum_empty(self):
+        self.assertEqual(self.queryable0.running_sum().to_list(), [])
+
+    def test_running_sum(self):
+        self.assertEqual(self.queryable.running_sum().to_list(), [3, 4, 8, 9, 14])
+
+    def test_running_sum_transform(self):
+        self.assertEqual(self.queryable.running_sum(lambda x: -x).to_list(),
+                         [-3, -4, -8, -9, -14])
+
+    def test_running_sum_stream(self):
+        queryable = pinq.as_queryable(iter(range(4))).stream().running_sum()
+        self.assertEqual(queryable.take(2).to_list(), [0, 1])
+        self.assertEqual(queryable.to_list(), [3, 6])
+
+    def test_running_sum_transform_type_error(self):
+        self.assertRaises(TypeError, self.queryable.running_sum, 100)
@@ -0,0 +1,45 @@
+import unittest
+import pinq
+
+
+class queryable_sample_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable1 = pinq.as_queryable(range(10))
+        self.queryable2 = pinq.as_queryable(range(100000))
+
+    def test_sample_empty(self):
+        self.assertEqual(self.queryable0.sample(3).to_list(), [])
+
+    def test_sample_fewer_than_k(self):
+        self.assertEqual(sorted(self.queryable1.sample(20)), list(range(10)))
+
+    def test_sample(self):
+        sample = self.queryable2.sample(100, seed=1).to_list()
+        self.assertEqual(len(sample), 100)
+        self.assertEqual(len(set(sample)), 100)
+        self.assertTrue(all(0 <= x < 100000 for x in sample))
+
+    def test_sample_uniform(self):
+        sample = self.queryable2.sample(1000, seed=2).to_list()
+        self.assertTrue(400 <= len([x for x in sample if x < 50000]) <= 600)
+
+    def test_sample_seed(self):
+        self.assertEqual(self.queryable2.sample(10, seed=3).to_list(),
+                         self.queryable2.sample(10, seed=3).to_list())
+
+    def test_sample_zero(self):
+        self.assertEqual(self.queryable1.sample(0).to_list(), [])
+
+    def test_sample_composes(self):
+        sample = self.queryable2.where(lambda x: x % 2 == 0).sample(5).select(
+            lambda x: x // 2).to_list()
+        self.assertEqual(len(sample), 5)
+        self.assertEqual(self.queryable1.sample(3).count(), 3)
+
+    def test_sample_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.sample, 1.5)
+
+    def test_sample_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.sample, -1)
@@ -0,0 +1,35 @@
+import unittest
+import pinq
+
+
+class queryable_sample_by_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable1 = pinq.as_queryable(range(10000))
+
+    def test_sample_by_empty(self):
+        self.assertEqual(self.queryable0.sample_by(lambda x: x, 2).to_list(), [])
+
+    def test_sample_by(self):
+        sample = self.queryable1.sample_by(lambda x: x % 3, 5, seed=1).to_list()
+        self.assertEqual(len(sample), 15)
+        self.assertEqual([x % 3 for x in sample], [0] * 5 + [1] * 5 + [2] * 5)
+        self.assertEqual(len(set(sample)), 15)
+
+    def test_sample_by_small_strata(self):
+        sample = pinq.as_queryable([1, 2, 2, 3, 3, 3]).sample_by(lambda x: x, 2).to_list()
+        self.assertEqual(sample, [1, 2, 2, 3, 3])
+
+    def test_sample_by_seed(self):
+        self.assertEqual(self.queryable1.sample_by(lambda x: x % 7, 3, seed=2).to_list(),
+                         self.queryable1.sample_by(lambda x: x % 7, 3, seed=2).to_list())
+
+    def test_sample_by_key_selector_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.sample_by, 100, 2)
+
+    def test_sample_by_k_per_key_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.sample_by, lambda x: x, 2.5)
+
+    def test_sample_by_k_per_key_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.sample_by, lambda x: x, -1)
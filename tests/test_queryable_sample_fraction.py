@@ -0,0 +1,32 @@
+import unittest
+import pinq
+
+
+class queryable_sample_fraction_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable1 = pinq.as_queryable(range(100000))
+
+    def test_sample_fraction_empty(self):
+        self.assertEqual(self.queryable0.sample_fraction(0.5).to_list(), [])
+
+    def test_sample_fraction(self):
+        sample = self.queryable1.sample_fraction(0.1, seed=1).to_list()
+        self.assertTrue(9000 <= len(sample) <= 11000)
+        self.assertEqual(sample, sorted(set(sample)))
+
+    def test_sample_fraction_seed(self):
+        self.assertEqual(self.queryable1.sample_fraction(0.01, seed=2).to_list(),
+                         self.queryable1.sample_fraction(0.01, seed=2).to_list())
+
+    def test_sample_fraction_bounds(self):
+        self.assertEqual(self.queryable1.sample_fraction(1).count(), 100000)
+        self.assertEqual(self.queryable1.sample_fraction(0).count(), 0)
+
+    def test_sample_fraction_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.sample_fraction, "0.5")
+
+    def test_sample_fraction_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.sample_fraction, 1.5)
+        self.assertRaises(ValueError, self.queryable1.sample_fraction, -0.5)
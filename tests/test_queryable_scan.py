@@ -0,0 +1,43 @@
+import unittest
+import pinq
+
+
+class queryable_scan_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable = pinq.as_queryable(range(1, 6))
+
+    def test_scan_empty(self):
+        self.assertEqual(self.queryable0.scan(lambda x, y: x + y).to_list(), [])
+
+    def test_scan_product(self):
+        self.assertEqual(self.queryable.scan(lambda x, y: x * y).to_list(),
+                         [1, 2, 6, 24, 120])
+
+    def test_scan_product_provided_seed(self):
+        self.assertEqual(self.queryable.scan(lambda x, y: x * y, seed=2).to_list(),
+                         [2, 4, 12, 48, 240])
+
+    def test_scan_last_equals_aggregate(self):
+        self.assertEqual(self.queryable.scan(lambda x, y: x - y).last(),
+                         self.queryable.aggregate(lambda x, y: x - y))
+
+    def test_scan_reiterated(self):
+        queryable = pinq.as_queryable(iter(range(1, 4))).scan(lambda x, y: x + y)
+        self.assertEqual(queryable.to_list(), [1, 3, 6])
+        self.assertEqual(queryable.to_list(), [1, 3, 6])
+
+    def test_scan_reiterated_replays(self):
+        calls = []
+
+        def _add(x, y):
+            calls.append(y)
+            return x + y
+        queryable = self.queryable.scan(_add)
+        self.assertEqual(queryable.to_list(), [1, 3, 6, 10, 15])
+        self.assertEqual(queryable.to_list(), [1, 3, 6, 10, 15])
+        self.assertEqual(calls, [2, 3, 4, 5])
+
+    def test_scan_accumulator_type_error(self):
+        self.assertRaises(TypeError, self.queryable.scan, 100)
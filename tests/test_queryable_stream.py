@@ -0,0 +1,76 @@
+import gc
+import itertools
+import unittest
+import weakref
+import pinq
+
+
+class Element(object):
+    pass
+
+
+class queryable_stream_tests(unittest.TestCase):
+
+    def test_stream_single_pass(self):
+        queryable = pinq.as_queryable(range(5)).stream()
+        self.assertEqual(queryable.take(2).to_list(), [0, 1])
+        self.assertEqual(queryable.to_list(), [2, 3, 4])
+        self.assertEqual(queryable.to_list(), [])
+
+    def test_stream_returns_copy(self):
+        queryable = pinq.as_queryable(range(5))
+        streamed = queryable.stream()
+        self.assertFalse(streamed is queryable)
+        self.assertFalse(queryable._streaming)
+        self.assertEqual(streamed._lineage[:2], (queryable, 'stream'))
+        self.assertEqual(streamed.to_list(), [0, 1, 2, 3, 4])
+
+    def test_stream_ordered(self):
+        ordered = pinq.as_queryable([3, 1, 2]).order_by(lambda x: x)
+        streamed = ordered.stream().then_by(lambda x: -x)
+        self.assertEqual(len(ordered._keys), 1)
+        self.assertEqual(streamed.to_list(), [1, 2, 3])
+
+    def test_stream_derived(self):
+        queryable = pinq.as_queryable(range(10)).stream().where(lambda x: x % 2)
+        self.assertEqual(queryable.first(), 1)
+        self.assertEqual(queryable.first(), 3)
+
+    def test_stream_releases_elements(self):
+        references = []
+
+        def _elements():
+            for _ in range(10):
+                element = Element()
+                references.append(weakref.ref(element))
+                yield element
+        queryable = pinq.as_queryable(_elements()).stream().select(lambda x: x)
+        iterator = iter(queryable)
+        for _ in range(5):
+            next(iterator)
+        gc.collect()
+        self.assertEqual([reference() is None for reference in references[:4]], [True] * 4)
+
+    def test_not_streamed_keeps_elements(self):
+        references = []
+
+        def _elements():
+            for _ in range(10):
+                element = Element()
+                references.append(weakref.ref(element))
+                yield element
+        queryable = pinq.as_queryable(_elements()).select(lambda x: x)
+        iterator = iter(queryable)
+        for _ in range(5):
+            next(iterator)
+        gc.collect()
+        self.assertEqual([reference() is None for reference in references[:4]], [False] * 4)
+
+    def test_stream_unbounded(self):
+        self.assertEqual(pinq.as_queryable(itertools.count()).stream().where(
+            lambda x: x % 3 == 0).take(3).to_list(), [0, 3, 6])
+
+    def test_not_streamed_reiterable(self):
+        queryable = pinq.as_queryable(iter(range(3)))
+        self.assertEqual(queryable.to_list(), [0, 1, 2])
+        self.assertEqual(queryable.to_list(), [0, 1, 2])
@@ -0,0 +1,27 @@
+import unittest
+from array import array
+import pinq
+
+
+class queryable_to_array_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable = pinq.as_queryable(range(1, 6))
+
+    def test_to_array(self):
+        self.assertEqual(self.queryable.to_array("l"), array("l", [1, 2, 3, 4, 5]))
+
+    def test_to_array_from_iterator(self):
+        self.assertEqual(pinq.as_queryable(iter([0.5, 1.5])).to_array("d"), array("d", [0.5, 1.5]))
+
+    def test_to_array_empty(self):
+        self.assertEqual(pinq.as_queryable([]).to_array("i"), array("i"))
+
+    def test_to_array_typecode_type_error(self):
+        self.assertRaises(TypeError, self.queryable.to_array, 100)
+
+    def test_to_array_typecode_value_error(self):
+        self.assertRaises(ValueError, self.queryable.to_array, "?")
+
+    def test_to_array_element_type_error(self):
+        self.assertRaises(TypeError, pinq.as_queryable(["a"]).to_array, "l")
@@ -0,0 +1,35 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pinq
+
+
+class queryable_to_csv_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "out.csv")
+        self.queryable = pinq.as_queryable([(1, "a"), (2, "b,c")])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def test_to_csv(self):
+        self.assertEqual(self.queryable.to_csv(self.path), 2)
+        self.assertEqual(self.read(), b'1,a\r\n2,"b,c"\r\n')
+
+    def test_to_csv_with_header(self):
+        self.queryable.to_csv(self.path, header=["id", "name"])
+        self.assertEqual(self.read(), b'id,name\r\n1,a\r\n2,"b,c"\r\n')
+
+    def test_to_csv_with_row_transform(self):
+        self.queryable.to_csv(self.path, lambda row: (row[0] * 10, row[1]), dialect="excel-tab")
+        self.assertEqual(self.read(), b'10\ta\r\n20\tb,c\r\n')
+
+    def test_to_csv_row_transform_type_error(self):
+        self.assertRaises(TypeError, self.queryable.to_csv, self.path, 100)
@@ -0,0 +1,83 @@
+import bz2
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import pinq
+
+
+class queryable_to_file_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "out.txt")
+        self.queryable = pinq.as_queryable(range(1, 6))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, opener=open):
+        with opener(self.path, 'rb') as f:
+            return f.read()
+
+    def test_to_file(self):
+        self.assertEqual(self.queryable.to_file(self.path), 5)
+        self.assertEqual(self.read(), b"1\n2\n3\n4\n5\n")
+
+    def test_to_file_with_transform(self):
+        self.queryable.to_file(self.path, lambda x: "#%d" % x, separator=",")
+        self.assertEqual(self.read(), b"#1,#2,#3,#4,#5,")
+
+    def test_to_file_empty(self):
+        self.assertEqual(pinq.as_queryable([]).to_file(self.path), 0)
+        self.assertEqual(self.read(), b"")
+
+    def test_to_file_gzip(self):
+        self.queryable.to_file(self.path, compression="gzip")
+        self.assertEqual(self.read(gzip.open), b"1\n2\n3\n4\n5\n")
+
+    def test_to_file_bz2(self):
+        self.queryable.to_file(self.path, compression="bz2", buffer_size=2)
+        self.assertEqual(self.read(bz2.BZ2File), b"1\n2\n3\n4\n5\n")
+
+    def test_to_file_atomic(self):
+        self.queryable.to_file(self.path, atomic=True)
+        self.assertEqual(self.read(), b"1\n2\n3\n4\n5\n")
+        self.assertEqual(os.listdir(self.directory), ["out.txt"])
+
+    def test_to_file_atomic_mode(self):
+        umask = os.umask(0o022)
+        try:
+            self.queryable.to_file(self.path, atomic=True)
+        finally:
+            os.umask(umask)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o644)
+
+    def test_to_file_atomic_does_not_set_umask(self):
+        def _umask(mask):
+            raise AssertionError("The umask was changed.")
+        umask = os.umask
+        os.umask = _umask
+        try:
+            self.queryable.to_file(self.path, atomic=True)
+        finally:
+            os.umask = umask
+        self.assertEqual(os.listdir(self.directory), ["out.txt"])
+
+    def test_to_file_atomic_failure(self):
+        self.queryable.to_file(self.path)
+
+        def _fail(x):
+            if x == 3:
+                raise RuntimeError()
+            return str(x)
+        self.assertRaises(RuntimeError, self.queryable.to_file, self.path, _fail, atomic=True)
+        self.assertEqual(self.read(), b"1\n2\n3\n4\n5\n")
+        self.assertEqual(os.listdir(self.directory), ["out.txt"])
+
+    def test_to_file_transform_type_error(self):
+        self.assertRaises(TypeError, self.queryable.to_file, self.path, 100)
+
+    def test_to_file_compression_value_error(self):
+        self.assertRaises(ValueError, self.queryable.to_file, self.path, compression="zip")
@@ -0,0 +1,31 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import pinq
+
+
+class queryable_to_jsonl_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "out.jsonl")
+        self.queryable = pinq.as_queryable([{"id": 1}, {"id": 2}])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_to_jsonl(self):
+        self.assertEqual(self.queryable.to_jsonl(self.path), 2)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b'{"id": 1}\n{"id": 2}\n')
+
+    def test_to_jsonl_with_transform_and_compression(self):
+        self.queryable.to_jsonl(self.path, lambda x: x["id"], compression="gzip", atomic=True)
+        with gzip.open(self.path, 'rb') as f:
+            self.assertEqual([json.loads(line.decode("utf-8")) for line in f], [1, 2])
+
+    def test_to_jsonl_transform_type_error(self):
+        self.assertRaises(TypeError, self.queryable.to_jsonl, self.path, 100)
@@ -0,0 +1,53 @@
+import unittest
+import pinq
+
+
+class queryable_to_lookup_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable = pinq.as_queryable(["apple", "banana", "avocado", "cherry", "blueberry"])
+
+    def test_to_lookup(self):
+        lookup = self.queryable.to_lookup(lambda s: s[0])
+        self.assertEqual(len(lookup), 3)
+        self.assertEqual(lookup.keys(), ("a", "b", "c"))
+        self.assertEqual(list(lookup["a"]), ["apple", "avocado"])
+        self.assertEqual(list(lookup["b"]), ["banana", "blueberry"])
+        self.assertEqual(lookup["b"].key, "b")
+        self.assertEqual(len(lookup["c"]), 1)
+
+    def test_to_lookup_with_value_selector(self):
+        lookup = self.queryable.to_lookup(lambda s: s[0], len)
+        self.assertEqual(list(lookup["a"]), [5, 7])
+
+    def test_to_lookup_missing_key(self):
+        lookup = self.queryable.to_lookup(lambda s: s[0])
+        self.assertFalse("z" in lookup)
+        self.assertTrue("a" in lookup)
+        self.assertEqual(len(lookup["z"]), 0)
+        self.assertEqual(list(lookup["z"]), [])
+
+    def test_to_lookup_groupings(self):
+        lookup = self.queryable.to_lookup(lambda s: s[0])
+        self.assertEqual([(grouping.key, list(grouping)) for grouping in lookup],
+                         [("a", ["apple", "avocado"]), ("b", ["banana", "blueberry"]),
+                          ("c", ["cherry"])])
+        grouping = lookup["b"]
+        self.assertEqual((grouping[0], grouping[-1]), ("banana", "blueberry"))
+        self.assertRaises(IndexError, grouping.__getitem__, 2)
+        self.assertEqual(pinq.as_queryable(grouping).count(), 2)
+        iterator = iter(grouping)
+        self.assertEqual(next(iterator), "banana")
+        self.assertEqual(list(grouping), ["banana", "blueberry"])
+        self.assertEqual(list(iterator), ["blueberry"])
+
+    def test_to_lookup_empty(self):
+        lookup = pinq.as_queryable([]).to_lookup(len)
+        self.assertEqual(len(lookup), 0)
+        self.assertEqual(list(lookup), [])
+
+    def test_to_lookup_key_selector_type_error(self):
+        self.assertRaises(TypeError, self.queryable.to_lookup, 219853)
+
+    def test_to_lookup_value_selector_type_error(self):
+        self.assertRaises(TypeError, self.queryable.to_lookup, len, 219853)
@@ -0,0 +1,40 @@
+import unittest
+import pinq
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class queryable_to_numpy_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable = pinq.as_queryable(range(1, 6))
+
+    def test_to_numpy(self):
+        result = self.queryable.to_numpy()
+        self.assertEqual(result.dtype, numpy.dtype(float))
+        self.assertEqual(result.tolist(), [1.0, 2.0, 3.0, 4.0, 5.0])
+
+    def test_to_numpy_with_dtype(self):
+        result = self.queryable.select(lambda x: x * 2).to_numpy(numpy.int32)
+        self.assertEqual(result.dtype, numpy.dtype(numpy.int32))
+        self.assertEqual(result.tolist(), [2, 4, 6, 8, 10])
+
+    def test_to_numpy_unknown_length(self):
+        result = pinq.as_queryable(iter(range(5000))).where(lambda x: x % 2).to_numpy(int)
+        self.assertEqual(result.tolist(), list(range(1, 5000, 2)))
+
+    def test_to_numpy_stale_length(self):
+        source = [1, 2]
+        queryable = pinq.as_queryable(source)
+        source.extend([3, 4])
+        self.assertEqual(queryable.to_numpy(int).tolist(), [1, 2, 3, 4])
+
+    def test_to_numpy_length_shrinks(self):
+        self.assertEqual(self.queryable.take(10).skip(3).to_numpy(int).tolist(), [4, 5])
+
+    def test_to_numpy_empty(self):
+        self.assertEqual(pinq.as_queryable([]).to_numpy().tolist(), [])
@@ -0,0 +1,61 @@
+import unittest
+import pinq
+
+
+class queryable_to_sorted_index_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.events = [(5, "e"), (1, "a"), (3, "c"), (3, "c2"), (9, "i"), (7, "g")]
+        self.index = pinq.as_queryable(self.events).to_sorted_index(lambda event: event[0])
+
+    def names(self, queryable):
+        return queryable.select(lambda event: event[1]).to_list()
+
+    def test_to_sorted_index(self):
+        self.assertEqual(len(self.index), 6)
+        self.assertEqual([event[1] for event in self.index], ["a", "c", "c2", "e", "g", "i"])
+
+    def test_to_sorted_index_range(self):
+        self.assertEqual(self.names(self.index.range(3, 7)), ["c", "c2", "e"])
+        self.assertEqual(self.names(self.index.range(4, 4)), [])
+        self.assertEqual(self.names(self.index.range(8, 2)), [])
+        self.assertEqual(self.names(self.index.range(upper=4)), ["a", "c", "c2"])
+        self.assertEqual(self.names(self.index.range(7)), ["g", "i"])
+        self.assertEqual(self.index.range(3, 7).count(), 3)
+
+    def test_to_sorted_index_comparisons(self):
+        self.assertEqual(self.names(self.index.eq(3)), ["c", "c2"])
+        self.assertEqual(self.names(self.index.ge(5)), ["e", "g", "i"])
+        self.assertEqual(self.names(self.index.gt(5)), ["g", "i"])
+        self.assertEqual(self.names(self.index.le(3)), ["a", "c", "c2"])
+        self.assertEqual(self.names(self.index.lt(3)), ["a"])
+        self.assertEqual(self.names(self.index.lt(0)), [])
+
+    def test_to_sorted_index_prefix(self):
+        index = pinq.as_queryable(["banana", "apple", "app", "apricot", "b"]).to_sorted_index(
+            pinq.transforms.identity)
+        self.assertEqual(index.prefix("ap").to_list(), ["app", "apple", "apricot"])
+        self.assertEqual(index.prefix("app").to_list(), ["app", "apple"])
+        self.assertEqual(index.prefix("c").to_list(), [])
+        self.assertEqual(index.prefix("").count(), 5)
+
+    def test_to_sorted_index_nearest(self):
+        self.assertEqual(self.names(self.index.nearest(6)), ["e"])
+        self.assertEqual(self.names(self.index.nearest(6, 3)), ["e", "g", "c"])
+        self.assertEqual(self.names(self.index.nearest(100, 2)), ["i", "g"])
+        self.assertEqual(self.names(self.index.nearest(-5, 2)), ["a", "c"])
+        self.assertEqual(self.names(self.index.nearest(3, 2)), ["c", "c2"])
+        self.assertEqual(self.names(self.index.nearest(2, 2)), ["a", "c"])
+        self.assertEqual(self.index.nearest(3, 100).count(), 6)
+
+    def test_to_sorted_index_empty(self):
+        index = pinq.as_queryable([]).to_sorted_index(pinq.transforms.identity)
+        self.assertEqual(index.range(0, 10).to_list(), [])
+        self.assertEqual(index.nearest(3).to_list(), [])
+
+    def test_to_sorted_index_type_error(self):
+        self.assertRaises(TypeError, pinq.as_queryable(self.events).to_sorted_index, 100)
+        self.assertRaises(TypeError, self.index.nearest, 3, 1.5)
+
+    def test_to_sorted_index_value_error(self):
+        self.assertRaises(ValueError, self.index.nearest, 3, 0)
@@ -0,0 +1,51 @@
+import random
+import unittest
+import pinq
+
+
+class queryable_top_frequent_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable1 = pinq.as_queryable([1, 2, 2, 3, 3, 3, 4, 4, 4, 4])
+        generator = random.Random(0)
+        self.keys = [int(generator.paretovariate(1.2)) for _ in range(50000)]
+        self.queryable2 = pinq.as_queryable(self.keys)
+
+    def test_top_frequent_empty(self):
+        self.assertEqual(self.queryable0.top_frequent(3), [])
+        self.assertEqual(self.queryable0.top_frequent(3, exact=True), [])
+
+    def test_top_frequent(self):
+        self.assertEqual(self.queryable1.top_frequent(2), [(4, 4), (3, 3)])
+
+    def test_top_frequent_exact(self):
+        self.assertEqual(self.queryable1.top_frequent(2, exact=True), [(4, 4), (3, 3)])
+
+    def test_top_frequent_with_key_selector(self):
+        self.assertEqual(self.queryable1.top_frequent(1, lambda x: x % 2), [(0, 6)])
+
+    def test_top_frequent_approximate(self):
+        exact = self.queryable2.top_frequent(5, exact=True)
+        approximate = self.queryable2.top_frequent(5, capacity=20)
+        self.assertEqual([key for key, _ in approximate], [key for key, _ in exact])
+        for (_, estimate), (_, count) in zip(approximate, exact):
+            self.assertTrue(count <= estimate <= count + 2 * len(self.keys) // 20)
+
+    def test_top_frequent_budget_exceeded(self):
+        with pinq.MemoryBudget(4096):
+            self.assertRaises(pinq.MemoryBudgetExceeded, pinq.as_queryable(range(10000))
+                              .top_frequent, 3, exact=True)
+
+    def test_top_frequent_k_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.top_frequent, 1.5)
+
+    def test_top_frequent_k_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.top_frequent, 0)
+
+    def test_top_frequent_key_selector_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.top_frequent, 2, 100)
+
+    def test_top_frequent_capacity_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.top_frequent, 5, capacity=3)
+        self.assertRaises(ValueError, self.queryable1.top_frequent, 1, capacity=1)
@@ -30,3 +30,12 @@ class queryable_union_tests(unittest.TestCase):
 
     def test_union_key_selector_type_error(self):
         self.assertRaises(TypeError, self.queryable1.union, [1, 5], 100)
+
+    def test_union_spilling(self):
+        with pinq.MemoryBudget(8192, spill=True):
+            result = pinq.as_queryable(range(3000)).union(range(1000, 4000)).to_list()
+        self.assertEqual(sorted(result), list(range(4000)))
+
+    def test_union_approximate(self):
+        self.assertEqual(list(self.queryable1.union(self.queryable2, approximate=True)), [
+            1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
@@ -0,0 +1,51 @@
+import unittest
+from datetime import datetime, timedelta
+import pinq
+
+
+class queryable_window_session_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable1 = pinq.as_queryable([1, 2, 4, 10, 11, 30])
+
+    def test_window_session_empty(self):
+        self.assertEqual(self.queryable0.window_session(5, lambda x: x).to_list(), [])
+
+    def test_window_session(self):
+        self.assertEqual(self.queryable1.window_session(2, lambda x: x).to_list(), [
+            [1, 2, 4], [10, 11], [30]])
+
+    def test_window_session_datetime(self):
+        start = datetime(2016, 1, 1)
+        times = [start + timedelta(seconds=s) for s in (0, 20, 100, 110, 400)]
+        self.assertEqual(pinq.as_queryable(times).window_session(
+            timedelta(seconds=60), lambda t: t, 'count').to_list(), [2, 2, 1])
+        self.assertRaises(ValueError, self.queryable1.window_session, timedelta(seconds=-1),
+                          lambda t: t)
+
+    def test_window_session_zero_gap(self):
+        self.assertEqual(pinq.as_queryable([1, 1, 2]).window_session(
+            0, lambda x: x).to_list(), [[1, 1], [2]])
+
+    def test_window_session_aggregate(self):
+        self.assertEqual(self.queryable1.window_session(
+            5, lambda x: x, 'count').to_list(), [3, 2, 1])
+        self.assertEqual(self.queryable1.window_session(
+            5, lambda x: x, 'average').to_list(), [7 / 3.0, 10.5, 30.0])
+
+    def test_window_session_long_aggregate(self):
+        queryable = pinq.as_queryable(range(5000))
+        self.assertEqual(queryable.window_session(1, lambda x: x, 'min').to_list(), [0])
+        self.assertEqual(queryable.window_session(1, lambda x: x, 'max').to_list(), [4999])
+        self.assertEqual(queryable.window_session(
+            1, lambda x: x, 'sum', lambda x: 2 * x).to_list(), [4999 * 5000])
+
+    def test_window_session_time_selector_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.window_session, 5, 100)
+
+    def test_window_session_gap_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.window_session, -1, lambda x: x)
+
+    def test_window_session_aggregate_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.window_session, 1, lambda x: x, 'mode')
@@ -0,0 +1,54 @@
+import random
+import unittest
+import pinq
+
+
+class queryable_window_sliding_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable1 = pinq.as_queryable(range(6))
+        generator = random.Random(0)
+        self.values = [generator.randint(0, 100) for _ in range(500)]
+
+    def test_window_sliding_empty(self):
+        self.assertEqual(self.queryable0.window_sliding(3).to_list(), [])
+
+    def test_window_sliding(self):
+        self.assertEqual(self.queryable1.window_sliding(3).to_list(), [
+            [0, 1, 2], [1, 2, 3], [2, 3, 4], [3, 4, 5]])
+
+    def test_window_sliding_step(self):
+        self.assertEqual(self.queryable1.window_sliding(2, 3).to_list(), [[0, 1], [3, 4]])
+        self.assertEqual(self.queryable1.window_sliding(4, 2).to_list(), [
+            [0, 1, 2, 3], [2, 3, 4, 5]])
+
+    def test_window_sliding_too_short(self):
+        self.assertEqual(self.queryable1.window_sliding(10).to_list(), [])
+
+    def test_window_sliding_aggregates(self):
+        queryable = pinq.as_queryable(self.values)
+        windows = queryable.window_sliding(7, 2).to_list()
+        self.assertEqual(queryable.window_sliding(7, 2, 'min').to_list(),
+                         [min(window) for window in windows])
+        self.assertEqual(queryable.window_sliding(7, 2, 'max').to_list(),
+                         [max(window) for window in windows])
+        self.assertEqual(queryable.window_sliding(7, 2, 'sum').to_list(),
+                         [sum(window) for window in windows])
+        self.assertEqual(queryable.window_sliding(7, 2, 'count').to_list(), [7] * len(windows))
+        self.assertEqual(queryable.window_sliding(7, 2, 'average').to_list(),
+                         [sum(window) / 7.0 for window in windows])
+
+    def test_window_sliding_aggregate_with_transform(self):
+        self.assertEqual(self.queryable1.window_sliding(
+            2, aggregate='max', transform=lambda x: -x).to_list(), [0, -1, -2, -3, -4])
+
+    def test_window_sliding_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.window_sliding, 1.5)
+        self.assertRaises(TypeError, self.queryable1.window_sliding, 2, 1.5)
+        self.assertRaises(TypeError, self.queryable1.window_sliding, 2, 1, 'sum', 100)
+
+    def test_window_sliding_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.window_sliding, 0)
+        self.assertRaises(ValueError, self.queryable1.window_sliding, 2, 0)
+        self.assertRaises(ValueError, self.queryable1.window_sliding, 2, 1, 'product')
@@ -0,0 +1,55 @@
+import itertools
+import unittest
+from datetime import datetime, timedelta
+import pinq
+
+
+class queryable_window_tumbling_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.queryable1 = pinq.as_queryable(range(7))
+        self.events = pinq.as_queryable([(0, "a"), (3, "b"), (10, "c"), (31, "d"), (35, "e")])
+
+    def test_window_tumbling_empty(self):
+        self.assertEqual(self.queryable0.window_tumbling(3).to_list(), [])
+
+    def test_window_tumbling(self):
+        self.assertEqual(self.queryable1.window_tumbling(3).to_list(), [
+            [0, 1, 2], [3, 4, 5], [6]])
+
+    def test_window_tumbling_aggregate(self):
+        self.assertEqual(self.queryable1.window_tumbling(3, aggregate='sum').to_list(), [3, 12, 6])
+        self.assertEqual(self.queryable1.window_tumbling(
+            3, aggregate='max', transform=lambda x: -x).to_list(), [0, -3, -6])
+
+    def test_window_tumbling_time(self):
+        self.assertEqual(self.events.window_tumbling(10, lambda e: e[0]).select(
+            lambda w: [e[1] for e in w]).to_list(), [["a", "b"], ["c"], ["d", "e"]])
+
+    def test_window_tumbling_time_aggregate(self):
+        self.assertEqual(self.events.window_tumbling(
+            10, lambda e: e[0], 'count').to_list(), [2, 1, 2])
+
+    def test_window_tumbling_datetime(self):
+        start = datetime(2016, 1, 1, 12, 0, 30)
+        events = pinq.as_queryable([start + timedelta(seconds=s) for s in (0, 50, 60, 185)])
+        self.assertEqual(events.window_tumbling(
+            timedelta(minutes=1), lambda t: t, 'count').to_list(), [2, 1, 1])
+        self.assertRaises(ValueError, events.window_tumbling, timedelta(0), lambda t: t)
+
+    def test_window_tumbling_unbounded(self):
+        self.assertEqual(pinq.as_queryable(itertools.count()).stream().window_tumbling(
+            100, aggregate='min').take(3).to_list(), [0, 100, 200])
+
+    def test_window_tumbling_size_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.window_tumbling, 1.5)
+
+    def test_window_tumbling_time_selector_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.window_tumbling, 5, 100)
+
+    def test_window_tumbling_size_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.window_tumbling, 0)
+
+    def test_window_tumbling_aggregate_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.window_tumbling, 3, aggregate='median')
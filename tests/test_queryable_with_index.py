@@ -0,0 +1,55 @@
+import unittest
+import pinq
+from pinq.predicates import key_equals
+
+
+def _user(row):
+    return row[0]
+
+
+class queryable_with_index_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [(i % 5, i) for i in range(20)]
+        self.checked = []
+
+        def _record(row):
+            self.checked.append(row)
+            return row[0]
+        self.key = _record
+        self.indexed = pinq.as_queryable(self.rows).with_index(_user)
+
+    def test_with_index_lookup(self):
+        self.assertEqual(self.indexed.where(key_equals(_user, 3)).to_list(),
+                         [(3, 3), (3, 8), (3, 13), (3, 18)])
+        self.assertEqual(self.indexed.where(key_equals(_user, 7)).to_list(), [])
+
+    def test_with_index_does_not_scan(self):
+        indexed = pinq.as_queryable(self.rows).with_index(self.key)
+        del self.checked[:]
+        self.assertEqual(indexed.where(key_equals(self.key, 1)).count(), 4)
+        self.assertEqual(self.checked, [])
+
+    def test_with_index_repeated_queries(self):
+        for key in range(5):
+            self.assertEqual(self.indexed.where(key_equals(_user, key)).select(
+                lambda row: row[1]).to_list(), list(range(key, 20, 5)))
+        self.assertEqual(self.indexed.count(), 20)
+        self.assertEqual(self.indexed.to_list(), self.rows)
+
+    def test_with_index_other_predicates(self):
+        self.assertEqual(self.indexed.where(key_equals(lambda row: row[1], 6)).to_list(),
+                         [(1, 6)])
+        self.assertEqual(self.indexed.where(lambda row: row[1] < 2).to_list(), [(0, 0), (1, 1)])
+        self.assertEqual(self.indexed.where(lambda row, i: i == 2).to_list(), [(2, 2)])
+
+    def test_with_index_unhashable_key(self):
+        self.assertEqual(self.indexed.where(key_equals(_user, [1])).to_list(), [])
+
+    def test_with_index_lineage(self):
+        queryable = self.indexed.where(key_equals(_user, 3))
+        self.assertEqual(queryable._lineage[1], 'where')
+
+    def test_with_index_type_error(self):
+        self.assertRaises(TypeError, pinq.as_queryable(self.rows).with_index, 100)
+        self.assertRaises(TypeError, self.indexed.where, 100)
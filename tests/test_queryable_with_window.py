@@ -0,0 +1,121 @@
+import unittest
+import pinq
+
+
+class queryable_with_window_tests(unittest.TestCase):
+
+    def setUp(self):
+        self.queryable0 = pinq.as_queryable([])
+        self.scores = [("b", 3), ("a", 5), ("b", 1), ("a", 5), ("a", 2), ("b", 4)]
+        self.queryable1 = pinq.as_queryable(self.scores)
+
+    def _values(self, queryable, name):
+        return [(element, values[name]) for element, values in queryable]
+
+    def test_with_window_empty(self):
+        self.assertEqual(self.queryable0.with_window(
+            {"n": "row_number"}, lambda x: x, lambda x: x).to_list(), [])
+
+    def test_with_window_row_number(self):
+        self.assertEqual(self._values(self.queryable1.with_window(
+            {"n": "row_number"}, lambda x: x[0], lambda x: x[1]), "n"), [
+                (("a", 2), 1), (("a", 5), 2), (("a", 5), 3),
+                (("b", 1), 1), (("b", 3), 2), (("b", 4), 3)])
+
+    def test_with_window_rank(self):
+        queryable = self.queryable1.with_window(
+            {"rank": "rank", "dense": "dense_rank"}, lambda x: x[0], lambda x: -x[1])
+        self.assertEqual([(values["rank"], values["dense"]) for _, values in queryable], [
+            (1, 1), (1, 1), (3, 2), (1, 1), (2, 2), (3, 3)])
+
+    def test_with_window_no_order(self):
+        queryable = self.queryable1.with_window({"rank": "rank", "n": "row_number"},
+                                                lambda x: x[0])
+        self.assertEqual([element for element, _ in queryable], [
+            ("a", 5), ("a", 5), ("a", 2), ("b", 3), ("b", 1), ("b", 4)])
+        self.assertEqual([values["rank"] for _, values in queryable], [1] * 6)
+        self.assertEqual([values["n"] for _, values in queryable], [1, 2, 3, 1, 2, 3])
+
+    def test_with_window_no_partition(self):
+        self.assertEqual(self._values(pinq.as_queryable([3, 1, 2]).with_window(
+            {"n": "row_number"}, order_by=lambda x: x), "n"), [(1, 1), (2, 2), (3, 3)])
+
+    def test_with_window_lag_lead(self):
+        queryable = self.queryable1.with_window({
+            "previous": ("lag", lambda x: x[1]),
+            "next": ("lead", lambda x: x[1], 1, 0),
+            "after_next": ("lead", lambda x: x[1], 2)}, lambda x: x[0], lambda x: x[1])
+        self.assertEqual([(values["previous"], values["next"], values["after_next"])
+                          for _, values in queryable], [
+            (None, 5, 5), (2, 5, None), (5, 0, None),
+            (None, 3, 4), (1, 4, None), (3, 0, None)])
+
+    def test_with_window_lag_offset(self):
+        self.assertEqual(self._values(pinq.as_queryable(range(5)).with_window(
+            {"lag": ("lag", lambda x: x * 10, 2, -1)}, order_by=lambda x: x), "lag"), [
+                (0, -1), (1, -1), (2, 0), (3, 10), (4, 20)])
+
+    def test_with_window_cumulative(self):
+        queryable = self.queryable1.with_window({
+            "total": ("sum", lambda x: x[1]), "count": "count",
+            "low": ("min", lambda x: x[1]), "high": ("max", lambda x: -x[1]),
+            "mean": ("average", lambda x: x[1])}, lambda x: x[0], lambda x: x[1])
+        self.assertEqual([(values["total"], values["count"], values["low"], values["high"])
+                          for _, values in queryable], [
+            (2, 1, 2, -2), (7, 2, 2, -2), (12, 3, 2, -2),
+            (1, 1, 1, -1), (4, 2, 1, -1), (8, 3, 1, -1)])
+        self.assertEqual([values["mean"] for _, values in queryable][:3], [2.0, 3.5, 4.0])
+
+    def test_with_window_ordered_queryable(self):
+        queryable = self.queryable1.order_by_descending(lambda x: x[1]).then_by(
+            lambda x: x[0]).with_window({"rank": "rank"}, lambda x: x[0])
+        self.assertEqual(self._values(queryable, "rank"), [
+            (("a", 5), 1), (("a", 5), 1), (("a", 2), 3),
+            (("b", 4), 1), (("b", 3), 2), (("b", 1), 3)])
+
+    def test_with_window_presorted(self):
+        queryable = pinq.as_queryable(iter([("b", 1), ("b", 1), ("a", 7), ("b", 2)])).with_window(
+            {"rank": "rank", "next": ("lead", lambda x: x[1])}, lambda x: x[0], lambda x: x[1],
+            presorted=True)
+        self.assertEqual([(values["rank"], values["next"]) for _, values in queryable], [
+            (1, 1), (1, None), (1, None), (1, None)])
+
+    def test_with_window_presorted_unbounded(self):
+        def _endless():
+            i = 0
+            while True:
+                yield i
+                i += 1
+        queryable = pinq.as_queryable(_endless()).stream().with_window(
+            {"next": ("lead", lambda x: x, 3)}, lambda x: x // 10, presorted=True)
+        self.assertEqual([values["next"] for _, values in queryable.take(10)],
+                         [3, 4, 5, 6, 7, 8, 9, None, None, None])
+
+    def test_with_window_result_transform(self):
+        self.assertEqual(pinq.as_queryable([2, 1]).with_window(
+            {"n": "row_number"}, order_by=lambda x: x,
+            result_transform=lambda x, values: (values["n"], x)).to_list(), [(1, 1), (2, 2)])
+
+    def test_with_window_memory_budget(self):
+        data = [(i * 7919) % 1000 for i in range(5000)]
+        with pinq.MemoryBudget(4096, spill=True):
+            result = pinq.as_queryable(data).with_window(
+                {"n": "row_number"}, lambda x: x % 3, lambda x: x).to_list()
+        self.assertEqual([element for element, _ in result],
+                         sorted(data, key=lambda x: (x % 3, x)))
+
+    def test_with_window_functions_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.with_window, ["rank"])
+
+    def test_with_window_selector_type_error(self):
+        self.assertRaises(TypeError, self.queryable1.with_window, {"n": "rank"}, 100)
+        self.assertRaises(TypeError, self.queryable1.with_window, {"n": "rank"}, order_by=100)
+        self.assertRaises(TypeError, self.queryable1.with_window, {"n": ("lag", 100)})
+        self.assertRaises(TypeError, self.queryable1.with_window, {"n": ("sum", 100)})
+
+    def test_with_window_function_value_error(self):
+        self.assertRaises(ValueError, self.queryable1.with_window, {})
+        self.assertRaises(ValueError, self.queryable1.with_window, {"n": "ntile"})
+        self.assertRaises(ValueError, self.queryable1.with_window, {"n": ("rank", 1)})
+        self.assertRaises(ValueError, self.queryable1.with_window,
+                          {"n": ("lead", lambda x: x, 0)})